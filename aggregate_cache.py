@@ -0,0 +1,279 @@
+"""
+This module contains the persisted cache of the monthly and weekly metrics aggregates.
+The summable metrics (See: metrics.MetricsAggregate) of the complete months and ISO weeks are
+stored per user in a Json file next to the data with the version of the data which they have
+been calculated from (See: BaseStorage.get_version). Eg.:
+    {"version": "1234:1585555200000000000:2048|-",
+     "buckets": {"42|M|2020-03": [10000, 600, 100, -300, 20],
+                 "42|W|2020-W13": [2400, 150, 30, -10, 5]}}
+The cache file is dropped at loading if its version is not the version of the data (Eg.: The
+data has been changed while the application was not running).
+A range is split into complete months, complete ISO weeks and the remaining days at the edges.
+Only the edge days and the not cached buckets are calculated from the records (Only these spans
+are read from the storage).
+A change of a day invalidates the month and the ISO week of the day.
+The cache file is written by 'save' (Eg.: When DataProcessor is flushed or closed), not by the
+changes and the queries.
+"""
+
+import os
+import sys
+from datetime import date as datetime_date
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, "tools"))  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, "storage"))  # noqa: E402
+
+from color_logger import ColoredLogger
+from file_lock import FileLock
+from file_lock import get_lock_path
+from helper_functions import write_file_atomically
+import json_codec
+from metrics import MetricsAggregate
+
+# Name of the cache file if the storage is a directory (Eg.: Monthly Json shards).
+CACHE_FILE_NAME = "aggregates.json"
+
+
+def get_cache_path(path):
+    """
+    Provide the path of the aggregate cache file of a data file or a data directory.
+    :param path: Path of the data file or directory.
+    :return: Path of the cache file.
+    """
+
+    if os.path.isdir(path):
+        return os.path.join(path, CACHE_FILE_NAME)
+    return "{}.aggregates".format(path)
+
+
+def get_bucket_keys(user_id, ordinal):
+    """
+    Provide the keys of the buckets (Month and ISO week) which contain a day.
+    :param user_id: ID of the user.
+    :param ordinal: Day ordinal of the date.
+    :return: Tuple: (month key, week key)
+    """
+
+    day = datetime_date.fromordinal(ordinal)
+    iso_year, iso_week, _ = day.isocalendar()
+    return (
+        "{}|M|{:04d}-{:02d}".format(user_id, day.year, day.month),
+        "{}|W|{:04d}-W{:02d}".format(user_id, iso_year, iso_week),
+    )
+
+
+def get_month_end(ordinal):
+    """
+    Provide the last day of the month of a day.
+    :param ordinal: Day ordinal of the date.
+    :return: Day ordinal of the last day of the month.
+    """
+
+    day = datetime_date.fromordinal(ordinal)
+    if day.month == 12:
+        return datetime_date(day.year + 1, 1, 1).toordinal() - 1
+    return datetime_date(day.year, day.month + 1, 1).toordinal() - 1
+
+
+class AggregateCache(object):
+    """
+    This class contains the aggregate cache related attributes.
+    """
+
+    def __init__(self, path, version, c_logger=None):
+        """
+        Init method of the 'AggregateCache' class.
+        :param path: Path of the cache file. It is created by the first save.
+        :param version: The current version of the data (See: BaseStorage.get_version).
+        :param c_logger: Logger instance (ColoredLogger type is recommended).
+        """
+
+        self.path = path
+        self.c_logger = c_logger if c_logger else self.__set_up_default_logger()
+        # The cache file is written by other processes as well (See: file_lock module).
+        self.file_lock = FileLock(get_lock_path(self.path), c_logger=self.c_logger)
+        # Version of the data which the buckets belong to. The cache is not saved if it is None
+        # (Eg.: The buckets contain not yet written changes).
+        self.version = version
+        # Structure: {"42|M|2020-03": [10000, 600, 100, -300, 20], ...}
+        self._buckets = {}
+        self._is_dirty = False
+        self.reload()
+
+    @staticmethod
+    def __set_up_default_logger():
+        """
+        Set-up a default logger if it is not provided as parameter.
+        :return: Instance of ColoredLogger
+        """
+
+        # Set-up the main logger instance.
+        path_of_log_file = os.path.join(PATH_OF_FILE_DIR, "logs", "aggregate_cache.log")
+        return_logger = ColoredLogger(os.path.basename(__file__), log_file_path=path_of_log_file)
+        return_logger.info("Default logger has been set-up in aggregate_cache module.")
+
+        return return_logger
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def reload(self):
+        """
+        Load the cache file. A not valid cache file or the cache of another version of the data
+        is ignored (The cache is rebuilt).
+        :return: None
+        """
+
+        self._buckets = {}
+        self._is_dirty = False
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "rb") as opened_file:
+                cache_content = json_codec.loads(opened_file.read())
+            if not isinstance(cache_content, dict) or not isinstance(
+                cache_content.get("buckets"), dict
+            ):
+                raise ValueError("The content is not a valid aggregate cache.")
+        except (OSError, ValueError) as load_error:
+            self.c_logger.warning(
+                "Cannot load the aggregate cache: {} ERROR: {}".format(self.path, load_error)
+            )
+            return
+        if cache_content.get("version") != self.version:
+            self.c_logger.info(
+                "The aggregate cache belongs to another version of the data: {}".format(
+                    cache_content.get("version")
+                )
+            )
+            return
+        self._buckets = cache_content["buckets"]
+        self.c_logger.info("Loaded aggregate buckets: {}".format(len(self._buckets)))
+
+    def save(self):
+        """
+        Write the cache file (Under the lock of the cache) if it has been changed.
+        The cache is an optimization so an error of the writing is logged and it is not raised
+        (Eg.: The cache is saved by a data write).
+        :return: None
+        """
+
+        if not self._is_dirty or self.version is None:
+            return
+        # The buckets are copied first, they may be changed by another thread (Write-behind).
+        content = json_codec.dumps({"version": self.version, "buckets": dict(self._buckets)})
+        try:
+            with self.file_lock:
+                write_file_atomically(self.path, content)
+        except (OSError, TimeoutError) as save_error:
+            self.c_logger.warning(
+                "Cannot save the aggregate cache: {} ERROR: {}".format(self.path, save_error)
+            )
+            return
+        self._is_dirty = False
+
+    def set_version(self, version):
+        """
+        Set the version of the data which the buckets belong to. It is called after the changes
+        of the data have been applied to the buckets (Invalidated).
+        :param version: Version of the data or None if the buckets contain not yet written
+                        changes (The cache is not saved until the next version is set).
+        :return: None
+        """
+
+        if version != self.version:
+            self.version = version
+            self._is_dirty = True
+
+    def invalidate(self, user_id, ordinals):
+        """
+        Remove the buckets (Month and ISO week) of the changed days of a user.
+        The version of the changed data is set by the next 'set_version' call.
+        :param user_id: ID of the user.
+        :param ordinals: Day ordinals of the changed days.
+        :return: None
+        """
+
+        for ordinal in ordinals:
+            for bucket_key in get_bucket_keys(user_id, ordinal):
+                if self._buckets.pop(bucket_key, None) is not None:
+                    self.c_logger.debug("Invalidated aggregate bucket: {}".format(bucket_key))
+                    self._is_dirty = True
+
+    def clear(self, user_id):
+        """
+        Remove all buckets of a user (Eg.: The data has been changed by another process).
+        The version of the changed data is set by the next 'set_version' call.
+        :param user_id: ID of the user.
+        :return: None
+        """
+
+        prefix = "{}|".format(user_id)
+        for bucket_key in [key for key in self._buckets if key.startswith(prefix)]:
+            del self._buckets[bucket_key]
+            self._is_dirty = True
+
+    @staticmethod
+    def __get_complete_bucket(ordinal, end_ordinal):
+        """
+        Provide the complete bucket which starts on a day and ends in the range.
+        A month is preferred. A week is not used if it would skip the start of a complete month.
+        :param ordinal: Day ordinal of the first day of the bucket.
+        :param end_ordinal: Day ordinal of the end of the range.
+        :return: Tuple: (bucket type, end ordinal of the bucket) or None. Bucket type: "M" or "W"
+        """
+
+        day = datetime_date.fromordinal(ordinal)
+        if day.day == 1 and get_month_end(ordinal) <= end_ordinal:
+            return "M", get_month_end(ordinal)
+        if day.weekday() != 0 or ordinal + 6 > end_ordinal:
+            return None
+        next_month_start = get_month_end(ordinal) + 1
+        if next_month_start <= ordinal + 6 and get_month_end(next_month_start) <= end_ordinal:
+            return None
+        return "W", ordinal + 6
+
+    def get_aggregate(self, user_id, start_ordinal, end_ordinal, get_raw_aggregate):
+        """
+        Provide the summed metrics of a user in a date range (Both ends are included).
+        :param user_id: ID of the user.
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :param get_raw_aggregate: Function which calculates the aggregate of a range from the
+                                  records. Parameters: (start ordinal, end ordinal)
+        :return: Instance of MetricsAggregate.
+        """
+
+        aggregate = MetricsAggregate()
+        raw_start_ordinal = None
+        ordinal = start_ordinal
+        while ordinal <= end_ordinal:
+            complete_bucket = self.__get_complete_bucket(ordinal, end_ordinal)
+            if complete_bucket is None:
+                if raw_start_ordinal is None:
+                    raw_start_ordinal = ordinal
+                ordinal += 1
+                continue
+
+            if raw_start_ordinal is not None:
+                aggregate.merge(get_raw_aggregate(raw_start_ordinal, ordinal - 1))
+                raw_start_ordinal = None
+            bucket_type, bucket_end_ordinal = complete_bucket
+            month_key, week_key = get_bucket_keys(user_id, ordinal)
+            bucket_key = month_key if bucket_type == "M" else week_key
+            if bucket_key not in self._buckets:
+                self.c_logger.debug("Calculating aggregate bucket: {}".format(bucket_key))
+                self._buckets[bucket_key] = list(
+                    get_raw_aggregate(ordinal, bucket_end_ordinal).as_tuple()
+                )
+                self._is_dirty = True
+            aggregate.merge(MetricsAggregate.from_values(self._buckets[bucket_key]))
+            ordinal = bucket_end_ordinal + 1
+
+        if raw_start_ordinal is not None:
+            aggregate.merge(get_raw_aggregate(raw_start_ordinal, end_ordinal))
+        return aggregate
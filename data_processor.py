@@ -1,29 +1,125 @@
-import json
+import atexit
 import os
 import sys
+from contextlib import nullcontext
 from datetime import datetime
 from datetime import timedelta
+from functools import partial
 
 PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
 
 sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, "storage"))  # noqa: E402
 
+from aggregate_cache import AggregateCache
+from aggregate_cache import get_cache_path
+from base_storage import BaseStorage
+from binary_storage import BinaryStorage
 from color_logger import ColoredLogger
+from json_storage import DEFAULT_BACKEND
+from json_storage import JOURNAL_COMPACTION_LIMIT
+from json_storage import JsonStorage
+from metrics import MetricsAggregate
+from metrics_index import MetricsPrefixIndex
+from metrics_index import ROLLING_WINDOWS
+from record_history import RecordHistory
+from record_history import get_history_path
+from sharded_json_storage import ShardedJsonStorage
+from sqlite_storage import SqliteStorage
+from team_metrics import TeamAggregator
+from time_distribution import MinuteHistogram
+from time_distribution import PERCENTILES
+from time_distribution import get_exact_statistics
+from time_record import TimeRecord
+from time_record import date_to_ordinal
+from time_record import is_valid_time_range
+from time_record import minutes_to_time
+from time_record import ordinal_to_date
+from time_record import time_to_minutes
+from user_partitioned_store import UserPartitionedStore
+from write_behind_storage import WriteBehindStorage
 
 CONFIG_FILE = os.path.join(PATH_OF_FILE_DIR, "conf", "time_data.json")
-FMT = "%H:%M"
+# Directory of the user partitions (Whole department, see: user_partitioned_store module).
+USERS_DIR = os.path.join(PATH_OF_FILE_DIR, "conf", "users")
 DATE_FORMAT = "%Y.%m.%d."
+# The storage is selected based on the extension of the config file. A path without extension is
+# a directory of monthly Json shards (Eg.: conf/data).
+STORAGES = {
+    ".json": JsonStorage,
+    ".db": SqliteStorage,
+    ".sqlite": SqliteStorage,
+    ".bin": BinaryStorage,
+    "": ShardedJsonStorage,
+}
 
 
 class DataProcessor(object):
-    def __init__(self, config: str = CONFIG_FILE, c_logger: ColoredLogger = None):
+    def __init__(
+        self,
+        config: str = CONFIG_FILE,
+        c_logger: ColoredLogger = None,
+        journal_compaction_limit: int = JOURNAL_COMPACTION_LIMIT,
+        backend: str = DEFAULT_BACKEND,
+        storage: BaseStorage = None,
+        write_behind: bool = False,
+        keep_history: bool = True,
+        user_id: str = None,
+        users_dir: str = USERS_DIR,
+        aggregate_cache: bool = True,
+    ):
         self.config = config
         self.c_logger = c_logger if c_logger else self.__set_up_default_logger()
+        # The store of the whole department. It is used only if the user ID is set.
+        self.user_store = None
+        self.user_id = user_id
+        if storage is None and user_id is not None:
+            self.c_logger.info("Getting the partition of the user: {}".format(user_id))
+            self.user_store = UserPartitionedStore(users_dir, c_logger=self.c_logger)
+            storage = self.user_store.get_partition(user_id)
+            self.config = storage.path
         self.c_logger.info("Getting config file: {}".format(self.config))
-        self.c_logger.info("Starting to check config file existence.")
-        self._check_config_exist()
-        self.c_logger.info("Starting to get date from config file.")
-        self.data = self.get_data()
+        self.storage = (
+            storage
+            if storage is not None
+            else self.__create_storage(
+                journal_compaction_limit=journal_compaction_limit, backend=backend
+            )
+        )
+        self.c_logger.info("Used storage: {}".format(type(self.storage).__name__))
+        # Listeners of the change events (See: add_change_listener).
+        self._change_listeners = []
+        # Prefix-sum index of the metrics (Whole history). It is built by the first rolling
+        # series query and it is updated by the own changes.
+        self._metrics_index = None
+        # Persisted monthly and weekly aggregates (See: aggregate_cache module).
+        self.aggregate_cache = None
+        if aggregate_cache:
+            # The cache file of another version of the data is dropped so the version is
+            # read under the storage lock (Nothing is written between the loading and reading).
+            with self.__locked(self.storage.file_lock):
+                self.storage.reload_if_changed()
+                self.aggregate_cache = AggregateCache(
+                    get_cache_path(self.storage.path),
+                    version=self.storage.get_version(),
+                    c_logger=self.c_logger,
+                )
+        # Version history of the changes for the point-in-time reads (See: record_history module).
+        self.history = (
+            RecordHistory(get_history_path(self.storage.path), c_logger=self.c_logger)
+            if keep_history
+            else None
+        )
+        if write_behind:
+            self.c_logger.info("Write-behind mode is enabled.")
+            # The version history is appended when the records are flushed into the storage.
+            self.storage = WriteBehindStorage(
+                self.storage,
+                c_logger=self.c_logger,
+                writer=partial(self.__flush_records, self.storage),
+            )
+            # The not yet written changes are flushed when the interpreter exits.
+            atexit.register(self.flush)
 
     @staticmethod
     def __set_up_default_logger():
@@ -39,79 +135,90 @@ class DataProcessor(object):
 
         return return_logger
 
-    def _check_config_exist(self):
-        self.c_logger.info("Start to check if getting config file exists.")
-        if not os.path.isfile(self.config):
-            warning_msg = "The getting '{}' config file doesn't exist.".format(self.config)
-            self.c_logger.warning(warning_msg)
-            try:
-                open(self.config, "a").close()
-            except Exception as unexpected_error:
-                self.c_logger.error(
-                    "Cannot create empty config file on '{}' path. ERROR: {}".format(
-                        self.config, unexpected_error
-                    )
-                )
-                raise unexpected_error
-        self.c_logger.info("The getting '{}' config exists.".format(self.config))
+    def __create_storage(self, journal_compaction_limit, backend):
+        """
+        Create the storage of the config file based on its extension.
+        :param journal_compaction_limit: Journal compaction limit of the Json storage.
+        :param backend: In-memory backend of the Json storage.
+        :return: Instance of a storage (Eg.: JsonStorage or SqliteStorage).
+        """
+
+        extension = os.path.splitext(self.config)[1].lower()
+        if extension not in STORAGES:
+            raise Exception("Not supported config file type: {}".format(self.config))
+        if STORAGES[extension] is JsonStorage:
+            return JsonStorage(
+                self.config,
+                c_logger=self.c_logger,
+                journal_compaction_limit=journal_compaction_limit,
+                backend=backend,
+            )
+        return STORAGES[extension](self.config, c_logger=self.c_logger)
 
     def get_data(self):
-        self.c_logger.info("Start to get data from config Json file.")
-        if os.stat(self.config).st_size == 0:
-            self.c_logger.warning("The data Json file is empty.")
-            return [{}]
-        with open(self.config, "r") as opened_file:
-            json_data = json.load(opened_file)
-        self.c_logger.debug(json_data)
-        self.c_logger.info("The config Json file has been successfully parsed.")
-        return json_data
+        """
+        Provide all records in the format of the Json config file.
+        :return: Structure: [{"date": "2020.03.30.", "from": "08:00", "to": "17:25",
+                 "break": "00:22"}, ...]
+        """
+
+        return self.data
+
+    @property
+    def data(self):
+        """
+        The records in the format of the Json config file ordered by date.
+        Structure: [{"date": "2020.03.30.", "from": "08:00", "to": "17:25", "break": "00:22"}, ...]
+        """
+
+        return [single_record.to_dict() for single_record in self.storage.records()]
 
     def get_dates(self):
         self.c_logger.info("Parse the dates from Json config.")
-        return_list = []
-        self.c_logger.info("Extract the data structure")
-        for dicts in self.data:
-            self.c_logger.debug("Extracted dict: {}".format(dicts))
-            return_list.append(dicts["date"])
-        self.c_logger.debug("Parsed dates: {}".format(return_list))
-        self.c_logger.info("Successfully get dates from Json config.")
+        return_list = [ordinal_to_date(int(ordinal)) for ordinal in self.storage.ordinals()]
+        self.c_logger.info("Successfully get {} dates from Json config.".format(len(return_list)))
         return return_list
 
+    def get_start_minutes(self):
+        """
+        Provide the arriving times of the records (Ordered by date) in minutes.
+        :return: List (Or NumPy array in case of "numpy" backend) of minutes.
+        """
+
+        return self.storage.get_columns()[1]
+
+    def get_leaving_minutes(self):
+        """
+        Provide the leaving times of the records (Ordered by date) in minutes.
+        :return: List (Or NumPy array in case of "numpy" backend) of minutes.
+        """
+
+        return self.storage.get_columns()[2]
+
+    def get_effective_minutes(self):
+        """
+        Provide the effective times (leaving - arriving) of the records (Ordered by date) in
+        minutes.
+        :return: List (Or NumPy array in case of "numpy" backend) of minutes.
+        """
+
+        return self.storage.get_effective_minutes()
+
     def get_start_times(self):
         self.c_logger.info("Parse the arriving times from Json config.")
-        return_list = []
-        for dicts in self.data:
-            self.c_logger.debug("Extracted dict: {}".format(dicts))
-            return_list.append(dicts["from"])
-        self.c_logger.debug("Parsed arriving times: {}".format(return_list))
+        return_list = [minutes_to_time(minutes) for minutes in self.get_start_minutes()]
         self.c_logger.info("Successfully get arriving times from Json config.")
         return return_list
 
     def get_leaving_times(self):
         self.c_logger.info("Parse the leaving times from Json config.")
-        return_list = []
-        for dicts in self.data:
-            self.c_logger.debug("Extracted dict: {}".format(dicts))
-            return_list.append(dicts["to"])
-        self.c_logger.debug("Parsed leaving times: {}".format(return_list))
+        return_list = [minutes_to_time(minutes) for minutes in self.get_leaving_minutes()]
         self.c_logger.info("Successfully get leaving times from Json config.")
         return return_list
 
     def get_effective_hours(self):
         self.c_logger.info("Get the effective hours based on Json config.")
-        return_list = []
-        for dicts in self.data:
-            self.c_logger.debug("Extracted dict: {}".format(dicts))
-            time_delta = datetime.strptime(dicts["to"], FMT) - datetime.strptime(dicts["from"], FMT)
-            ellapsed_hours = int(divmod(time_delta.total_seconds(), 3600)[0])
-            ellapsed_mins = int(divmod(time_delta.total_seconds(), 60)[0]) - (ellapsed_hours * 60)
-            self.c_logger.debug(
-                "Time delta: {} , Elapsed hours: {} , Elapsed minutes: {}".format(
-                    time_delta, ellapsed_hours, ellapsed_mins
-                )
-            )
-            return_list.append("{:02d}:{:02d}".format(int(ellapsed_hours), int(ellapsed_mins)))
-        self.c_logger.debug("Effective hours: {}".format(return_list))
+        return_list = [minutes_to_time(minutes) for minutes in self.get_effective_minutes()]
         self.c_logger.info("Successfully calculated the effective hours based on the Json config.")
         return return_list
 
@@ -122,26 +229,289 @@ class DataProcessor(object):
         self.c_logger.info("Leaving: {} ; Type: {}".format(to, type(to)))
         self.c_logger.info("Break: {} ; Type: {}".format(break_time, type(break_time)))
 
-        item_found = False
+        self.__store_records([TimeRecord.from_strings(date, start, to, break_time)])
+
+    def set_times(self, records):
+        """
+        Set several records at once (Eg.: A month of badge-reader data).
+        The whole batch is validated before anything is stored and it is persisted once.
+        :param records: Iterable of records. Structure: [{"date": "2020.03.30.", "from": "08:00",
+                        "to": "17:25", "break": "00:22"}, ...]
+        :return: Number of the stored records. A date is stored once (The last record wins).
+        """
+
+        self.c_logger.info("Start to set several records.")
+        new_records = {}
+        invalid_dates = []
+        for single_dict in records:
+            try:
+                single_record = TimeRecord.from_dict(single_dict)
+            except (KeyError, ValueError) as parse_error:
+                raise Exception("Not valid record: {} ERROR: {}".format(single_dict, parse_error))
+            if not is_valid_time_range(single_record.arriving, single_record.leaving):
+                invalid_dates.append(single_dict["date"])
+                continue
+            new_records[single_record.ordinal] = single_record
+
+        if invalid_dates:
+            self.c_logger.error("The time range is NOT correct on dates: {}".format(invalid_dates))
+            raise Exception(
+                "The time range is NOT correct on dates: {}".format(", ".join(invalid_dates))
+            )
+
+        self.__store_records([new_records[ordinal] for ordinal in sorted(new_records)])
+        self.c_logger.info("Number of set records: {}".format(len(new_records)))
+        return len(new_records)
+
+    def __store_records(self, records):
+        """
+        Store records and append the real changes to the version history.
+        The storage lock is held until the metrics index and the aggregate cache are updated, so
+        the changes of other processes are loaded first and nothing is written between the
+        loading and the update (The index is updated only with the own changes).
+        In write-behind mode the records are only collected here, they are written (And the
+        history is appended) by the flushing.
+        The change events are emitted after the storing.
+        :param records: List of TimeRecord.
+        :return: None
+        """
+
+        with self.__locked(self.storage.file_lock):
+            self.reload_if_changed()
+            if isinstance(self.storage, WriteBehindStorage):
+                changes = self.__get_changes(self.storage.upsert_many(records), records)
+            else:
+                changes = self.__write_records(self.storage, records)
+
+            if self._metrics_index is not None:
+                for previous_record, single_record in changes:
+                    self._metrics_index.update(previous_record, single_record)
+            if self.aggregate_cache is not None:
+                self.aggregate_cache.invalidate(
+                    self.__get_cache_user_id(),
+                    [single_record.ordinal for _, single_record in changes],
+                )
+                # The not yet written changes are not part of any version (Write-behind mode).
+                self.__update_cache_version(
+                    self.storage, is_pending=isinstance(self.storage, WriteBehindStorage)
+                )
+        self.__emit_changes(changes)
+
+    def __write_records(self, storage, records):
+        """
+        Write records into a storage and append the real changes to the version history.
+        The history lock is held during the writing so the order of the versions follows the
+        order of the changes (Other processes write the same history).
+        The changes of other processes are loaded first. If the storage has been changed, the
+        derived data (Metrics index and aggregate cache) is dropped (Eg.: Write-behind flushing).
+        The caller sets the version of the aggregate cache after the cache has been updated.
+        :param storage: The written storage (Not the write-behind wrapper).
+        :param records: List of TimeRecord.
+        :return: List of tuples: [(previous TimeRecord or None, new TimeRecord), ...]
+        """
+
+        with self.__locked(storage.file_lock):
+            if storage.reload_if_changed():
+                self.__drop_derived_data()
+            if self.history is None:
+                return self.__get_changes(storage.upsert_many(records), records)
+            with self.history.file_lock:
+                changes = self.__get_changes(storage.upsert_many(records), records)
+                version = self.history.append(changes)
+            self.c_logger.info("Version of the time data: {}".format(version))
+            return changes
+
+    def __flush_records(self, storage, records):
+        """
+        Write the collected records into the wrapped storage (Writer of the write-behind mode).
+        The aggregate cache has been invalidated when the records were collected, so only the
+        version of the written data is set.
+        :param storage: The wrapped storage.
+        :param records: List of TimeRecord.
+        :return: None
+        """
+
+        # The lock of the write-behind wrapper excludes the foreground writers of this process
+        # as well (It is held by the flushing already).
+        with self.__locked(self.storage.file_lock):
+            self.__write_records(storage, records)
+            self.__update_cache_version(storage)
+
+    def __update_cache_version(self, storage, is_pending=False):
+        """
+        Set the version of the aggregate cache to the current version of the storage. It is
+        called under the storage lock after the loading or the writing of the data.
+        :param storage: The storage of the data.
+        :param is_pending: True if the cache contains not yet written changes (Write-behind
+                           mode). The cache is not saved until the changes are written.
+        :return: None
+        """
+
+        if self.aggregate_cache is not None:
+            self.aggregate_cache.set_version(None if is_pending else storage.get_version())
+
+    @staticmethod
+    def __locked(file_lock):
+        """
+        Provide the cross-process lock of a storage as context manager.
+        :param file_lock: Instance of FileLock or None (The storage doesn't use file lock).
+        :return: The lock or a context manager which does nothing.
+        """
+
+        return file_lock if file_lock is not None else nullcontext()
+
+    @staticmethod
+    def __get_changes(previous_records, records):
+        """
+        Provide the real changes of the stored records (The not changed days are skipped).
+        :param previous_records: The previous records of the days (Or None).
+        :param records: The stored records.
+        :return: List of tuples: [(previous TimeRecord or None, new TimeRecord), ...]
+        """
+
+        return [
+            (previous_record, single_record)
+            for previous_record, single_record in zip(previous_records, records)
+            if previous_record != single_record
+        ]
+
+    def add_change_listener(self, listener):
+        """
+        Register a listener of the change events. It is called after a record has been changed
+        by this instance (Eg.: The Metrics tab applies the change to its displayed metrics).
+        :param listener: Function. Parameters: (previous record (TimeRecord or None),
+                         new record (TimeRecord))
+        :return: None
+        """
+
+        self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener):
+        """
+        Unregister a listener of the change events.
+        :param listener: The registered function.
+        :return: None
+        """
+
+        self._change_listeners.remove(listener)
+
+    def __emit_changes(self, changes):
+        """
+        Call the registered listeners with the changes.
+        An error of a listener is logged and it doesn't stop the other listeners.
+        :param changes: List of tuples: [(previous TimeRecord or None, new TimeRecord), ...]
+        :return: None
+        """
+
+        for previous_record, single_record in changes:
+            self.c_logger.debug("Change: {} -> {}".format(previous_record, single_record))
+            for listener in list(self._change_listeners):
+                try:
+                    listener(previous_record, single_record)
+                except Exception as listener_error:
+                    self.c_logger.error(
+                        "Error in change listener '{}': {}".format(listener, listener_error)
+                    )
+
+    def get_version(self, as_of=None):
+        """
+        Provide the version of the time data at a point in time.
+        :param as_of: The point in time. Type:
+                          - None: The current version.
+                          - int: A version (It is returned as it is).
+                          - datetime: The version at the time.
+                          - str: The version at the end of the day (In DATE_FORMAT format).
+        :return: Version. 0 is the version before the first recorded change.
+        """
+
+        if self.history is None:
+            raise Exception("The version history is not kept (keep_history=False).")
+        self.history.reload_if_changed()
+        if as_of is None:
+            return self.history.version
+        if isinstance(as_of, int):
+            return as_of
+        if isinstance(as_of, str):
+            as_of = datetime.strptime(as_of, DATE_FORMAT) + timedelta(days=1)
+        return self.history.get_version_at(as_of.timestamp())
+
+    def reload_if_changed(self):
+        """
+        Reload the changed data if the storage has been changed by another process (Eg.: A sync
+        job or another instance of the application).
+        :return: Bool. True if the data has been reloaded.
+        """
+
+        self.c_logger.info("Starting to check the changes of the storage.")
+        # The storage lock is held so no change is written between the reloading and the
+        # dropping of the derived data.
+        with self.__locked(self.storage.file_lock):
+            is_reloaded = self.storage.reload_if_changed()
+            if is_reloaded:
+                self.__drop_derived_data()
+            self.__update_cache_version(
+                self.storage,
+                is_pending=isinstance(self.storage, WriteBehindStorage) and self.storage.is_dirty,
+            )
+        if self.history is not None:
+            self.history.reload_if_changed()
+        self.c_logger.info("The storage has been changed: {}".format(is_reloaded))
+        return is_reloaded
+
+    def __drop_derived_data(self):
+        """
+        Drop the data which is derived from the records after the storage has been changed by
+        another process. The metrics index is built again by the next range metrics query and
+        the changed days are not known so the cached aggregates of the user are dropped.
+        :return: None
+        """
+
+        self._metrics_index = None
+        if self.aggregate_cache is not None:
+            self.aggregate_cache.clear(self.__get_cache_user_id())
+
+    def get_lock_metrics(self):
+        """
+        Provide the lock wait metrics of the storage (Cross-process lock of the writings).
+        :return: Structure: {"acquisitions": 10, "timeouts": 0, "total_wait": 0.5,
+                 "max_wait": 0.2} (Empty if the storage doesn't use file lock.)
+        """
+
+        return self.storage.lock_metrics
 
-        for single_dict in self.data:
-            self.c_logger.debug("Extracted dict: {}".format(single_dict))
-            for key, value in single_dict.items():
-                if key == "date" and value == date:
-                    single_dict["date"] = date
-                    single_dict["from"] = start
-                    single_dict["to"] = to
-                    single_dict["break"] = break_time
-                    item_found = True
-                    break
-            if item_found:
-                break
+    def flush(self):
+        """
+        Write the not yet written changes into the storage (Write-behind mode) and save the
+        aggregate cache.
+        :return: None
+        """
+
+        self.c_logger.info("Starting to flush the storage.")
+        self.storage.flush()
+        self.__save_aggregate_cache()
 
-        if not item_found:
-            self.data.append({"date": date, "from": start, "to": to, "break": break_time})
+    def __save_aggregate_cache(self):
+        """
+        Save the changed aggregate cache. It is not saved by every change and query (Only the
+        cold start-up uses the cache file).
+        :return: None
+        """
 
-        with open(self.config, "w") as opened_file:
-            json.dump(self.data, opened_file)
+        if self.aggregate_cache is not None:
+            with self.__locked(self.storage.file_lock):
+                self.aggregate_cache.save()
+
+    def close(self):
+        """
+        Release the resources of the used storage (The not yet written changes are flushed).
+        :return: None
+        """
+
+        self.c_logger.info("Starting to close the storage.")
+        self.storage.close()
+        self.__save_aggregate_cache()
+        if self.user_store is not None:
+            self.user_store.close()
 
     def get_time_range(self, start_date, end_date):
         self.c_logger.info("Starting to get date range.")
@@ -158,17 +528,296 @@ class DataProcessor(object):
         self.c_logger.info("The date range has been calculated successfully.")
         return return_date_range
 
+    def get_time_records_in_range(self, start_date, end_date, as_of=None):
+        """
+        Provide the records between the start and end dates (Both are included).
+        The records are found by bisecting the sorted day ordinals so only the records in the
+        range are touched. The days without record are not provided.
+        Use get_columns_in_range for vectorized calculations.
+        :param start_date: Start date as a string in DATE_FORMAT format.
+        :param end_date: End date as a string in DATE_FORMAT format.
+        :param as_of: Provide the records as they were at this point in time (See: get_version).
+                      Only the history of the days in the range is used.
+        :return: Records ordered by date. Type: list of TimeRecord
+        """
+
+        self.c_logger.info("Starting to get records in date range.")
+        self.c_logger.info("Start date: {} , End date: {}".format(start_date, end_date))
+        start_ordinal = date_to_ordinal(start_date)
+        end_ordinal = date_to_ordinal(end_date)
+        records_in_range = self.storage.get_range(start_ordinal, end_ordinal)
+        if as_of is not None:
+            # The history contains only the written changes (Write-behind mode).
+            self.flush()
+            version = self.get_version(as_of)
+            self.c_logger.info("Getting records at version: {}".format(version))
+            records_in_range = self.history.get_range_at(
+                records_in_range, start_ordinal, end_ordinal, version
+            )
+        self.c_logger.debug("Number of records in range: {}".format(len(records_in_range)))
+        return records_in_range
+
+    def get_team_records_in_range(self, start_date, end_date, user_ids=None):
+        """
+        Provide the records of the users of the department between the start and end dates
+        (Both are included) in the format of the Json config file.
+        The records are read from the shared index of the store (The partitions are not opened).
+        :param start_date: Start date as a string in DATE_FORMAT format.
+        :param end_date: End date as a string in DATE_FORMAT format.
+        :param user_ids: IDs of the requested users. All users are provided if it is None.
+        :return: Records of the users ordered by date.
+                 Structure: {"42": [{"date": "2020.03.30.", "from": "08:00", "to": "17:25",
+                             "break": "00:22"}, ...], ...}
+        """
+
+        if self.user_store is None:
+            raise Exception("The team data is available only with a user ID (user_id parameter).")
+        self.c_logger.info("Starting to get team records in date range.")
+        self.c_logger.info("Start date: {} , End date: {}".format(start_date, end_date))
+        # The partitions which have been changed without the index (Eg.: By a single-user
+        # DataProcessor) are indexed again.
+        self.user_store.refresh_index(user_ids=user_ids)
+        team_records = self.user_store.get_team_range(
+            date_to_ordinal(start_date), date_to_ordinal(end_date), user_ids=user_ids
+        )
+        self.c_logger.debug("Number of users in range: {}".format(len(team_records)))
+        return {
+            user_id: [single_record.to_dict() for single_record in records]
+            for user_id, records in team_records.items()
+        }
+
+    def get_team_metrics(self, start_date, end_date, user_ids=None, max_workers=None):
+        """
+        Calculate the metrics (Eg.: Worked hours, overtime, missing days) of the users of the
+        department and of the whole team between the start and end dates (Both are included).
+        The users are aggregated in a process pool (See: team_metrics module).
+        :param start_date: Start date as a string in DATE_FORMAT format.
+        :param end_date: End date as a string in DATE_FORMAT format.
+        :param user_ids: IDs of the requested users. All users are provided if it is None.
+        :param max_workers: Number of the worker processes. Default is the number of the CPUs.
+        :return: Structure: {"users": {"42": {"worked_minutes": 10000, ...}, ...},
+                 "team": {"worked_minutes": 500000, ...}, "seconds": 1.2}
+        """
+
+        if self.user_store is None:
+            raise Exception("The team data is available only with a user ID (user_id parameter).")
+        self.c_logger.info("Starting to get team metrics in date range.")
+        self.c_logger.info("Start date: {} , End date: {}".format(start_date, end_date))
+        self.user_store.refresh_index(user_ids=user_ids)
+        return TeamAggregator(
+            self.user_store, c_logger=self.c_logger, max_workers=max_workers
+        ).aggregate(date_to_ordinal(start_date), date_to_ordinal(end_date), user_ids=user_ids)
+
+    def get_time_distribution(self, start_date, end_date, percentiles=PERCENTILES):
+        """
+        Calculate the distribution statistics (Percentiles, histogram, mean and standard
+        deviation) of the arriving and leaving times of the worked days between the start and
+        end dates (Both are included). The percentiles are exact (See: time_distribution module).
+        :param start_date: Start date as a string in DATE_FORMAT format.
+        :param end_date: End date as a string in DATE_FORMAT format.
+        :param percentiles: The calculated percentiles (0 - 100).
+        :return: Structure: {"arriving": {"count": 20, "mean": 482.5, "stddev": 12.3,
+                 "percentiles": {10: 465.0, ...}, "histogram": [0, 0, ..., 3, ...]},
+                 "leaving": {...}} (The times are minute-of-day values)
+        """
+
+        self.c_logger.info("Starting to get time distribution in date range.")
+        self.c_logger.info("Start date: {} , End date: {}".format(start_date, end_date))
+        _, arriving, leaving, _ = self.get_columns_in_range(start_date, end_date)
+        worked_times = [
+            (arriving_time, leaving_time)
+            for arriving_time, leaving_time in zip(arriving, leaving)
+            if arriving_time != 0 and leaving_time != 0
+        ]
+        self.c_logger.debug("Number of worked days in range: {}".format(len(worked_times)))
+        return {
+            "arriving": get_exact_statistics(
+                (times[0] for times in worked_times), percentiles=percentiles
+            ),
+            "leaving": get_exact_statistics(
+                (times[1] for times in worked_times), percentiles=percentiles
+            ),
+        }
+
+    def get_team_time_distribution(
+        self, start_date, end_date, user_ids=None, percentiles=PERCENTILES
+    ):
+        """
+        Calculate the distribution statistics of the arriving and leaving times of the worked
+        days of the users of the department between the start and end dates (Both are included).
+        The times are counted into 1440-bucket histograms in a single pass over the shared index
+        so the percentiles are approximate (See: time_distribution module).
+        :param start_date: Start date as a string in DATE_FORMAT format.
+        :param end_date: End date as a string in DATE_FORMAT format.
+        :param user_ids: IDs of the requested users. All users are provided if it is None.
+        :param percentiles: The calculated percentiles (0 - 100).
+        :return: Structure: {"arriving": {"count": 5000, "mean": 482.5, "stddev": 12.3,
+                 "percentiles": {10: 465, ...}, "histogram": [0, 0, ..., 3, ...]},
+                 "leaving": {...}} (The times are minute-of-day values)
+        """
+
+        if self.user_store is None:
+            raise Exception("The team data is available only with a user ID (user_id parameter).")
+        self.c_logger.info("Starting to get team time distribution in date range.")
+        self.c_logger.info("Start date: {} , End date: {}".format(start_date, end_date))
+        self.user_store.refresh_index(user_ids=user_ids)
+        arriving_histogram = MinuteHistogram()
+        leaving_histogram = MinuteHistogram()
+        for arriving_time, leaving_time in self.user_store.iter_team_times(
+            date_to_ordinal(start_date), date_to_ordinal(end_date), user_ids=user_ids
+        ):
+            arriving_histogram.add(arriving_time)
+            leaving_histogram.add(leaving_time)
+        self.c_logger.debug("Number of worked days in range: {}".format(len(arriving_histogram)))
+        return {
+            "arriving": arriving_histogram.get_statistics(percentiles=percentiles),
+            "leaving": leaving_histogram.get_statistics(percentiles=percentiles),
+        }
+
+    def __get_cache_user_id(self):
+        """
+        Provide the user ID of the aggregate cache keys.
+        :return: The user ID or empty string in the single-user case.
+        """
+
+        return "" if self.user_id is None else str(self.user_id)
+
+    def __get_metrics_index(self):
+        """
+        Provide the prefix-sum index of the metrics. It is built at the first use from all
+        records (Eg.: All shards are loaded), so only the rolling series build it.
+        :return: Instance of MetricsPrefixIndex.
+        """
+
+        metrics_index = self._metrics_index
+        if metrics_index is None:
+            self.c_logger.info("Starting to build the metrics index.")
+            metrics_index = MetricsPrefixIndex(self.storage.records())
+            self._metrics_index = metrics_index
+            self.c_logger.info("Days in the metrics index: {}".format(len(metrics_index)))
+        return metrics_index
+
+    def __get_raw_aggregate(self, start_ordinal, end_ordinal):
+        """
+        Calculate the summed metrics of a range without the aggregate cache.
+        Only the records of the range are read (Eg.: Only the shards of the range are loaded).
+        If the prefix-sum index has been built already (See: get_rolling_series), the sums are
+        two lookups in it.
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :return: Instance of MetricsAggregate.
+        """
+
+        if self._metrics_index is not None:
+            return self._metrics_index.get_aggregate(start_ordinal, end_ordinal)
+        return MetricsAggregate.from_records(self.storage.get_range(start_ordinal, end_ordinal))
+
+    def get_metrics_in_range(self, start_date, end_date):
+        """
+        Provide the summed metrics (Eg.: Worked minutes, overtime) between the start and end
+        dates (Both are included).
+        The complete months and ISO weeks are read from the persisted aggregate cache (See:
+        aggregate_cache module). The days at the edges, the not cached buckets and the whole
+        range without the aggregate cache are summed from the records of the range, so the
+        history before and after the range is not loaded.
+        :param start_date: Start date as a string in DATE_FORMAT format.
+        :param end_date: End date as a string in DATE_FORMAT format.
+        :return: Instance of MetricsAggregate.
+        """
+
+        self.c_logger.info("Starting to get metrics in date range.")
+        self.c_logger.info("Start date: {} , End date: {}".format(start_date, end_date))
+        start_ordinal = date_to_ordinal(start_date)
+        end_ordinal = date_to_ordinal(end_date)
+        # The derived data is changed by the write-behind flushing thread as well.
+        with self.__locked(self.storage.file_lock):
+            if self.aggregate_cache is None:
+                return self.__get_raw_aggregate(start_ordinal, end_ordinal)
+            return self.aggregate_cache.get_aggregate(
+                self.__get_cache_user_id(), start_ordinal, end_ordinal, self.__get_raw_aggregate
+            )
+
+    def get_rolling_series(self, start_date, end_date, windows=ROLLING_WINDOWS):
+        """
+        Provide the rolling-window sums of the worked minutes (Eg.: 7/30/90 days) and the
+        cumulative overtime balance of every day between the start and end dates (Both are
+        included) for plotting the trends.
+        The series are calculated from the prefix-sum index in one pass (See: metrics_index
+        module). The index of the whole history is built by the first call and it is updated
+        incrementally by the changes (The range metrics use it as well once it is built).
+        :param start_date: Start date as a string in DATE_FORMAT format.
+        :param end_date: End date as a string in DATE_FORMAT format.
+        :param windows: Lengths of the rolling windows in days.
+        :return: Structure: {"dates": ["2020.03.01.", ...], "worked_minutes": {7: [2400, ...],
+                 30: [...], 90: [...]}, "overtime_balance_minutes": [20, ...]}
+                 The lists have one value per day of the range.
+        """
+
+        self.c_logger.info("Starting to get rolling series in date range.")
+        self.c_logger.info("Start date: {} , End date: {}".format(start_date, end_date))
+        start_ordinal = date_to_ordinal(start_date)
+        end_ordinal = date_to_ordinal(end_date)
+        with self.__locked(self.storage.file_lock):
+            rolling_series = self.__get_metrics_index().get_rolling_series(
+                start_ordinal, end_ordinal, windows=windows
+            )
+        rolling_series["dates"] = [
+            ordinal_to_date(ordinal) for ordinal in rolling_series.pop("ordinals")
+        ]
+        self.c_logger.debug("Days in rolling series: {}".format(len(rolling_series["dates"])))
+        return rolling_series
+
+    def get_columns_in_range(self, start_date, end_date):
+        """
+        Provide the records between the start and end dates (Both are included) as columns.
+        In case of "numpy" backend the columns are array views so the calculations on them are
+        vectorized. The columns must not be modified.
+        :param start_date: Start date as a string in DATE_FORMAT format.
+        :param end_date: End date as a string in DATE_FORMAT format.
+        :return: Tuple of columns: (ordinals, arriving, leaving, break_time)
+        """
+
+        self.c_logger.info("Starting to get columns in date range.")
+        self.c_logger.info("Start date: {} , End date: {}".format(start_date, end_date))
+        return self.storage.get_columns(date_to_ordinal(start_date), date_to_ordinal(end_date))
+
+    def get_records_in_range(self, start_date, end_date, fill_missing=False, as_of=None):
+        """
+        Provide the records between the start and end dates (Both are included) in the format of
+        the Json config file.
+        :param start_date: Start date as a string in DATE_FORMAT format.
+        :param end_date: End date as a string in DATE_FORMAT format.
+        :param fill_missing: If it is True, the days without record are provided as well with
+                             '00:00' times.
+        :param as_of: Provide the records as they were at this point in time (See: get_version).
+        :return: Records ordered by date.
+                 Structure: [{"date": "2020.03.30.", "from": "08:00", "to": "17:25",
+                              "break": "00:22"}, ...]
+        """
+
+        time_records = self.get_time_records_in_range(start_date, end_date, as_of=as_of)
+
+        if not fill_missing:
+            return [single_record.to_dict() for single_record in time_records]
+
+        records_by_ordinal = {
+            single_record.ordinal: single_record for single_record in time_records
+        }
+        return [
+            records_by_ordinal.get(ordinal, TimeRecord(ordinal, 0, 0, 0)).to_dict()
+            for ordinal in range(date_to_ordinal(start_date), date_to_ordinal(end_date) + 1)
+        ]
+
     def get_arriving_leaving_break_times_based_on_date(self, date):
         self.c_logger.info("Starting to get arriving and leaving time based on date.")
         self.c_logger.info("Getting date: {}".format(date))
-        for single_dict in self.data:
-            self.c_logger.debug("Extracted dict: {}".format(single_dict))
-            for key, value in single_dict.items():
-                if key == "date" and value == date:
-                    self.c_logger.debug(
-                        "Arriving: {} , Leaving: {}".format(single_dict["from"], single_dict["to"])
-                    )
-                    return single_dict["from"], single_dict["to"], single_dict["break"]
+        single_record = self.storage.get(date_to_ordinal(date))
+        if single_record:
+            single_dict = single_record.to_dict()
+            self.c_logger.debug(
+                "Arriving: {} , Leaving: {}".format(single_dict["from"], single_dict["to"])
+            )
+            return single_dict["from"], single_dict["to"], single_dict["break"]
         self.c_logger.warning(
             "There is not time date for the '{}' date. Return '00:00', '00:00', '00:00'".format(
                 date
@@ -184,28 +833,19 @@ class DataProcessor(object):
         :param arriving: Arriving time as a sting in HH:MM format
         :param leaving: Leaving time as a sting in HH:MM format
         :return: True if the time range is valid else False.
+        :raise ValueError: If a time is not a valid time of day in HH:MM format.
         """
 
         self.c_logger.info("Starting to validate the getting time range.")
         self.c_logger.debug("Arriving time: {} , Leaving time: {}".format(arriving, leaving))
 
-        arriving_time = datetime.strptime(arriving, FMT)
-        arriving_time_in_sec = arriving_time.hour * 3600 + arriving_time.minute * 60
-        self.c_logger.debug(
-            "Arriving hours: {} , Arriving minutes: {}".format(
-                arriving_time.hour, arriving_time.minute
-            )
-        )
+        arriving_time_in_sec = time_to_minutes(arriving) * 60
         self.c_logger.debug("Arriving time in seconds: {}".format(arriving_time_in_sec))
 
-        leaving_time = datetime.strptime(leaving, FMT)
-        leaving_time_in_sec = leaving_time.hour * 3600 + leaving_time.minute * 60
-        self.c_logger.debug(
-            "Leaving hours: {} , Leaving minutes: {}".format(leaving_time.hour, leaving_time.minute)
-        )
+        leaving_time_in_sec = time_to_minutes(leaving) * 60
         self.c_logger.debug("Leaving time in seconds: {}".format(leaving_time_in_sec))
 
-        if leaving_time_in_sec < arriving_time_in_sec:
+        if not is_valid_time_range(arriving_time_in_sec, leaving_time_in_sec):
             self.c_logger.info("The time range is NOT correct.")
             return False
 
@@ -218,7 +858,7 @@ class DataProcessor(object):
 
 if __name__ == "__main__":
     test_instance = DataProcessor()
-    print(test_instance.get_data())
+    print(test_instance.data)
     print(test_instance.get_dates())
     print(test_instance.get_start_times())
     print(test_instance.get_leaving_times())
@@ -4,7 +4,6 @@ This file contains the all Json report generator related attributes.
 
 import os
 import sys
-import json
 
 # Get the path of the directory of the current file.
 PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
@@ -14,6 +13,7 @@ sys.path.append(os.path.join(PATH_OF_FILE_DIR, ".."))  # noqa: E402
 
 from color_logger import ColoredLogger
 from data_processor import DataProcessor
+import json_codec
 
 # TODO: Insert User info to generated file (as header) Eg.: Name, ID, SAP number etc...
 
@@ -75,15 +75,16 @@ class JsonReportGenerator(object):
 
         data_structure = []
 
-        date_range = self.data_processor.get_time_range(self.start_date, self.stop_date)
-        for single_date in date_range:
-            (
-                arriving,
-                leaving,
-                break_time,
-            ) = self.data_processor.get_arriving_leaving_break_times_based_on_date(single_date)
+        for single_record in self.data_processor.get_records_in_range(
+            self.start_date, self.stop_date, fill_missing=True
+        ):
             data_structure.append(
-                {"date": single_date, "arriving": arriving, "leaving": leaving, "break": break_time}
+                {
+                    "date": single_record["date"],
+                    "arriving": single_record["from"],
+                    "leaving": single_record["to"],
+                    "break": single_record["break"],
+                }
             )
 
         self.c_logger.info("The Json data structure has been created successfully.")
@@ -118,6 +119,6 @@ class JsonReportGenerator(object):
 
         data_structure = self.get_data_structure()
         with open(self.file_path, "w") as opened_file:
-            json.dump(data_structure, opened_file, indent=4)
+            opened_file.write(json_codec.dumps(data_structure, indent=4))
 
         self.c_logger.info("Writing the data to Json report file was successful.")
@@ -118,12 +118,20 @@ def remove_unused_old_user_pics():
             os.remove(correct_pic_path)
 
 
-def quit_from_app(main_window):
+def quit_from_app(main_window, data_processor=None):
     """
     Quit from application.
+    :param main_window: Instance of the main Tk window.
+    :param data_processor: Instance of DataProcessor. Its not yet written changes are flushed.
     :return: None
     """
 
+    if data_processor:
+        try:
+            data_processor.flush()
+        except Exception as flush_error:
+            print("[ERROR] - Cannot write the time data.\nERROR:\n{}".format(flush_error))
+
     try:
         remove_unused_old_user_pics()
     except Exception as pic_removing_error:
@@ -194,7 +202,7 @@ def main(c_logger=None):
         bg="grey60",
         activebackground="red",
         font="Helvetica 12 bold",
-        command=lambda: quit_from_app(window),
+        command=lambda: quit_from_app(window, data_processor=data_processor_instance),
     )
 
     main_exit_button.pack(fill=tk.X)
@@ -222,7 +230,9 @@ def main(c_logger=None):
         metrics_tab, c_logger=c_logger, data_processor=data_processor_instance,
     )
 
-    window.protocol("WM_DELETE_WINDOW", lambda: quit_from_app(window))
+    window.protocol(
+        "WM_DELETE_WINDOW", lambda: quit_from_app(window, data_processor=data_processor_instance)
+    )
 
     window.mainloop()
 
@@ -33,6 +33,7 @@ sys.path.append(os.path.join(PATH_OF_FILE_DIR, "..", ".."))  # noqa: E402
 
 # Own modules imports
 from data_processor import DataProcessor
+from data_processor import date_to_ordinal
 from color_logger import ColoredLogger
 from plotter3 import Plotter3
 from time_picker import TimePicker
@@ -216,12 +217,12 @@ class MainWindow(object):
 
         from_date = self.__get_date_from_calendar(self.visualisation_from_calendar_instance)
         to_date = self.__get_date_from_calendar(self.visualisation_to_calendar_instance)
-        date_range = self.data_processor.get_time_range(
-            from_date.replace(" ", ""), to_date.replace(" ", "")
-        )
         self.c_logger.info("Arriving date: {} , Leaving date: {}".format(from_date, to_date))
-        self.c_logger.debug("Date range: {}".format(date_range))
-        if len(date_range) > 31:
+        number_of_days = (
+            date_to_ordinal(to_date.replace(" ", "")) - date_to_ordinal(from_date.replace(" ", ""))
+        ) + 1
+        self.c_logger.debug("Number of days: {}".format(number_of_days))
+        if number_of_days > 31:
             self.c_logger.warning("Too many dates! Maximum days is 31!")
             messagebox.showerror(
                 title="Too many dates",
@@ -229,30 +230,11 @@ class MainWindow(object):
             )
             self.c_logger.info("Error message box has been closed successfully.")
             return
-        plotting_list = []
-        self.c_logger.info("Starting to parse dates one by one.")
-        for single_date in date_range:
-            (
-                arriving,
-                leaving,
-                break_time,
-            ) = self.data_processor.get_arriving_leaving_break_times_based_on_date(single_date)
-            if not arriving or not leaving:
-                self.c_logger.warning(
-                    "There is no arriving of leaving time for '()' date.".format(single_date)
-                )
-                arriving = "00:00"
-                leaving = "00:00"
-                break_time = "00:00"
-            self.c_logger.info(
-                "Date: {} ; Arriving: {} ; Leaving: {} ; Break: {}".format(
-                    single_date, arriving, leaving, break_time
-                )
-            )
-
-            plotting_list.append(
-                {"date": single_date, "from": arriving, "to": leaving, "break": break_time}
-            )
+        self.c_logger.info("Starting to get the records of the date range.")
+        self.data_processor.reload_if_changed()
+        plotting_list = self.data_processor.get_records_in_range(
+            from_date.replace(" ", ""), to_date.replace(" ", ""), fill_missing=True
+        )
         self.c_logger.debug("Created plotting list: {}".format(plotting_list))
         self.c_logger.info("Starting to create 'Plotter3' instance.")
         self.plotter3 = Plotter3(
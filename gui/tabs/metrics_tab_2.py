@@ -35,19 +35,9 @@ sys.path.append(os.path.join(PATH_OF_FILE_DIR, "..", ".."))  # noqa: E402
 from data_processor import DataProcessor
 from color_logger import ColoredLogger
 from date_entry import MyDateEntry
+from metrics import MetricsEngine
 
 LABEL_FONT = "Helvetica 14 bold"
-FMT = "%H:%M"
-
-
-class MetricsGetters(object):
-    """
-    This class contains all related getters for GUI.
-    The GUI class should be inherited from this base class.
-    """
-
-    def __init__(self):
-        pass
 
 
 class SimpleTable(tk.Frame):
@@ -72,7 +62,7 @@ class SimpleTable(tk.Frame):
         widget.configure(text=value)
 
 
-class MetricsTab(MetricsGetters):
+class MetricsTab(object):
     """
     This tab contains all Metrics related implementations.
     Planned options:
@@ -97,8 +87,6 @@ class MetricsTab(MetricsGetters):
         :param data_processor: Instance of DataProcessor module.
         """
 
-        super(MetricsTab, self).__init__()
-
         self.c_logger = c_logger if c_logger else self.__set_up_default_logger()
         self.main_window = main_window
         self.c_logger.info("Get main window: {}".format(main_window))
@@ -107,12 +95,15 @@ class MetricsTab(MetricsGetters):
             data_processor if data_processor else DataProcessor(c_logger=self.c_logger)
         )
         self.c_logger.info("DataProcessor instance successfully created.")
+        self.metrics_engine = MetricsEngine(self.data_processor)
+        self.metrics_result = None
 
         self.simple_table = SimpleTable(self.main_window, rows=12, columns=2)
         self.simple_table.grid(row=7, column=0, columnspan=2)
 
         self.__generate_complete_gui()
-        self.date_range = None
+        # The displayed metrics are updated with the changed records (No full recalculation).
+        self.data_processor.add_change_listener(self.__on_record_change)
 
     def __generate_complete_gui(self):
         """
@@ -127,23 +118,18 @@ class MetricsTab(MetricsGetters):
 
         self.__set_resizable(7, 1)
 
-    def get_date_range(self):
+    def get_metrics_result(self):
         """
-        Providing the selected date range.
-        :return: data range in list.
+        Calculating all metrics of the selected date range in one pass.
+        :return: Instance of MetricsResult.
         """
 
-        self.c_logger.debug("Starting to get the selected date range.")
-
-        if not self.date_range:
-            from_date = self.metrics_date_selector_from_calendar_instance.get()
-            to_date = self.metrics_selector_to_calendar_instance.get()
+        self.c_logger.debug("Starting to calculate the metrics of the selected date range.")
 
-            self.date_range = self.data_processor.get_time_range(
-                from_date.replace(" ", ""), to_date.replace(" ", "")
-            )
+        from_date = self.metrics_date_selector_from_calendar_instance.get()
+        to_date = self.metrics_selector_to_calendar_instance.get()
 
-        return self.date_range
+        return self.metrics_engine.calculate(from_date.replace(" ", ""), to_date.replace(" ", ""))
 
     @staticmethod
     def __set_up_default_logger():
@@ -246,274 +232,36 @@ class MetricsTab(MetricsGetters):
             "Starting to generate the calculated metrics GUI section of Metrics tab."
         )
 
-        self.date_range = None
-
-        table_fields = {
-            "All days": "{}".format(self.get_all_days()),
-            "Week days": "{}".format(self.get_days(day_type="week")),
-            "Weekend days": "{}".format(self.get_days(day_type="weekend")),
-            "Worked days": "{}".format(self.get_worked_or_missing_days(day_type="worked")),
-            "Missing working days": "{}".format(
-                self.get_worked_or_missing_days(day_type="missing")
-            ),
-            "Required working hours": "{}".format(self.get_required_working_hours()),
-            "Worked hours": "{}".format(self.get_user_times("worked")),
-            "Missing hours": "{}".format(self.get_missing_working_hours()),
-            "Break hours": "{}".format(self.get_user_times("break")),
-            "Overtime minus": "{}".format(self.get_overtime("minus")),
-            "Overtime plus": "{}".format(self.get_overtime("plus")),
-            "Overtime overall": "{}".format(self.get_overtime("overall")),
-        }
-
-        for idx, (key, value) in enumerate(table_fields.items()):
-            self.simple_table.set(idx, 0, key)
-            self.simple_table.set(idx, 1, value)
-
-    def get_overtime(self, over_time_type=None):
-        """
-        This method provides overtime attributes.
-        :return: Specified overtime attribute
-        """
-
-        self.c_logger.info("Starting to get the '{}' overtime.".format(over_time_type))
-
-        if over_time_type not in ["plus", "minus", "overall"]:
-            raise Exception("Invalid Overtime type getting : {}".format(over_time_type))
-
-        date_range = self.get_date_range()
-
-        minus_overtime_second = 0
-        plus_overtime_second = 0
-
-        for single_date in date_range:
-            (
-                arriving,
-                leaving,
-                break_time,
-            ) = self.data_processor.get_arriving_leaving_break_times_based_on_date(single_date)
-
-            if arriving == "00:00" and leaving == "00:00":
-                continue
-
-            working_time_delta = datetime.datetime.strptime(
-                leaving, FMT
-            ) - datetime.datetime.strptime(arriving, FMT)
-
-            working_ellapsed_hours = int(divmod(working_time_delta.total_seconds(), 3600)[0])
-            working_ellapsed_mins = int(divmod(working_time_delta.total_seconds(), 60)[0]) - (
-                working_ellapsed_hours * 60
-            )
-
-            working_ellapsed_time = "{:02d}:{:02d}".format(
-                int(working_ellapsed_hours), int(working_ellapsed_mins)
-            )
-
-            breaking_time_delta = datetime.datetime.strptime(
-                break_time, FMT
-            ) - datetime.datetime.strptime("00:00", FMT)
-
-            required_hours = int(divmod(3600 * 8 + breaking_time_delta.total_seconds(), 3600)[0])
-            required_mins = int(divmod(3600 * 8 + breaking_time_delta.total_seconds(), 60)[0]) - (
-                required_hours * 60
-            )
-            required_working_time = "{:02d}:{:02d}".format(int(required_hours), int(required_mins))
-
-            overtime_time_delta = datetime.datetime.strptime(
-                working_ellapsed_time, FMT
-            ) - datetime.datetime.strptime(required_working_time, FMT)
-
-            if overtime_time_delta.total_seconds() >= 0:
-                plus_overtime_second += overtime_time_delta.total_seconds()
-                continue
-            minus_overtime_second += overtime_time_delta.total_seconds()
-
-        if over_time_type == "plus":
-            overtime_hours = int(divmod(plus_overtime_second, 3600)[0])
-            overtime_mins = int(divmod(plus_overtime_second, 60)[0]) - (overtime_hours * 60)
-            return "{:02d}:{:02d}".format(int(overtime_hours), int(overtime_mins))
-        elif over_time_type == "minus":
-            overtime_hours = int(divmod(minus_overtime_second, 3600)[0])
-            overtime_mins = int(divmod(minus_overtime_second, 60)[0]) - (overtime_hours * 60)
-            return "{:02d}:{:02d}".format(abs(int(overtime_hours)), abs(int(overtime_mins)))
-
-        overtime_hours = int(divmod(plus_overtime_second + minus_overtime_second, 3600)[0])
-        overtime_mins = int(divmod(plus_overtime_second + minus_overtime_second, 60)[0]) - (
-            overtime_hours * 60
-        )
-        return "{:02d}:{:02d}".format(int(overtime_hours), int(overtime_mins))
-
-    def get_missing_working_hours(self):
-        """
-        This method provides the missing working hours.
-        :return: Missing working hours
-        """
-
-        self.c_logger.info("Starting to get the missing working hours in date range.")
-
-        required_hours = self.get_required_working_hours()
-        worked_hours = self.get_user_times("worked")
-
-        required_hours_second = (
-            int(required_hours.split(":")[0]) * 3600 + int(required_hours.split(":")[1]) * 60
-        )
-        worked_hours_second = (
-            int(worked_hours.split(":")[0]) * 3600 + int(worked_hours.split(":")[1]) * 60
-        )
-
-        missing_hours_in_second = required_hours_second - worked_hours_second
-
-        if missing_hours_in_second < 0:
-            return "{:02d}:{:02d}".format(0, 0)
-
-        ellapsed_hours = int(divmod(missing_hours_in_second, 3600)[0])
-        ellapsed_mins = int(divmod(missing_hours_in_second, 60)[0]) - (ellapsed_hours * 60)
-        return "{:02d}:{:02d}".format(int(ellapsed_hours), int(ellapsed_mins))
-
-    def get_all_days(self):
-        """
-        This method provides the all days in the date range.
-        :return: Number of all days in the date range. INT
-        """
-
-        self.c_logger.info("Starting to get the all days in date range.")
-
-        date_range = self.get_date_range()
-
-        return len(date_range)
-
-    def get_days(self, day_type=None):
-        """
-        This method provides the specified days in the date range.
-        :param day_type: Type of the days. week and weekend are possible.
-        :return: Number of all specified days in the date range. INT
-        """
-
-        self.c_logger.info("Starting to get the all weekdays.")
-
-        if day_type not in ["week", "weekend"]:
-            raise Exception("Invalid Day type getting".format(day_type))
+        self.data_processor.reload_if_changed()
+        self.metrics_result = self.get_metrics_result()
+        self.__render_metrics_result()
 
-        days = []
-
-        date_range = self.get_date_range()
-
-        for single_date in date_range:
-            if not self.is_weekend(single_date) and day_type == "week":
-                days.append(single_date)
-            if self.is_weekend(single_date) and day_type == "weekend":
-                days.append(single_date)
-
-        return len(days)
-
-    def get_worked_or_missing_days(self, day_type=None):
-        """
-        This method provides the worked or missing days in the date range.
-        :param day_type: Type of the days. week and weekend are possible.
-        :return: Number of all specified days in the date range. INT
-        """
-
-        self.c_logger.info("Staring to get worked or missing days")
-
-        if day_type not in ["worked", "missing"]:
-            raise Exception("Invalid Day type getting : {}".format(day_type))
-
-        days = []
-
-        date_range = self.get_date_range()
-
-        for single_date in date_range:
-            (
-                arriving,
-                leaving,
-                _,
-            ) = self.data_processor.get_arriving_leaving_break_times_based_on_date(single_date)
-            if arriving != "00:00" and leaving != "00:00":
-                days.append(single_date)
-
-        if day_type == "worked":
-            return len(days)
-        return self.get_all_days() - self.get_days(day_type="weekend") - len(days)
-
-    def get_required_working_hours(self):
-        """
-        This method provides the required working hours in the date range.
-        # TODO: The hard-coded 8 hours working time should be configured in user config!
-        :return: Number of required working hours.
-        """
-
-        self.c_logger.info("Starting to get the required working hours.")
-
-        return "{:02d}:{:02d}".format(self.get_days(day_type="week") * 8, 0)
-
-    def is_weekend(self, date):
+    def __render_metrics_result(self):
         """
-        This method provides the weekdays.
-        :param date: The related date.
-        :return: Bool. True if the day is weekend day.
+        This method renders the calculated metrics into the table of Metrics.
+        :return: None
         """
 
-        self.c_logger.debug("Staring to check if the date is weekend.")
-
-        dt = datetime.datetime.strptime(date, "%Y.%m.%d.")
+        self.c_logger.debug("Metrics: {}".format(self.metrics_result))
 
-        self.c_logger.debug(
-            "String date: {} ; DateTime: {} ; Day value: {}".format(date, dt, dt.weekday())
-        )
-
-        if dt.weekday() in (5, 6):
-            self.c_logger.debug("{} - Weekend".format(date))
-            return True
-        else:
-            self.c_logger.debug("{} - Weekday".format(date))
-            return False
+        for idx, (key, value) in enumerate(self.metrics_result.get_display_values()):
+            self.simple_table.set(idx, 0, key)
+            self.simple_table.set(idx, 1, value)
 
-    def get_user_times(self, time_type=None):
+    def __on_record_change(self, previous_record, single_record):
         """
-        This method provides the specified user related time data.
-        :param time_type: Type of the required user time.
-        :return: Specified time.
+        This method applies a changed record to the displayed metrics (Change event of
+        DataProcessor).
+        :param previous_record: The previous record of the day (TimeRecord) or None.
+        :param single_record: The new record of the day (TimeRecord).
+        :return: None
         """
 
-        self.c_logger.info("Staring to get user times")
-
-        if time_type not in ["worked", "break"]:
-            raise Exception("Invalid Time type getting : {}".format(time_type))
-
-        date_range = self.get_date_range()
-
-        all_worked_seconds = 0
-        all_breaking_seconds = 0
-
-        for single_date in date_range:
-            (
-                arriving,
-                leaving,
-                break_time,
-            ) = self.data_processor.get_arriving_leaving_break_times_based_on_date(single_date)
-
-            if arriving == "00:00" and leaving == "00:00":
-                continue
-
-            worked_time_delta = datetime.datetime.strptime(
-                leaving, FMT
-            ) - datetime.datetime.strptime(arriving, FMT)
-            all_worked_seconds += worked_time_delta.total_seconds()
-
-            break_time_delta = datetime.datetime.strptime(
-                break_time, FMT
-            ) - datetime.datetime.strptime("00:00", FMT)
-            all_breaking_seconds += break_time_delta.total_seconds()
-
-        if time_type == "worked":
-            ellapsed_hours = int(divmod(all_worked_seconds, 3600)[0])
-            ellapsed_mins = int(divmod(all_worked_seconds, 60)[0]) - (ellapsed_hours * 60)
-
-            return "{:02d}:{:02d}".format(int(ellapsed_hours), int(ellapsed_mins))
-
-        ellapsed_hours = int(divmod(all_breaking_seconds, 3600)[0])
-        ellapsed_mins = int(divmod(all_breaking_seconds, 60)[0]) - (ellapsed_hours * 60)
-
-        return "{:02d}:{:02d}".format(int(ellapsed_hours), int(ellapsed_mins))
+        if self.metrics_result is None:
+            return
+        if self.metrics_result.apply_change(previous_record, single_record):
+            self.c_logger.info("Metrics updated with the date: {}".format(single_record.date))
+            self.__render_metrics_result()
 
     def __set_calendar(self, set_date=None):
         """
@@ -0,0 +1,428 @@
+"""
+This file contains the bulk importer of the time data (Eg.: Badge-reader exports).
+Supported formats (Based on the file extension or the 'file_format' parameter):
+    - csv: Comma separated values with header line.
+    - tsv: Tab separated values with header line.
+    - jsonl: One Json object per line.
+The rows are read and normalized one by one (Generators), only the merged record of the dates
+and a limited sample of the rejected lines is kept in the memory. The records are loaded into
+DataProcessor at once at the end.
+The rows of a file with user column (Export of several employees) are imported only for a
+selected user or for all users in one pass (Into the user partitions, see: DataProcessor
+user_id parameter). The records of different users are never merged into the same days.
+Usage:
+    python3 importers/bulk_importer.py --file badge_reader.csv [--config conf/time_data.json]
+                                       [--user 42 | --all-users] [--users-dir conf/users]
+"""
+
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, ".."))  # noqa: E402
+
+from color_logger import ColoredLogger
+from data_processor import DataProcessor
+from data_processor import USERS_DIR
+import json_codec
+from time_record import TimeRecord
+from time_record import is_valid_time_range
+
+# The accepted column names of the fields. The first found column is used.
+COLUMN_ALIASES = {
+    "date": ("date", "day"),
+    "from": ("from", "arriving", "in", "start"),
+    "to": ("to", "leaving", "out", "end"),
+    "break": ("break", "break_time"),
+    "user": ("user", "user_id", "employee", "employee_id"),
+}
+DATE_FORMATS = ("%Y.%m.%d.", "%Y-%m-%d", "%Y/%m/%d")
+FILE_FORMATS = {".csv": "csv", ".tsv": "tsv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+# Maximum number of the rejected lines in the import report (All of them are logged).
+REJECTED_SAMPLE_SIZE = 100
+
+
+def normalize_date(date_string):
+    """
+    Convert a date string of the supported formats to a day ordinal.
+    :param date_string: Date as a string. Eg.: 2020.03.30. or 2020-03-30
+    :return: Day ordinal of the date.
+    """
+
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_string.strip(), date_format).toordinal()
+        except ValueError:
+            continue
+    raise ValueError("Not supported date format: {}".format(date_string))
+
+
+def normalize_time(time_string):
+    """
+    Convert a time string to minutes. The seconds are dropped.
+    :param time_string: Time as a string in H:MM, HH:MM or HH:MM:SS format.
+    :return: Number of minutes.
+    """
+
+    parts = time_string.strip().split(":")
+    if len(parts) not in (2, 3) or not all(part.isdigit() for part in parts):
+        raise ValueError("Not supported time format: {}".format(time_string))
+    hours, minutes = int(parts[0]), int(parts[1])
+    if hours > 23 or minutes > 59:
+        raise ValueError("Not valid time: {}".format(time_string))
+    return hours * 60 + minutes
+
+
+def normalize_break(break_string):
+    """
+    Convert a break time string to minutes. The exports often write the break as bare minutes.
+    :param break_string: Break time as a string in minutes (Eg.: 0 or 30) or in the formats of
+                         normalize_time (Eg.: 00:30).
+    :return: Number of minutes.
+    """
+
+    if not break_string.strip().isdigit():
+        return normalize_time(break_string)
+    minutes = int(break_string)
+    if minutes >= 24 * 60:
+        raise ValueError("Not valid break time: {}".format(break_string))
+    return minutes
+
+
+def merge_shifts(ordinal, shifts):
+    """
+    Merge the shifts of a day (Eg.: Split shift or several badge-reader rows) to one record.
+    The earliest arriving and the latest leaving is kept. The break is the sum of the breaks and
+    the gaps between the shifts. The same row is counted once (Eg.: Duplicated export).
+    :param ordinal: Day ordinal of the date.
+    :param shifts: Set of tuples: {(arriving, leaving, break time), ...}
+    :return: Instance of TimeRecord.
+    """
+
+    shifts = sorted(shifts)
+    arriving = shifts[0][0]
+    covered_until = shifts[0][1]
+    break_time = shifts[0][2]
+    for shift_arriving, shift_leaving, shift_break_time in shifts[1:]:
+        # The overlapping shifts have no gap.
+        break_time += max(shift_arriving - covered_until, 0) + shift_break_time
+        covered_until = max(covered_until, shift_leaving)
+    return TimeRecord(ordinal, arriving, covered_until, min(break_time, covered_until - arriving))
+
+
+class BulkImporter(object):
+    """
+    This class contains the all bulk importer related attributes.
+    """
+
+    def __init__(
+        self,
+        file_path,
+        file_format=None,
+        user_id=None,
+        c_logger=None,
+        data_processor=None,
+        all_users=False,
+        users_dir=None,
+    ):
+        """
+        Init method of 'BulkImporter' class.
+        :param file_path: Path of the imported file.
+        :param file_format: "csv", "tsv" or "jsonl". It is detected from the extension if it is
+                            not set.
+        :param user_id: If it is set, only the rows of this user are imported (The rows without
+                        user column are imported as well). The user of the DataProcessor is
+                        used if it is not set. It is required if the file has user column
+                        (Except in case of all_users).
+        :param c_logger: Logger instance (ColoredLogger type is recommended).
+        :param data_processor: Instance of DataProcessor. The rows without user column and the
+                               rows of its user are imported into it.
+        :param all_users: Import the rows of every user in one pass. The rows are partitioned by
+                          the user column into the user partitions.
+        :param users_dir: Directory of the user partitions (In case of all_users). The directory
+                          of the DataProcessor is used if it is not set.
+        """
+
+        self.file_path = file_path
+        self.file_format = (
+            file_format if file_format else FILE_FORMATS.get(os.path.splitext(file_path)[1].lower())
+        )
+        if self.file_format not in FILE_FORMATS.values():
+            raise Exception("Not supported import file format: {}".format(file_path))
+        self.c_logger = c_logger if c_logger else self.__set_up_default_logger()
+        self.data_processor = (
+            data_processor if data_processor else DataProcessor(c_logger=self.c_logger)
+        )
+        self.user_id = user_id if user_id is not None else self.data_processor.user_id
+        self.all_users = all_users
+        if users_dir is None:
+            users_dir = (
+                self.data_processor.user_store.path
+                if self.data_processor.user_store is not None
+                else USERS_DIR
+            )
+        self.users_dir = users_dir
+
+    @staticmethod
+    def __set_up_default_logger():
+        """
+        Set-up a default logger if it is not provided as parameter.
+        :return: Instance of ColoredLogger
+        """
+
+        # Set-up the main logger instance.
+        path_of_log_file = os.path.join(PATH_OF_FILE_DIR, "..", "logs", "bulk_importer.log")
+        return_logger = ColoredLogger(os.path.basename(__file__), log_file_path=path_of_log_file)
+        return_logger.info("Default logger has been set-up in bulk_importer module.")
+
+        return return_logger
+
+    def read_rows(self):
+        """
+        Read the rows of the imported file one by one.
+        :return: Generator of (line number, raw line, row dict or None if it cannot be parsed).
+        """
+
+        with open(self.file_path, "r", newline="") as opened_file:
+            if self.file_format == "jsonl":
+                for line_number, line in enumerate(opened_file, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        row = json_codec.loads(line)
+                    except ValueError:
+                        row = None
+                    yield line_number, line.rstrip("\n"), row if isinstance(row, dict) else None
+                return
+
+            delimiter = "\t" if self.file_format == "tsv" else ","
+            reader = csv.DictReader(opened_file, delimiter=delimiter)
+            for row in reader:
+                yield reader.line_num, delimiter.join(str(value) for value in row.values()), row
+
+    @staticmethod
+    def get_field(row, field):
+        """
+        Provide the value of a field of a row based on the column aliases.
+        :param row: The row dict.
+        :param field: Name of the field. Eg.: "from"
+        :return: The value (String) or None if the row doesn't contain the field.
+        """
+
+        for column in COLUMN_ALIASES[field]:
+            for key in (column, column.upper(), column.capitalize()):
+                if row.get(key) not in (None, ""):
+                    return str(row[key])
+        return None
+
+    def reject_line(self, report, line_number, raw_line, reason):
+        """
+        Log a not valid line and count it in the report. Only the first lines are kept in the
+        report (See: REJECTED_SAMPLE_SIZE) so the memory doesn't grow with the imported file.
+        :param report: Report of the import.
+        :param line_number: Number of the line in the imported file.
+        :param raw_line: The raw line.
+        :param reason: Reason of the rejection.
+        :return: None
+        """
+
+        self.c_logger.warning("Rejected line {}: {} ({})".format(line_number, raw_line, reason))
+        report["rejected"] += 1
+        if len(report["rejected_sample"]) < REJECTED_SAMPLE_SIZE:
+            report["rejected_sample"].append((line_number, raw_line, reason))
+
+    def normalize_rows(self, report):
+        """
+        Normalize the read rows to records.
+        The rows of other users are skipped (Except in case of all_users). A row with user
+        column stops the import if the user is not set (The days of different users would be
+        merged).
+        :param report: Report of the import. The read rows are counted in its "rows" and the not
+                       valid rows are counted in its "rejected" (See: reject_line).
+        :return: Generator of tuples: (user ID or None, TimeRecord). The user ID is None if the
+                 record is imported into the DataProcessor.
+        """
+
+        for line_number, raw_line, row in self.read_rows():
+            report["rows"] += 1
+            if row is None:
+                self.reject_line(report, line_number, raw_line, "Not parsable line")
+                continue
+            user = self.get_field(row, "user")
+            if user is not None and not self.all_users:
+                if self.user_id is None:
+                    raise Exception(
+                        "The file contains the rows of users (Line {}). Set the user whose rows "
+                        "are imported or import all users.".format(line_number)
+                    )
+                if user != str(self.user_id):
+                    continue
+            if not self.all_users or user == str(self.data_processor.user_id):
+                # The record is imported into the DataProcessor.
+                user = None
+            try:
+                date, arriving, leaving = (
+                    self.get_field(row, field) for field in ("date", "from", "to")
+                )
+                if date is None or arriving is None or leaving is None:
+                    raise ValueError("Missing date, arriving or leaving field")
+                break_time = self.get_field(row, "break")
+                single_record = TimeRecord(
+                    normalize_date(date),
+                    normalize_time(arriving),
+                    normalize_time(leaving),
+                    normalize_break(break_time) if break_time else 0,
+                )
+            except ValueError as normalize_error:
+                self.reject_line(report, line_number, raw_line, str(normalize_error))
+                continue
+            if not is_valid_time_range(single_record.arriving, single_record.leaving):
+                self.reject_line(report, line_number, raw_line, "The time range is NOT correct")
+                continue
+            yield user, single_record
+
+    @staticmethod
+    def merge_records(user_records):
+        """
+        Merge the records per user and date (Eg.: Several badge-reader rows of a day).
+        :param user_records: Iterable of tuples: (user ID or None, TimeRecord).
+        :return: Dict of the merged records (See: merge_shifts). Structure: {"42": {737485:
+                 TimeRecord, ...}, None: {...}}
+        """
+
+        # Structure: {"42": {737485: {(arriving, leaving, break time), ...}, ...}, ...}
+        user_shifts = {}
+        for user, single_record in user_records:
+            user_shifts.setdefault(user, {}).setdefault(single_record.ordinal, set()).add(
+                single_record.as_tuple()[1:]
+            )
+        return {
+            user: {ordinal: merge_shifts(ordinal, shifts) for ordinal, shifts in day_shifts.items()}
+            for user, day_shifts in user_shifts.items()
+        }
+
+    def get_data_processor(self, user):
+        """
+        Provide the DataProcessor of the imported records of a user.
+        :param user: ID of another user (From the user column) or None.
+        :return: Instance of DataProcessor. It is a new instance in case of another user.
+        """
+
+        if user is None:
+            return self.data_processor
+        return DataProcessor(user_id=user, users_dir=self.users_dir, c_logger=self.c_logger)
+
+    def import_file(self):
+        """
+        Import the file into DataProcessor.
+        :return: Report of the import. Structure: {"rows": 1000, "records": 20, "users": 1,
+                 "rejected": 2, "rejected_sample": [(line number, raw line, reason), ...],
+                 "seconds": 0.5, "rows_per_sec": 2000.0, "lock_wait": 0.1}
+        """
+
+        self.c_logger.info("Starting to import the '{}' file.".format(self.file_path))
+        start_time = time.perf_counter()
+        report = {
+            "rows": 0,
+            "records": 0,
+            "users": 0,
+            "rejected": 0,
+            "rejected_sample": [],
+            "seconds": 0.0,
+            "rows_per_sec": 0.0,
+            "lock_wait": 0.0,
+        }
+        merged_records = self.merge_records(self.normalize_rows(report))
+        for user, user_records in merged_records.items():
+            data_processor = self.get_data_processor(user)
+            lock_wait = data_processor.get_lock_metrics().get("total_wait", 0.0)
+            data_processor.set_times(
+                user_records[ordinal].to_dict() for ordinal in sorted(user_records)
+            )
+            report["lock_wait"] += (
+                data_processor.get_lock_metrics().get("total_wait", 0.0) - lock_wait
+            )
+            report["records"] += len(user_records)
+            if data_processor is not self.data_processor:
+                data_processor.close()
+        report["users"] = len(merged_records)
+        report["seconds"] = time.perf_counter() - start_time
+        if report["seconds"]:
+            report["rows_per_sec"] = report["rows"] / report["seconds"]
+        self.c_logger.info(
+            "Imported rows: {} ; Records: {} ; Users: {} ; Rejected lines: {} ; "
+            "Rows/sec: {:.1f} ; Lock wait: {:.3f} sec".format(
+                report["rows"],
+                report["records"],
+                report["users"],
+                report["rejected"],
+                report["rows_per_sec"],
+                report["lock_wait"],
+            )
+        )
+        return report
+
+
+####
+# ENTRY POINT
+####
+
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import time data from CSV/TSV/Json-lines.")
+
+    parser.add_argument(
+        "--file", dest="file_path", required=True, help="Path of the imported file."
+    )
+    parser.add_argument(
+        "--format", dest="file_format", choices=sorted(set(FILE_FORMATS.values())), default=None
+    )
+    parser.add_argument(
+        "--user",
+        dest="user_id",
+        default=None,
+        help="Import the rows of a user (Required if the file has user column).",
+    )
+    parser.add_argument(
+        "--all-users",
+        dest="all_users",
+        action="store_true",
+        help="Import the rows of every user in one pass (Into the user partitions).",
+    )
+    parser.add_argument(
+        "--users-dir", dest="users_dir", default=None, help="Directory of the user partitions."
+    )
+    parser.add_argument("--config", dest="config", default=None, help="Path of the config file.")
+
+    args = parser.parse_args()
+
+    importer = BulkImporter(
+        args.file_path,
+        file_format=args.file_format,
+        user_id=args.user_id,
+        all_users=args.all_users,
+        users_dir=args.users_dir,
+        data_processor=DataProcessor(config=args.config) if args.config else None,
+    )
+    import_report = importer.import_file()
+    print(
+        "Rows: {} ; Records: {} ; Users: {} ; Rejected: {} ; Rows/sec: {:.1f} ; "
+        "Lock wait: {:.3f} sec".format(
+            import_report["rows"],
+            import_report["records"],
+            import_report["users"],
+            import_report["rejected"],
+            import_report["rows_per_sec"],
+            import_report["lock_wait"],
+        )
+    )
+    importer.data_processor.close()
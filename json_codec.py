@@ -0,0 +1,87 @@
+"""
+This module contains the Json codec of the data store and the reports.
+The fastest importable Json module is used:
+    - orjson (pip install orjson)
+    - ujson (pip install ujson)
+    - json (Standard library, always available)
+The codec can be selected explicitly via 'set_codec' (Eg.: For benchmarking).
+Note: orjson supports only 2 spaces indentation, the 'indent' parameter is handled as on/off.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def _orjson_dumps(data, indent=None):
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0).decode("utf-8")
+
+
+def _ujson_dumps(data, indent=None):
+    return ujson.dumps(data, indent=indent or 0, escape_forward_slashes=False)
+
+
+def _json_dumps(data, indent=None):
+    return json.dumps(data, indent=indent)
+
+
+# The available codecs in order of preference. Structure: {name: (dumps, loads), ...}
+CODECS = {}
+if orjson is not None:
+    CODECS["orjson"] = (_orjson_dumps, orjson.loads)
+if ujson is not None:
+    CODECS["ujson"] = (_ujson_dumps, ujson.loads)
+CODECS["json"] = (_json_dumps, json.loads)
+
+_active_codec = next(iter(CODECS))
+
+
+def get_codec():
+    """
+    Provide the name of the used codec.
+    :return: Name of the codec. Eg.: "orjson"
+    """
+
+    return _active_codec
+
+
+def set_codec(codec_name):
+    """
+    Select the used codec.
+    :param codec_name: Name of an available codec (See: CODECS).
+    :return: None
+    """
+
+    global _active_codec
+    if codec_name not in CODECS:
+        raise Exception("Not available Json codec: {}".format(codec_name))
+    _active_codec = codec_name
+
+
+def dumps(data, indent=None):
+    """
+    Serialize the data to a Json string.
+    :param data: The serialized data.
+    :param indent: Indentation of the Json string. It is compact if it is not set.
+    :return: Json string.
+    """
+
+    return CODECS[_active_codec][0](data, indent=indent)
+
+
+def loads(json_string):
+    """
+    Parse a Json string. The parse errors are ValueError type with every codec.
+    :param json_string: Json string (Or bytes).
+    :return: The parsed data.
+    """
+
+    return CODECS[_active_codec][1](json_string)
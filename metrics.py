@@ -0,0 +1,354 @@
+"""
+This module contains the definitions of the working-time metrics (Eg.: Worked hours, overtime).
+The per-day values are defined here once and they are used by the Metrics tab and by the
+team-wide aggregation as well so a metric is calculated the same way everywhere.
+The times are minutes and the dates are day ordinals (See: time_record module).
+"""
+
+import os
+import sys
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+
+from time_record import date_to_ordinal
+from time_record import is_weekend_ordinal
+
+# TODO: The hard-coded 8 hours working time should be configured in user config!
+REQUIRED_DAILY_MINUTES = 8 * 60
+
+
+def is_worked_day(single_record):
+    """
+    Check if the record is a worked day (It has arriving and leaving times).
+    :param single_record: Instance of TimeRecord.
+    :return: Bool. True if the day is a worked day.
+    """
+
+    return single_record.arriving != 0 and single_record.leaving != 0
+
+
+def get_overtime_minutes(single_record):
+    """
+    Calculate the overtime of a day. The required time of a day is the required daily working
+    time plus the break time. The empty records (No arriving and leaving) have no overtime.
+    :param single_record: Instance of TimeRecord.
+    :return: Overtime in minutes. It is negative if the day is shorter than the required time.
+    """
+
+    if single_record.is_empty:
+        return 0
+    return single_record.effective_minutes - (REQUIRED_DAILY_MINUTES + single_record.break_time)
+
+
+def get_day_metrics(single_record):
+    """
+    Provide the summable metrics of a day in the order of the MetricsAggregate attributes.
+    :param single_record: Instance of TimeRecord.
+    :return: Tuple: (worked minutes, break minutes, plus overtime minutes, minus overtime minutes,
+             worked day (1 or 0))
+    """
+
+    worked_day = 1 if is_worked_day(single_record) else 0
+    if single_record.is_empty:
+        return 0, 0, 0, 0, worked_day
+    overtime_minutes = get_overtime_minutes(single_record)
+    return (
+        single_record.effective_minutes,
+        single_record.break_time,
+        max(overtime_minutes, 0),
+        min(overtime_minutes, 0),
+        worked_day,
+    )
+
+
+def count_days(start_ordinal, end_ordinal):
+    """
+    Count the days of a date range (Both ends are included) without iterating over the days.
+    :param start_ordinal: Day ordinal of the start date.
+    :param end_ordinal: Day ordinal of the end date.
+    :return: Tuple: (all days, week days, weekend days)
+    """
+
+    all_days = max(end_ordinal - start_ordinal + 1, 0)
+    full_weeks, remaining_days = divmod(all_days, 7)
+    weekend_days = full_weeks * 2 + sum(
+        1
+        for ordinal in range(start_ordinal, start_ordinal + remaining_days)
+        if is_weekend_ordinal(ordinal)
+    )
+    return all_days, all_days - weekend_days, weekend_days
+
+
+def format_minutes(minutes):
+    """
+    Format minutes as hours and minutes (Eg.: 125 -> "02:05", -90 -> "-01:30").
+    :param minutes: Minutes. INT
+    :return: Time as a string in HH:MM format. The hours can be more than 24.
+    """
+
+    hours, remaining_minutes = divmod(abs(minutes), 60)
+    return "{}{:02d}:{:02d}".format("-" if minutes < 0 else "", int(hours), int(remaining_minutes))
+
+
+class MetricsAggregate(object):
+    """
+    This class contains the summable metrics of records (Partial aggregate).
+    The aggregates of disjoint records (Eg.: Users or date ranges) can be merged.
+    """
+
+    __slots__ = (
+        "worked_minutes",
+        "break_minutes",
+        "overtime_plus_minutes",
+        "overtime_minus_minutes",
+        "worked_days",
+    )
+
+    def __init__(self):
+        """
+        Init method of the 'MetricsAggregate' class.
+        """
+
+        self.worked_minutes = 0
+        self.break_minutes = 0
+        self.overtime_plus_minutes = 0
+        # It is negative (Or 0).
+        self.overtime_minus_minutes = 0
+        self.worked_days = 0
+
+    def __eq__(self, other):
+        if not isinstance(other, MetricsAggregate):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    def __repr__(self):
+        return "MetricsAggregate({})".format({name: getattr(self, name) for name in self.__slots__})
+
+    def __getstate__(self):
+        # The slots are pickled explicitly (The aggregates are sent between processes).
+        return self.as_tuple()
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def as_tuple(self):
+        """
+        Provide the metric values in the order of the attributes.
+        :return: Tuple of the values.
+        """
+
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        Create an aggregate from summed metric values.
+        :param values: Values in the order of the attributes (See: get_day_metrics).
+        :return: Instance of MetricsAggregate.
+        """
+
+        aggregate = cls()
+        for name, value in zip(cls.__slots__, values):
+            setattr(aggregate, name, value)
+        return aggregate
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Create the aggregate of records.
+        :param records: Iterable of TimeRecord.
+        :return: Instance of MetricsAggregate.
+        """
+
+        aggregate = cls()
+        for single_record in records:
+            aggregate.add(single_record)
+        return aggregate
+
+    def add(self, single_record):
+        """
+        Add a record (One day) to the aggregate.
+        :param single_record: Instance of TimeRecord.
+        :return: None
+        """
+
+        for name, value in zip(self.__slots__, get_day_metrics(single_record)):
+            setattr(self, name, getattr(self, name) + value)
+
+    def merge(self, other):
+        """
+        Merge another aggregate into this one.
+        :param other: Instance of MetricsAggregate.
+        :return: This instance.
+        """
+
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def to_dict(self, start_ordinal, end_ordinal, number_of_users=1):
+        """
+        Provide the metrics of the aggregate in a date range.
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :param number_of_users: Number of users of the aggregate (The required time and the
+                                missing days are calculated for every user).
+        :return: Structure: {"all_days": 31, "week_days": 22, "weekend_days": 9,
+                 "worked_days": 20, "missing_days": 2, "required_minutes": 10560,
+                 "worked_minutes": 10000, "missing_minutes": 560, "break_minutes": 600,
+                 "overtime_plus_minutes": 100, "overtime_minus_minutes": -300,
+                 "overtime_overall_minutes": -200}
+        """
+
+        all_days, week_days, weekend_days = count_days(start_ordinal, end_ordinal)
+        required_minutes = week_days * REQUIRED_DAILY_MINUTES * number_of_users
+        return {
+            "all_days": all_days,
+            "week_days": week_days,
+            "weekend_days": weekend_days,
+            "worked_days": self.worked_days,
+            "missing_days": (all_days - weekend_days) * number_of_users - self.worked_days,
+            "required_minutes": required_minutes,
+            "worked_minutes": self.worked_minutes,
+            "missing_minutes": max(required_minutes - self.worked_minutes, 0),
+            "break_minutes": self.break_minutes,
+            "overtime_plus_minutes": self.overtime_plus_minutes,
+            "overtime_minus_minutes": self.overtime_minus_minutes,
+            "overtime_overall_minutes": self.overtime_plus_minutes + self.overtime_minus_minutes,
+        }
+
+
+class MetricsResult(object):
+    """
+    This class contains all metrics of a date range (Result of MetricsEngine).
+    The times are minutes, use 'get_display_values' for the formatted values.
+    """
+
+    __slots__ = (
+        "start_date",
+        "end_date",
+        "all_days",
+        "week_days",
+        "weekend_days",
+        "worked_days",
+        "missing_days",
+        "required_minutes",
+        "worked_minutes",
+        "missing_minutes",
+        "break_minutes",
+        "overtime_plus_minutes",
+        "overtime_minus_minutes",
+        "overtime_overall_minutes",
+    )
+
+    def __init__(self, start_date, end_date, metrics):
+        """
+        Init method of the 'MetricsResult' class.
+        :param start_date: Start date as a string in DATE_FORMAT format.
+        :param end_date: End date as a string in DATE_FORMAT format.
+        :param metrics: The metrics of the date range (See: MetricsAggregate.to_dict).
+        """
+
+        self.start_date = start_date
+        self.end_date = end_date
+        for name in self.__slots__[2:]:
+            setattr(self, name, metrics[name])
+
+    def __repr__(self):
+        return "MetricsResult({})".format(self.to_dict())
+
+    def to_dict(self):
+        """
+        Provide the metrics in a dict.
+        :return: Structure: {"start_date": "2020.03.01.", "end_date": "2020.03.31.",
+                 "all_days": 31, ...}
+        """
+
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def apply_change(self, previous_record, single_record):
+        """
+        Apply the change of a day to the metrics (The other days of the range are not read).
+        :param previous_record: The previous record of the day (TimeRecord) or None.
+        :param single_record: The new record of the day (TimeRecord).
+        :return: Bool. True if the day is in the range of the result (The metrics are changed).
+        """
+
+        if not (
+            date_to_ordinal(self.start_date)
+            <= single_record.ordinal
+            <= date_to_ordinal(self.end_date)
+        ):
+            return False
+
+        previous_values = (
+            get_day_metrics(previous_record)
+            if previous_record
+            else (0,) * len(MetricsAggregate.__slots__)
+        )
+        for name, new_value, previous_value in zip(
+            MetricsAggregate.__slots__, get_day_metrics(single_record), previous_values
+        ):
+            setattr(self, name, getattr(self, name) + new_value - previous_value)
+        self.missing_days = self.all_days - self.weekend_days - self.worked_days
+        self.missing_minutes = max(self.required_minutes - self.worked_minutes, 0)
+        self.overtime_overall_minutes = self.overtime_plus_minutes + self.overtime_minus_minutes
+        return True
+
+    def get_display_values(self):
+        """
+        Provide the metrics for displaying (Eg.: Metrics tab) in the displaying order.
+        :return: List of tuples: [("All days", "31"), ..., ("Worked hours", "160:25"), ...]
+        """
+
+        return [
+            ("All days", str(self.all_days)),
+            ("Week days", str(self.week_days)),
+            ("Weekend days", str(self.weekend_days)),
+            ("Worked days", str(self.worked_days)),
+            ("Missing working days", str(self.missing_days)),
+            ("Required working hours", format_minutes(self.required_minutes)),
+            ("Worked hours", format_minutes(self.worked_minutes)),
+            ("Missing hours", format_minutes(self.missing_minutes)),
+            ("Break hours", format_minutes(self.break_minutes)),
+            ("Overtime minus", format_minutes(abs(self.overtime_minus_minutes))),
+            ("Overtime plus", format_minutes(self.overtime_plus_minutes)),
+            ("Overtime overall", format_minutes(self.overtime_overall_minutes)),
+        ]
+
+
+class MetricsEngine(object):
+    """
+    This class calculates all metrics of a date range at once. It doesn't depend on the GUI.
+    Usage:
+        MetricsEngine(data_processor).calculate("2020.03.01.", "2020.03.31.").worked_minutes
+    """
+
+    def __init__(self, data_processor):
+        """
+        Init method of the 'MetricsEngine' class.
+        :param data_processor: Instance of DataProcessor.
+        """
+
+        self.data_processor = data_processor
+
+    def calculate(self, start_date, end_date):
+        """
+        Calculate the metrics between the start and end dates (Both are included).
+        The sums are provided by DataProcessor (See: get_metrics_in_range) and the days are
+        counted, so the metrics are not calculated one by one.
+        :param start_date: Start date as a string in DATE_FORMAT format.
+        :param end_date: End date as a string in DATE_FORMAT format.
+        :return: Instance of MetricsResult.
+        """
+
+        aggregate = self.data_processor.get_metrics_in_range(start_date, end_date)
+        return MetricsResult(
+            start_date,
+            end_date,
+            aggregate.to_dict(date_to_ordinal(start_date), date_to_ordinal(end_date)),
+        )
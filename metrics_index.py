@@ -0,0 +1,202 @@
+"""
+This module contains the prefix-sum index of the metrics (Range metrics with two lookups).
+The summable per-day metrics (See: metrics.get_day_metrics) are accumulated over the continuous
+day ordinals from the first record to the last one (The days without record are 0). The sum of
+a date range is the difference of two positions of the prefix arrays (The rolling-window series
+are calculated the same way).
+A changed day adds its difference to the positions after the day, so a change of a recent day
+(The usual case) touches only the end of the arrays.
+"""
+
+import os
+import sys
+from itertools import accumulate
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+
+from metrics import MetricsAggregate
+from metrics import get_day_metrics
+
+NUMBER_OF_METRICS = len(MetricsAggregate.__slots__)
+# Default lengths (Days) of the rolling windows of the trend series.
+ROLLING_WINDOWS = (7, 30, 90)
+
+
+class MetricsPrefixIndex(object):
+    """
+    This class contains the prefix arrays of the metrics.
+    The N. position of an array is the sum of the first N days (Position 0 is 0).
+    """
+
+    def __init__(self, records=()):
+        """
+        Init method of the 'MetricsPrefixIndex' class.
+        :param records: Iterable of TimeRecord ordered by date.
+        """
+
+        self._first_ordinal = None
+        # One prefix array per metric in the order of the MetricsAggregate attributes.
+        self._prefix_arrays = tuple([0] for _ in range(NUMBER_OF_METRICS))
+        self.build(records)
+
+    def __len__(self):
+        """
+        Number of the covered days (From the first record to the last one).
+        """
+
+        return len(self._prefix_arrays[0]) - 1
+
+    def build(self, records):
+        """
+        Build the prefix arrays from records.
+        :param records: Iterable of TimeRecord ordered by date.
+        :return: None
+        """
+
+        records = list(records)
+        if not records:
+            self._first_ordinal = None
+            self._prefix_arrays = tuple([0] for _ in range(NUMBER_OF_METRICS))
+            return
+
+        self._first_ordinal = records[0].ordinal
+        day_values = [(0,) * NUMBER_OF_METRICS] * (records[-1].ordinal - self._first_ordinal + 1)
+        for single_record in records:
+            day_values[single_record.ordinal - self._first_ordinal] = get_day_metrics(single_record)
+        self._prefix_arrays = tuple(
+            [0] + list(accumulate(metric_values)) for metric_values in zip(*day_values)
+        )
+
+    def __cover(self, ordinal):
+        """
+        Extend the arrays to cover a day.
+        :param ordinal: Day ordinal of the date.
+        :return: None
+        """
+
+        if self._first_ordinal is None:
+            self._first_ordinal = ordinal
+        if ordinal < self._first_ordinal:
+            # The new days before the first day are 0 so the sums don't change (Rare case).
+            missing_days = self._first_ordinal - ordinal
+            for prefix_array in self._prefix_arrays:
+                prefix_array[:0] = [0] * missing_days
+            self._first_ordinal = ordinal
+        missing_days = ordinal - self._first_ordinal + 1 - len(self)
+        if missing_days > 0:
+            for prefix_array in self._prefix_arrays:
+                prefix_array.extend([prefix_array[-1]] * missing_days)
+
+    def update(self, previous_record, single_record):
+        """
+        Apply the change of a day to the arrays (Incremental update).
+        :param previous_record: The previous record of the day (TimeRecord) or None.
+        :param single_record: The new record of the day (TimeRecord).
+        :return: None
+        """
+
+        new_values = get_day_metrics(single_record)
+        previous_values = (
+            get_day_metrics(previous_record) if previous_record else (0,) * NUMBER_OF_METRICS
+        )
+        if new_values == previous_values:
+            return
+
+        self.__cover(single_record.ordinal)
+        position = single_record.ordinal - self._first_ordinal + 1
+        for prefix_array, new_value, previous_value in zip(
+            self._prefix_arrays, new_values, previous_values
+        ):
+            difference = new_value - previous_value
+            if not difference:
+                continue
+            for index in range(position, len(prefix_array)):
+                prefix_array[index] += difference
+
+    def get_aggregate(self, start_ordinal, end_ordinal):
+        """
+        Provide the summed metrics of a date range (Both ends are included).
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :return: Instance of MetricsAggregate.
+        """
+
+        if self._first_ordinal is None:
+            return MetricsAggregate()
+        start_position = min(max(start_ordinal - self._first_ordinal, 0), len(self))
+        end_position = min(max(end_ordinal - self._first_ordinal + 1, 0), len(self))
+        if end_position <= start_position:
+            return MetricsAggregate()
+        return MetricsAggregate.from_values(
+            prefix_array[end_position] - prefix_array[start_position]
+            for prefix_array in self._prefix_arrays
+        )
+
+    def __get_prefix_value(self, metric_position, ordinal):
+        """
+        Provide the prefix sum of a metric until a day (The day is included).
+        :param metric_position: Position of the metric in the MetricsAggregate attributes.
+        :param ordinal: Day ordinal of the date.
+        :return: The prefix sum. INT
+        """
+
+        if self._first_ordinal is None:
+            return 0
+        position = min(max(ordinal - self._first_ordinal + 1, 0), len(self))
+        return self._prefix_arrays[metric_position][position]
+
+    def get_rolling_series(self, start_ordinal, end_ordinal, windows=ROLLING_WINDOWS):
+        """
+        Provide the rolling sums of the worked minutes and the cumulative overtime balance of
+        every day of a date range (Both ends are included) for plotting.
+        Every value is the difference of two positions of the prefix arrays, so the series are
+        calculated in one pass without range queries.
+        The overtime is the same as in the Metrics tab and in the overtime graph of Plotter3
+        (The empty days have no overtime, see: metrics.get_overtime_minutes).
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :param windows: Lengths of the rolling windows in days. The window of a day ends on the
+                        day (The days before the start date are used as well).
+        :return: Structure: {"ordinals": [737515, ...], "worked_minutes": {7: [2400, ...],
+                 30: [...], 90: [...]}, "overtime_balance_minutes": [20, ...]}
+                 The lists have one value per day of the range.
+        """
+
+        worked_position = MetricsAggregate.__slots__.index("worked_minutes")
+        plus_position = MetricsAggregate.__slots__.index("overtime_plus_minutes")
+        minus_position = MetricsAggregate.__slots__.index("overtime_minus_minutes")
+
+        ordinals = list(range(start_ordinal, end_ordinal + 1))
+        # The prefix sums from the start of the longest window. The N. day of the range is at the
+        # (longest window + N). position.
+        longest_window = max(windows, default=0)
+        worked_prefix = [
+            self.__get_prefix_value(worked_position, ordinal)
+            for ordinal in range(start_ordinal - longest_window - 1, end_ordinal + 1)
+        ]
+        rolling_worked_minutes = {
+            window: [
+                worked_prefix[longest_window + 1 + index]
+                - worked_prefix[longest_window + 1 + index - window]
+                for index in range(len(ordinals))
+            ]
+            for window in windows
+        }
+
+        overtime_prefix = [
+            self.__get_prefix_value(plus_position, ordinal)
+            + self.__get_prefix_value(minus_position, ordinal)
+            for ordinal in range(start_ordinal - 1, end_ordinal + 1)
+        ]
+        overtime_balance_minutes = [
+            overtime_prefix[index + 1] - overtime_prefix[0] for index in range(len(ordinals))
+        ]
+
+        return {
+            "ordinals": ordinals,
+            "worked_minutes": rolling_worked_minutes,
+            "overtime_balance_minutes": overtime_balance_minutes,
+        }
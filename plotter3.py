@@ -23,9 +23,8 @@ sys.path.append(os.path.join(PATH_OF_FILE_DIR, "tools"))  # noqa: E402
 from helper_functions import x_axis_data_generator
 from helper_functions import X_AXIS_CONFIG_FILE_PATH
 from color_logger import ColoredLogger
-
-# Format of the time. Hours:Minutes
-FMT = "%H:%M"
+from time_record import minutes_to_time
+from time_record import time_to_minutes
 
 
 class Plotter3(object):
@@ -229,15 +228,7 @@ class Plotter3(object):
         :return:
         """
 
-        required_working_time = datetime.datetime.strptime(
-            time_data["break"], FMT
-        ) + datetime.timedelta(hours=8)
-
-        required_working_time = "{:02d}:{:02d}".format(
-            int(required_working_time.hour), int(required_working_time.minute)
-        )
-
-        return required_working_time
+        return minutes_to_time(8 * 60 + time_to_minutes(time_data["break"]))
 
     def is_weekend(self, date):
         """
@@ -302,86 +293,50 @@ class Plotter3(object):
                 )
                 continue
 
-            time_delta = datetime.datetime.strptime(
-                single_dict["to"], FMT
-            ) - datetime.datetime.strptime(single_dict["from"], FMT)
-
-            self.c_logger.debug("Calculated time delta: {}".format(time_delta))
-
-            # IF YOU HAVE PLUS TIME
-            ellapsed_hours = int(divmod(time_delta.total_seconds(), 3600)[0])
-            ellapsed_mins = int(divmod(time_delta.total_seconds(), 60)[0]) - (ellapsed_hours * 60)
-            time_in_office = "{:02d}:{:02d}".format(int(ellapsed_hours), int(ellapsed_mins))
+            # The times are parsed once to minutes, the strings are created only for the labels.
+            arriving_minutes = time_to_minutes(single_dict["from"])
+            leaving_minutes = time_to_minutes(single_dict["to"])
+            break_minutes = time_to_minutes(single_dict["break"])
 
-            required_working_time = self.get_required_working_hours(single_dict)
-            self.c_logger.debug("Required working time: {}".format(required_working_time))
-
-            effective_hours_delta = datetime.datetime.strptime(
-                time_in_office, FMT
-            ) - datetime.datetime.strptime(required_working_time, FMT)
-
-            self.c_logger.debug(
-                (
-                    "Elapsed hours: {} , Elapsed minutes: {} , "
-                    "Time in office: {} , Effective hours delta: {}"
-                ).format(ellapsed_hours, ellapsed_mins, time_in_office, effective_hours_delta)
-            )
-
-            ellapsed_hours = int(divmod(effective_hours_delta.total_seconds(), 3600)[0])
-            ellapsed_mins = int(divmod(effective_hours_delta.total_seconds(), 60)[0]) - (
-                ellapsed_hours * 60
-            )
+            minutes_in_office = leaving_minutes - arriving_minutes
+            time_in_office = minutes_to_time(minutes_in_office)
 
-            plus_or_minus_time = "{:02d}:{:02d}".format(int(ellapsed_hours), int(ellapsed_mins))
+            required_working_minutes = 8 * 60 + break_minutes
+            self.c_logger.debug("Required working minutes: {}".format(required_working_minutes))
 
-            self.c_logger.debug(
-                "Elapsed hours: {} , Elapsed minutes: {} , "
-                "Plus or minus time: {}".format(ellapsed_hours, ellapsed_mins, plus_or_minus_time)
-            )
+            # IF YOU HAVE PLUS TIME
+            plus_or_minus_minutes = minutes_in_office - required_working_minutes
+            plus_or_minus_time = minutes_to_time(plus_or_minus_minutes)
 
             # IF YOU HAVE MINUS TIME
-
-            if effective_hours_delta.days < 0:
+            if plus_or_minus_minutes < 0:
                 self.c_logger.debug("You have minus time")
-                effective_hours_delta = datetime.datetime.strptime(
-                    required_working_time, FMT
-                ) - datetime.datetime.strptime(time_in_office, FMT)
-
-                ellapsed_hours = int(divmod(effective_hours_delta.total_seconds(), 3600)[0])
-                ellapsed_mins = int(divmod(effective_hours_delta.total_seconds(), 60)[0]) - (
-                    ellapsed_hours * 60
-                )
+                plus_or_minus_time = "-{}".format(minutes_to_time(-plus_or_minus_minutes))
 
-                plus_or_minus_time = "-{:02d}:{:02d}".format(
-                    abs(int(ellapsed_hours)), int(ellapsed_mins)
-                )
-
-                self.c_logger.debug(
-                    (
-                        "Effective hours delta: {} , Elapsed hours: {} , Elapsed minutes: {} , "
-                        "Plus or minus time: {}"
-                    ).format(
-                        effective_hours_delta, ellapsed_hours, ellapsed_mins, plus_or_minus_time
-                    )
+            self.c_logger.debug(
+                "Time in office: {} , Plus or minus time: {}".format(
+                    time_in_office, plus_or_minus_time
                 )
+            )
 
-            time_offset = self.x_axis_config_data[single_dict["to"]]
+            # The X axis config maps the "HH:MM" times to their minute values.
+            time_offset = leaving_minutes
 
             self.c_logger.debug("Time offset: {}".format(time_offset))
 
-            break_time = self.x_axis_config_data[single_dict["break"]]
+            break_time = break_minutes
 
             # TODO: The following if-else almost code duplication. Should be refactored!
             if "-" in plus_or_minus_time:
                 self.c_logger.debug("'-' character is in Plus/Minus time.")
-                minus_time = self.x_axis_config_data[plus_or_minus_time.replace("-", "")]
+                minus_time = -plus_or_minus_minutes
                 self.c_logger.debug("Minus time without offset: {}".format(minus_time))
                 minus_time += time_offset
                 self.c_logger.debug("Minus time with offset: {}".format(minus_time))
                 return_times.append(
                     {
-                        "from": self.x_axis_config_data[single_dict["from"]],
-                        "to": self.x_axis_config_data[single_dict["to"]],
+                        "from": arriving_minutes,
+                        "to": leaving_minutes,
                         "minus": minus_time,
                         "plus": None,
                         "break": break_time,
@@ -394,12 +349,12 @@ class Plotter3(object):
                 )
             else:
                 self.c_logger.debug("'-' character is NOT in Plus/Minus time.")
-                plus_time = self.x_axis_config_data[plus_or_minus_time]
+                plus_time = plus_or_minus_minutes
                 self.c_logger.debug("Plus time: {}".format(plus_time))
                 return_times.append(
                     {
-                        "from": self.x_axis_config_data[single_dict["from"]],
-                        "to": self.x_axis_config_data[single_dict["to"]] - plus_time,
+                        "from": arriving_minutes,
+                        "to": leaving_minutes - plus_time,
                         "minus": None,
                         "plus": plus_time,
                         "break": break_time,
@@ -490,10 +445,9 @@ class Plotter3(object):
                     )
                 )
 
-                over_time = datetime.datetime.strptime("00:00", FMT) - datetime.datetime.strptime(
-                    single_dict["plus_minus_human_readable"].replace("-", ""), FMT
+                over_time_seconds -= (
+                    time_to_minutes(single_dict["plus_minus_human_readable"].replace("-", "")) * 60
                 )
-                over_time_seconds += over_time.total_seconds()
                 self.c_logger.debug("Overtime is secs: {}".format(over_time_seconds))
                 continue
             self.c_logger.debug(
@@ -504,10 +458,9 @@ class Plotter3(object):
                     single_dict["working_hours_human_readable"],
                 )
             )
-            over_time = datetime.datetime.strptime("00:00", FMT) - datetime.datetime.strptime(
-                single_dict["plus_minus_human_readable"].replace("+", ""), FMT
+            over_time_seconds += (
+                time_to_minutes(single_dict["plus_minus_human_readable"].replace("+", "")) * 60
             )
-            over_time_seconds -= over_time.total_seconds()
             self.c_logger.debug("Overtime is secs: {}".format(over_time_seconds))
 
         overtime_hours = int(divmod(abs(over_time_seconds), 3600)[0])
@@ -0,0 +1,299 @@
+"""
+This module contains the in-memory indexes of the time records.
+Two backends are available:
+    - RecordIndex: Pure Python backend. Dict keyed by day ordinal and a sorted ordinal list.
+    - ColumnarRecordIndex: NumPy backend. The ordinals, arriving, leaving and break times are
+                           stored in sorted int arrays so the column calculations and the range
+                           queries are vectorized slices. It requires the 'numpy' module.
+Both backends provide the same interface for DataProcessor.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from time_record import TimeRecord
+
+
+class RecordIndex(object):
+    """
+    Pure Python index of the time records.
+    """
+
+    def __init__(self, records=()):
+        """
+        Init method of the 'RecordIndex' class.
+        :param records: Iterable of TimeRecord. The last record wins if a date is duplicated.
+        """
+
+        self._records = {single_record.ordinal: single_record for single_record in records}
+        self._sorted_ordinals = sorted(self._records)
+
+    def __len__(self):
+        return len(self._sorted_ordinals)
+
+    def __contains__(self, ordinal):
+        return ordinal in self._records
+
+    def get(self, ordinal):
+        """
+        Provide the record of a day.
+        :param ordinal: Day ordinal of the date.
+        :return: TimeRecord or None if there is no record for the day.
+        """
+
+        return self._records.get(ordinal)
+
+    def upsert(self, single_record):
+        """
+        Insert or update a record.
+        :param single_record: The new record. Type: TimeRecord
+        :return: The previous record of the day or None.
+        """
+
+        previous_record = self._records.get(single_record.ordinal)
+        if previous_record is None:
+            insort(self._sorted_ordinals, single_record.ordinal)
+        self._records[single_record.ordinal] = single_record
+        return previous_record
+
+    def ordinals(self):
+        """
+        Provide the day ordinals of the records in order.
+        :return: List of day ordinals.
+        """
+
+        return self._sorted_ordinals
+
+    def records(self):
+        """
+        Provide the records ordered by date.
+        :return: Generator of TimeRecord.
+        """
+
+        return (self._records[ordinal] for ordinal in self._sorted_ordinals)
+
+    def get_range(self, start_ordinal, end_ordinal):
+        """
+        Provide the records between the start and end ordinals (Both are included).
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :return: Records ordered by date. Type: list of TimeRecord
+        """
+
+        first_index = bisect_left(self._sorted_ordinals, start_ordinal)
+        last_index = bisect_right(self._sorted_ordinals, end_ordinal)
+        return [self._records[ordinal] for ordinal in self._sorted_ordinals[first_index:last_index]]
+
+    def get_columns(self, start_ordinal=None, end_ordinal=None):
+        """
+        Provide the records as columns. The complete index is used if the range is not set.
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :return: Tuple of lists: (ordinals, arriving, leaving, break_time)
+        """
+
+        if start_ordinal is None or end_ordinal is None:
+            selected_records = list(self.records())
+        else:
+            selected_records = self.get_range(start_ordinal, end_ordinal)
+        return (
+            [single_record.ordinal for single_record in selected_records],
+            [single_record.arriving for single_record in selected_records],
+            [single_record.leaving for single_record in selected_records],
+            [single_record.break_time for single_record in selected_records],
+        )
+
+    def get_effective_minutes(self, start_ordinal=None, end_ordinal=None):
+        """
+        Provide the effective minutes (leaving - arriving) of the records.
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :return: List of minutes.
+        """
+
+        _, arriving, leaving, _ = self.get_columns(start_ordinal, end_ordinal)
+        return [
+            leaving_time - arriving_time for arriving_time, leaving_time in zip(arriving, leaving)
+        ]
+
+
+class ColumnarRecordIndex(object):
+    """
+    NumPy (columnar) index of the time records.
+    The arrays are sorted by day ordinal and a day is stored only once.
+    """
+
+    def __init__(self, records=()):
+        """
+        Init method of the 'ColumnarRecordIndex' class.
+        :param records: Iterable of TimeRecord. The last record wins if a date is duplicated.
+        """
+
+        if numpy is None:
+            raise ImportError(
+                "The 'numpy' module is required for the columnar backend. "
+                "Install it: pip install numpy"
+            )
+
+        unique_records = {single_record.ordinal: single_record for single_record in records}
+        rows = numpy.array(
+            [unique_records[ordinal].as_tuple() for ordinal in sorted(unique_records)],
+            dtype=numpy.int32,
+        ).reshape(-1, 4)
+        self._ordinals = numpy.ascontiguousarray(rows[:, 0])
+        self._arriving = numpy.ascontiguousarray(rows[:, 1])
+        self._leaving = numpy.ascontiguousarray(rows[:, 2])
+        self._break_time = numpy.ascontiguousarray(rows[:, 3])
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def __contains__(self, ordinal):
+        return self.__position(ordinal) is not None
+
+    def __position(self, ordinal):
+        """
+        Find the position of a day in the arrays.
+        :param ordinal: Day ordinal of the date.
+        :return: Position (INT) or None if there is no record for the day.
+        """
+
+        position = int(numpy.searchsorted(self._ordinals, ordinal))
+        if position < len(self._ordinals) and self._ordinals[position] == ordinal:
+            return position
+        return None
+
+    def __row_to_record(self, position):
+        """
+        Create a TimeRecord from a row of the arrays.
+        :param position: Position of the row.
+        :return: TimeRecord
+        """
+
+        return TimeRecord(
+            int(self._ordinals[position]),
+            int(self._arriving[position]),
+            int(self._leaving[position]),
+            int(self._break_time[position]),
+        )
+
+    def __slice(self, start_ordinal, end_ordinal):
+        """
+        Provide the slice of the arrays which belongs to the range.
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :return: slice object.
+        """
+
+        if start_ordinal is None or end_ordinal is None:
+            return slice(0, len(self._ordinals))
+        return slice(
+            int(numpy.searchsorted(self._ordinals, start_ordinal, side="left")),
+            int(numpy.searchsorted(self._ordinals, end_ordinal, side="right")),
+        )
+
+    def get(self, ordinal):
+        """
+        Provide the record of a day.
+        :param ordinal: Day ordinal of the date.
+        :return: TimeRecord or None if there is no record for the day.
+        """
+
+        position = self.__position(ordinal)
+        if position is None:
+            return None
+        return self.__row_to_record(position)
+
+    def upsert(self, single_record):
+        """
+        Insert or update a record.
+        An update is an in-place write, an insert shifts the tail of the arrays.
+        :param single_record: The new record. Type: TimeRecord
+        :return: The previous record of the day or None.
+        """
+
+        position = self.__position(single_record.ordinal)
+        if position is not None:
+            previous_record = self.__row_to_record(position)
+            self._arriving[position] = single_record.arriving
+            self._leaving[position] = single_record.leaving
+            self._break_time[position] = single_record.break_time
+            return previous_record
+
+        position = int(numpy.searchsorted(self._ordinals, single_record.ordinal))
+        self._ordinals = numpy.insert(self._ordinals, position, single_record.ordinal)
+        self._arriving = numpy.insert(self._arriving, position, single_record.arriving)
+        self._leaving = numpy.insert(self._leaving, position, single_record.leaving)
+        self._break_time = numpy.insert(self._break_time, position, single_record.break_time)
+        return None
+
+    def ordinals(self):
+        """
+        Provide the day ordinals of the records in order.
+        :return: Array of day ordinals.
+        """
+
+        return self._ordinals
+
+    def records(self):
+        """
+        Provide the records ordered by date.
+        :return: Generator of TimeRecord.
+        """
+
+        return (self.__row_to_record(position) for position in range(len(self._ordinals)))
+
+    def get_range(self, start_ordinal, end_ordinal):
+        """
+        Provide the records between the start and end ordinals (Both are included).
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :return: Records ordered by date. Type: list of TimeRecord
+        """
+
+        range_slice = self.__slice(start_ordinal, end_ordinal)
+        return [
+            TimeRecord(*row)
+            for row in zip(
+                self._ordinals[range_slice].tolist(),
+                self._arriving[range_slice].tolist(),
+                self._leaving[range_slice].tolist(),
+                self._break_time[range_slice].tolist(),
+            )
+        ]
+
+    def get_columns(self, start_ordinal=None, end_ordinal=None):
+        """
+        Provide the records as columns. The complete index is used if the range is not set.
+        The returned arrays are views (No copy is made) so they must not be modified.
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :return: Tuple of arrays: (ordinals, arriving, leaving, break_time)
+        """
+
+        range_slice = self.__slice(start_ordinal, end_ordinal)
+        return (
+            self._ordinals[range_slice],
+            self._arriving[range_slice],
+            self._leaving[range_slice],
+            self._break_time[range_slice],
+        )
+
+    def get_effective_minutes(self, start_ordinal=None, end_ordinal=None):
+        """
+        Provide the effective minutes (leaving - arriving) of the records.
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :return: Array of minutes.
+        """
+
+        range_slice = self.__slice(start_ordinal, end_ordinal)
+        return self._leaving[range_slice] - self._arriving[range_slice]
+
+
+# Available in-memory backends of DataProcessor.
+BACKENDS = {"python": RecordIndex, "numpy": ColumnarRecordIndex}
@@ -0,0 +1,196 @@
+"""
+This module contains the base class of the time data storages.
+A storage persists the time records (TimeRecord) and answers the queries of DataProcessor.
+The dates are always day ordinals and the times are always minutes on this level.
+"""
+
+import os
+import sys
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, ".."))  # noqa: E402
+
+from change_detector import get_files_signature
+from color_logger import ColoredLogger
+
+
+class BaseStorage(object):
+    """
+    This class is the base class of the storages.
+    The inherited classes have to implement the not implemented methods.
+    """
+
+    def __init__(self, path, c_logger=None):
+        """
+        Init method of the 'BaseStorage' class.
+        :param path: Path of the storage (File or directory).
+        :param c_logger: Logger instance (ColoredLogger type is recommended).
+        """
+
+        self.path = path
+        self.c_logger = c_logger if c_logger else self.__set_up_default_logger()
+        # Cross-process lock of the writings (See: file_lock module). None if it is not used.
+        self.file_lock = None
+
+    @staticmethod
+    def __set_up_default_logger():
+        """
+        Set-up a default logger if it is not provided as parameter.
+        :return: Instance of ColoredLogger
+        """
+
+        # Set-up the main logger instance.
+        path_of_log_file = os.path.join(PATH_OF_FILE_DIR, "..", "logs", "storage.log")
+        return_logger = ColoredLogger(os.path.basename(__file__), log_file_path=path_of_log_file)
+        return_logger.info("Default logger has been set-up in storage module.")
+
+        return return_logger
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def get(self, ordinal):
+        """
+        Provide the record of a day.
+        :param ordinal: Day ordinal of the date.
+        :return: TimeRecord or None if there is no record for the day.
+        """
+
+        raise NotImplementedError
+
+    def get_range(self, start_ordinal, end_ordinal):
+        """
+        Provide the records between the start and end ordinals (Both are included).
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :return: Records ordered by date. Type: list of TimeRecord
+        """
+
+        raise NotImplementedError
+
+    def ordinals(self):
+        """
+        Provide the day ordinals of the records in order.
+        :return: Sequence of day ordinals.
+        """
+
+        raise NotImplementedError
+
+    def records(self):
+        """
+        Provide all records ordered by date.
+        :return: Iterable of TimeRecord.
+        """
+
+        raise NotImplementedError
+
+    def upsert(self, single_record):
+        """
+        Insert or update a record and persist it.
+        :param single_record: The new record. Type: TimeRecord
+        :return: The previous record of the day or None.
+        """
+
+        raise NotImplementedError
+
+    def upsert_many(self, records):
+        """
+        Insert or update several records and persist them.
+        The default implementation upserts the records one by one, the inherited classes persist
+        the batch at once.
+        :param records: Iterable of TimeRecord.
+        :return: The previous records of the days (Or None) in the order of the records.
+        """
+
+        return [self.upsert(single_record) for single_record in records]
+
+    def get_columns(self, start_ordinal=None, end_ordinal=None):
+        """
+        Provide the records as columns. All records are used if the range is not set.
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :return: Tuple of sequences: (ordinals, arriving, leaving, break_time)
+        """
+
+        if start_ordinal is None or end_ordinal is None:
+            selected_records = list(self.records())
+        else:
+            selected_records = self.get_range(start_ordinal, end_ordinal)
+        return (
+            [single_record.ordinal for single_record in selected_records],
+            [single_record.arriving for single_record in selected_records],
+            [single_record.leaving for single_record in selected_records],
+            [single_record.break_time for single_record in selected_records],
+        )
+
+    def get_effective_minutes(self, start_ordinal=None, end_ordinal=None):
+        """
+        Provide the effective minutes (leaving - arriving) of the records.
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :return: Sequence of minutes.
+        """
+
+        _, arriving, leaving, _ = self.get_columns(start_ordinal, end_ordinal)
+        return [
+            leaving_time - arriving_time for arriving_time, leaving_time in zip(arriving, leaving)
+        ]
+
+    @classmethod
+    def get_data_files(cls, path):
+        """
+        Provide the files which contain the data of a storage.
+        :param path: Path of the storage (File or directory).
+        :return: List of file paths.
+        """
+
+        return [path]
+
+    def get_version(self):
+        """
+        Provide the version of the stored data. It is changed by every write of the data files
+        (Also by other processes) so it can be stored with data which is derived from the
+        records (Eg.: Shared index of the user partitions).
+        :return: Version as a string (Signature of the data files, see: change_detector module).
+        """
+
+        return get_files_signature(self.get_data_files(self.path))
+
+    @property
+    def lock_metrics(self):
+        """
+        Lock wait metrics of the storage. Empty if the storage doesn't use file lock.
+        Structure: {"acquisitions": 10, "timeouts": 0, "total_wait": 0.5, "max_wait": 0.2}
+        """
+
+        return dict(self.file_lock.metrics) if self.file_lock else {}
+
+    def reload_if_changed(self):
+        """
+        Reload the changed data if the storage has been changed by another process (Eg.: A sync
+        job or another instance of the application).
+        The default implementation doesn't detect any change.
+        :return: Bool. True if the data has been reloaded.
+        """
+
+        return False
+
+    def flush(self):
+        """
+        Write the not yet written changes (If the storage buffers them).
+        The default implementation writes every change immediately so it does nothing.
+        :return: None
+        """
+
+        pass
+
+    def close(self):
+        """
+        Release the resources of the storage (Eg.: Opened files or connections).
+        :return: None
+        """
+
+        pass
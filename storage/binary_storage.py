@@ -0,0 +1,430 @@
+"""
+This module contains the memory-mapped binary storage of the time data.
+File format (Little-endian):
+    - Header (16 bytes): Magic (b"TREC"), version (UINT16), record size (UINT16), the day
+                         ordinal of the first slot (INT32) and the number of records (UINT32).
+    - Slots (16 bytes / day): Day ordinal, arriving, leaving and break time (INT32 each).
+                              One slot belongs to every day from the first ordinal so the offset
+                              of a day is calculated. An empty slot (No record) is all zeros.
+The file is opened via mmap so the start-up doesn't parse anything and a change of a day is a
+single in-place write of its slot (And of the header if the day is new). The file is extended by
+a year of empty slots at a time so the days after the last slot don't remap it on every write.
+A one-shot migration from the Json config file is available:
+    python3 storage/binary_storage.py --json conf/time_data.json --bin conf/time_data.bin
+"""
+
+import mmap
+import os
+import struct
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, ".."))  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, "..", "tools"))  # noqa: E402
+
+from base_storage import BaseStorage
+from file_lock import FileLock
+from file_lock import get_lock_path
+from helper_functions import write_file_atomically
+from json_storage import JsonStorage
+from time_record import TimeRecord
+
+MAGIC = b"TREC"
+VERSION = 2
+HEADER_FORMAT = "<4sHHiI"
+RECORD_FORMAT = "<iiii"
+# Only the day ordinal of the slots (It is 0 in the empty slots).
+ORDINAL_FORMAT = "<i12x"
+# The data file is extended by (At least) this number of empty slots.
+EXTEND_SLOTS = 366
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+
+class BinaryStorage(BaseStorage):
+    """
+    This class contains the memory-mapped binary storage related attributes.
+    """
+
+    def __init__(self, path, c_logger=None):
+        """
+        Init method of the 'BinaryStorage' class.
+        :param path: Path of the binary data file. It is created if it doesn't exist.
+        :param c_logger: Logger instance (ColoredLogger type is recommended).
+        """
+
+        super(BinaryStorage, self).__init__(path, c_logger=c_logger)
+        self.file_lock = FileLock(get_lock_path(self.path), c_logger=self.c_logger)
+        with self.file_lock:
+            if not os.path.isfile(self.path) or not os.stat(self.path).st_size:
+                self.c_logger.warning("The '{}' binary data file doesn't exist.".format(self.path))
+                write_file_atomically(
+                    self.path, struct.pack(HEADER_FORMAT, MAGIC, VERSION, RECORD_SIZE, 0, 0)
+                )
+
+        self.c_logger.info("Starting to map the binary data file: {}".format(self.path))
+        self._file = None
+        self._map = None
+        self._first_ordinal = 0
+        with self.file_lock:
+            self._open_map()
+        self.c_logger.info("The binary data file has been mapped. Records: {}".format(len(self)))
+
+    def _open_map(self):
+        """
+        Open and map the data file and check its header.
+        :return: None
+        """
+
+        self._file = open(self.path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, record_size, self._first_ordinal, _ = struct.unpack_from(
+            HEADER_FORMAT, self._map, 0
+        )
+        if magic != MAGIC or version not in (1, VERSION) or record_size != RECORD_SIZE:
+            self._close_map()
+            raise Exception("Not valid binary data file: {}".format(self.path))
+        if version == 1:
+            # The first version didn't store the number of records (The bytes were reserved).
+            self.c_logger.info("Upgrading the binary data file to version: {}".format(VERSION))
+            self._write_header(self._count_slots())
+
+    def _count_slots(self):
+        """
+        Count the not empty slots of the data file. Only the day ordinals are read from the map.
+        :return: Number of records.
+        """
+
+        with memoryview(self._map) as map_view:
+            with map_view[HEADER_SIZE : HEADER_SIZE + self._slot_count * RECORD_SIZE] as slots_view:
+                return sum(1 for row in struct.iter_unpack(ORDINAL_FORMAT, slots_view) if row[0])
+
+    def _write_header(self, record_count):
+        """
+        Write the header of the data file and flush it to the disk.
+        :param record_count: Number of the records in the data file.
+        :return: None
+        """
+
+        struct.pack_into(
+            HEADER_FORMAT,
+            self._map,
+            0,
+            MAGIC,
+            VERSION,
+            RECORD_SIZE,
+            self._first_ordinal,
+            record_count,
+        )
+        self._flush(0, HEADER_SIZE)
+
+    def _close_map(self):
+        """
+        Unmap and close the data file.
+        :return: None
+        """
+
+        self._map.close()
+        self._file.close()
+
+    @property
+    def _slot_count(self):
+        """
+        Number of the slots (Days) in the data file.
+        """
+
+        return (len(self._map) - HEADER_SIZE) // RECORD_SIZE
+
+    @property
+    def _last_ordinal(self):
+        """
+        Day ordinal of the last slot.
+        """
+
+        return self._first_ordinal + self._slot_count - 1
+
+    def _offset(self, ordinal):
+        """
+        Provide the offset of the slot of a day in the data file.
+        :param ordinal: Day ordinal of the date.
+        :return: Offset in bytes.
+        """
+
+        return HEADER_SIZE + (ordinal - self._first_ordinal) * RECORD_SIZE
+
+    def _flush(self, offset, size):
+        """
+        Flush a changed part of the mapped data file to the disk.
+        :param offset: Offset of the changed part.
+        :param size: Size of the changed part.
+        :return: None
+        """
+
+        # The offset of the flushing has to be a multiple of the allocation granularity.
+        page_offset = offset - offset % mmap.ALLOCATIONGRANULARITY
+        self._map.flush(page_offset, offset + size - page_offset)
+
+    def __len__(self):
+        # The number of records is read from the header so the in-place writes of other
+        # processes are counted as well.
+        return struct.unpack_from(HEADER_FORMAT, self._map, 0)[4]
+
+    def get(self, ordinal):
+        if not self._slot_count or not self._first_ordinal <= ordinal <= self._last_ordinal:
+            return None
+        row = struct.unpack_from(RECORD_FORMAT, self._map, self._offset(ordinal))
+        return TimeRecord(*row) if row[0] else None
+
+    def get_range(self, start_ordinal, end_ordinal):
+        start_ordinal = max(start_ordinal, self._first_ordinal)
+        end_ordinal = min(end_ordinal, self._last_ordinal)
+        if start_ordinal > end_ordinal:
+            return []
+        # The slots are read via a memoryview of the map (No copy) and the views are released
+        # before returning, otherwise the map couldn't be resized or closed.
+        with memoryview(self._map) as map_view:
+            with map_view[
+                self._offset(start_ordinal) : self._offset(end_ordinal) + RECORD_SIZE
+            ] as slots_view:
+                return [
+                    TimeRecord(*row)
+                    for row in struct.iter_unpack(RECORD_FORMAT, slots_view)
+                    if row[0]
+                ]
+
+    def ordinals(self):
+        return [single_record.ordinal for single_record in self.records()]
+
+    def records(self):
+        return iter(self.get_range(self._first_ordinal, self._last_ordinal))
+
+    def get_columns(self, start_ordinal=None, end_ordinal=None):
+        if numpy is None:
+            return super(BinaryStorage, self).get_columns(start_ordinal, end_ordinal)
+
+        if start_ordinal is None or end_ordinal is None:
+            start_ordinal, end_ordinal = self._first_ordinal, self._last_ordinal
+        start_ordinal = max(start_ordinal, self._first_ordinal)
+        end_ordinal = min(end_ordinal, self._last_ordinal)
+        if start_ordinal > end_ordinal:
+            return tuple(numpy.empty(0, dtype=numpy.int32) for _ in range(4))
+        slots = numpy.frombuffer(
+            self._map,
+            dtype="<i4",
+            count=(end_ordinal - start_ordinal + 1) * 4,
+            offset=self._offset(start_ordinal),
+        ).reshape(-1, 4)
+        # The filtering makes a copy so the map is not referenced by the returned arrays.
+        rows = slots[slots[:, 0] != 0].astype(numpy.int32)
+        del slots
+        return rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3]
+
+    def get_effective_minutes(self, start_ordinal=None, end_ordinal=None):
+        if numpy is None:
+            return super(BinaryStorage, self).get_effective_minutes(start_ordinal, end_ordinal)
+        _, arriving, leaving, _ = self.get_columns(start_ordinal, end_ordinal)
+        return leaving - arriving
+
+    def upsert(self, single_record):
+        """
+        Insert or update a record.
+        The change is an in-place write of the slot of the day. The data file is extended if the
+        day is after the last slot and it is rewritten if the day is before the first slot.
+        The data file is mapped again first under the lock if another process has resized it.
+        :param single_record: The new record. Type: TimeRecord
+        :return: The previous record of the day or None.
+        """
+
+        with self.file_lock:
+            self.reload_if_changed()
+            self._prepare_slots(single_record.ordinal, single_record.ordinal)
+            previous_record = self._write_slot(single_record)
+            self._flush(self._offset(single_record.ordinal), RECORD_SIZE)
+            if previous_record is None:
+                self._write_header(len(self) + 1)
+            return previous_record
+
+    def upsert_many(self, records):
+        """
+        Insert or update several records.
+        The data file is extended or rewritten at most once and the changed slots are flushed to
+        the disk at once.
+        :param records: Iterable of TimeRecord.
+        :return: The previous records of the days (Or None) in the order of the records.
+        """
+
+        with self.file_lock:
+            self.reload_if_changed()
+            records = list(records)
+            if not records:
+                return []
+
+            ordinals = [single_record.ordinal for single_record in records]
+            self._prepare_slots(min(ordinals), max(ordinals))
+            previous_records = [self._write_slot(single_record) for single_record in records]
+            new_records = sum(1 for previous_record in previous_records if previous_record is None)
+            if new_records:
+                self._write_header(len(self) + new_records)
+            first_offset = self._offset(min(ordinals))
+            self._flush(first_offset, self._offset(max(ordinals)) + RECORD_SIZE - first_offset)
+            return previous_records
+
+    def _prepare_slots(self, first_ordinal, last_ordinal):
+        """
+        Make sure that the data file has slots for the days of the range.
+        :param first_ordinal: Day ordinal of the first day.
+        :param last_ordinal: Day ordinal of the last day.
+        :return: None
+        """
+
+        if not self._slot_count:
+            self._first_ordinal = first_ordinal
+            self._write_header(0)
+        elif first_ordinal < self._first_ordinal:
+            self._rewrite(list(self.records()), first_ordinal=first_ordinal)
+        if last_ordinal > self._last_ordinal:
+            self._extend(last_ordinal)
+
+    def _write_slot(self, single_record):
+        """
+        Write a record into its slot (The slot has to exist). It is not flushed to the disk and
+        the number of records in the header is not updated.
+        :param single_record: The new record. Type: TimeRecord
+        :return: The previous record of the day or None.
+        """
+
+        previous_record = self.get(single_record.ordinal)
+        struct.pack_into(
+            RECORD_FORMAT, self._map, self._offset(single_record.ordinal), *single_record.as_tuple()
+        )
+        return previous_record
+
+    def _extend(self, last_ordinal):
+        """
+        Extend the data file with empty slots until the day and with EXTEND_SLOTS more empty
+        slots after it (The next days are written in place without extending the file again).
+        The new part of the file is filled with zeros (Empty slots) by the OS.
+        :param last_ordinal: Day ordinal of the last day which needs slot.
+        :return: None
+        """
+
+        last_ordinal += EXTEND_SLOTS
+        self.c_logger.info("Extending the binary data file until: {}".format(last_ordinal))
+        self._close_map()
+        with open(self.path, "r+b") as opened_file:
+            opened_file.truncate(self._offset(last_ordinal) + RECORD_SIZE)
+        self._open_map()
+
+    def _rewrite(self, records, first_ordinal=None):
+        """
+        Write the complete data file (Atomically) and map it again.
+        :param records: The records of the new data file. Type: list of TimeRecord
+        :param first_ordinal: Day ordinal of the first slot. The first record is used if it is
+                              not set.
+        :return: None
+        """
+
+        ordinals = [single_record.ordinal for single_record in records]
+        if first_ordinal is None:
+            first_ordinal = min(ordinals) if ordinals else 0
+        slot_count = max(ordinals) - first_ordinal + 1 if ordinals else 0
+        self.c_logger.info(
+            "Rewriting the binary data file. First day: {} ; Slots: {}".format(
+                first_ordinal, slot_count
+            )
+        )
+
+        content = bytearray(HEADER_SIZE + slot_count * RECORD_SIZE)
+        struct.pack_into(
+            HEADER_FORMAT, content, 0, MAGIC, VERSION, RECORD_SIZE, first_ordinal, len(records)
+        )
+        for single_record in records:
+            struct.pack_into(
+                RECORD_FORMAT,
+                content,
+                HEADER_SIZE + (single_record.ordinal - first_ordinal) * RECORD_SIZE,
+                *single_record.as_tuple()
+            )
+
+        self._close_map()
+        write_file_atomically(self.path, bytes(content))
+        self._open_map()
+
+    def reload_if_changed(self):
+        """
+        Map the data file again if it has been replaced or resized by another process.
+        The in-place changes of the slots are visible via the map without reloading.
+        :return: Bool. True if the data file has been mapped again.
+        """
+
+        try:
+            file_stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        mapped_stat = os.fstat(self._file.fileno())
+        if (file_stat.st_ino, file_stat.st_size) == (mapped_stat.st_ino, len(self._map)):
+            return False
+
+        self.c_logger.info("The binary data file has been changed. Starting to map it again.")
+        self._close_map()
+        self._open_map()
+        return True
+
+    def migrate_from_json(self, json_path):
+        """
+        Copy the records of a Json config file (Snapshot and journal) into the data file.
+        The existing records of the same dates are overwritten. The data file is written once.
+        :param json_path: Path of the Json config file.
+        :return: Number of migrated records.
+        """
+
+        with self.file_lock:
+            self.reload_if_changed()
+            self.c_logger.info("Starting to migrate the '{}' Json config file.".format(json_path))
+            json_storage = JsonStorage(json_path, c_logger=self.c_logger)
+            merged_records = {
+                single_record.ordinal: single_record for single_record in self.records()
+            }
+            merged_records.update(
+                (single_record.ordinal, single_record) for single_record in json_storage.records()
+            )
+            self._rewrite(list(merged_records.values()))
+            self.c_logger.info("Migrated records: {}".format(len(json_storage)))
+            return len(json_storage)
+
+    def close(self):
+        self.c_logger.info("Closing the binary data file: {}".format(self.path))
+        self._close_map()
+
+
+####
+# ENTRY POINT
+####
+
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrate a Json config file into binary file.")
+
+    parser.add_argument(
+        "--json", dest="json_path", required=True, help="Path of the Json config file."
+    )
+    parser.add_argument(
+        "--bin", dest="bin_path", required=True, help="Path of the binary data file."
+    )
+
+    args = parser.parse_args()
+
+    binary_storage = BinaryStorage(args.bin_path)
+    print("Migrated records: {}".format(binary_storage.migrate_from_json(args.json_path)))
+    binary_storage.close()
@@ -0,0 +1,125 @@
+"""
+This module contains the change detector of the data files.
+A file is checked in two steps:
+    - The modification time and the size of the file are compared (Cheap, it is a stat call).
+    - If they are changed, the hash of the content is compared (Eg.: The file was only touched
+      or rewritten with the same content).
+"""
+
+import hashlib
+import os
+
+# The content of the files is hashed in blocks of this size.
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def get_content_hash(path=None, content=None):
+    """
+    Calculate the hash of a file or of a content.
+    :param path: Path of the file. It is read in blocks.
+    :param content: Content as a string or bytes. It is used instead of the file if it is set.
+    :return: Hex digest of the content.
+    """
+
+    content_hash = hashlib.sha1()
+    if content is not None:
+        content_hash.update(content.encode("utf-8") if isinstance(content, str) else content)
+        return content_hash.hexdigest()
+    with open(path, "rb") as opened_file:
+        for block in iter(lambda: opened_file.read(HASH_BLOCK_SIZE), b""):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+
+def get_files_signature(paths):
+    """
+    Calculate the signature of the state of files from their inode, modification time and size
+    (Cheap, only stat calls). The files are not read.
+    :param paths: Paths of the files. A missing file is part of the signature as well.
+    :return: Signature as a string.
+    """
+
+    states = []
+    for path in paths:
+        try:
+            file_stat = os.stat(path)
+        except FileNotFoundError:
+            states.append("-")
+            continue
+        states.append(
+            "{}:{}:{}".format(file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size)
+        )
+    return "|".join(states)
+
+
+class FileChangeDetector(object):
+    """
+    This class contains the remembered states of the data files.
+    """
+
+    def __init__(self):
+        """
+        Init method of the 'FileChangeDetector' class.
+        """
+
+        # Structure: {path: (modification time, size, content hash), ...}
+        self._states = {}
+
+    @staticmethod
+    def __get_stat(path):
+        """
+        Provide the modification time and the size of a file.
+        :param path: Path of the file.
+        :return: Tuple: (modification time in ns, size) or None if the file doesn't exist.
+        """
+
+        try:
+            file_stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return file_stat.st_mtime_ns, file_stat.st_size
+
+    def remember(self, path, content=None):
+        """
+        Remember the current state of a file (Eg.: After it has been loaded or written).
+        :param path: Path of the file.
+        :param content: The written content. The file is not read again if it is set.
+        :return: None
+        """
+
+        file_stat = self.__get_stat(path)
+        if file_stat is None:
+            self._states[path] = None
+            return
+        self._states[path] = file_stat + (get_content_hash(path=path, content=content),)
+
+    def forget(self, path):
+        """
+        Forget the state of a file.
+        :param path: Path of the file.
+        :return: None
+        """
+
+        self._states.pop(path, None)
+
+    def has_changed(self, path):
+        """
+        Check if the content of a file has been changed since its state was remembered.
+        If only the modification time has been changed, the new time is remembered.
+        :param path: Path of the file.
+        :return: Bool. True if the content has been changed (Or the file is not known).
+        """
+
+        if path not in self._states:
+            return True
+        remembered_state = self._states[path]
+        file_stat = self.__get_stat(path)
+        if remembered_state is None or file_stat is None:
+            return remembered_state != file_stat
+        if file_stat == remembered_state[:2]:
+            return False
+        content_hash = get_content_hash(path=path)
+        if content_hash != remembered_state[2]:
+            return True
+        self._states[path] = file_stat + (content_hash,)
+        return False
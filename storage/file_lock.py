@@ -0,0 +1,138 @@
+"""
+This module contains the advisory file lock of the storages (Cross-process).
+The lock is taken on a separate lock file (Eg.: conf/time_data.json.lock) because the data files
+are replaced atomically (The inode of the data file changes).
+The lock is based on 'fcntl.flock' so it is not available on Windows (There the lock excludes
+only the threads of the process).
+The lock is owned by a thread, the threads of a process (Eg.: Write-behind flushing) wait for
+each other as well.
+"""
+
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Maximum waiting time for the lock in seconds.
+LOCK_TIMEOUT = 10.0
+# The lock is tried again after this time (Seconds) while it is held by another process.
+LOCK_POLL_INTERVAL = 0.01
+
+
+class FileLock(object):
+    """
+    This class contains the re-entrant exclusive lock of a lock file (Per thread).
+    Usage:
+        with file_lock:
+            # Read-modify-write of the data files.
+    """
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT, c_logger=None):
+        """
+        Init method of the 'FileLock' class.
+        :param path: Path of the lock file. It is created if it doesn't exist.
+        :param timeout: Maximum waiting time for the lock in seconds.
+        :param c_logger: Logger instance (ColoredLogger type is recommended).
+        """
+
+        self.path = path
+        self.timeout = timeout
+        self.c_logger = c_logger
+        self._lock_file = None
+        # The lock file is locked by the owner thread of this lock, the depth is counted only
+        # for the owner thread.
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        # Lock wait metrics. The waiting times are in seconds.
+        self.metrics = {"acquisitions": 0, "timeouts": 0, "total_wait": 0.0, "max_wait": 0.0}
+
+    def acquire(self):
+        """
+        Acquire the lock. The lock is re-entrant (The nested acquisitions of the owner thread
+        don't wait).
+        :return: None
+        """
+
+        start_time = time.perf_counter()
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            self.__raise_timeout()
+        if self._depth:
+            self._depth += 1
+            return
+        if fcntl is None:
+            self._depth = 1
+            return
+
+        try:
+            lock_file = open(self.path, "a")
+        except OSError:
+            self._thread_lock.release()
+            raise
+        while True:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.perf_counter() - start_time >= self.timeout:
+                    lock_file.close()
+                    self._thread_lock.release()
+                    self.__raise_timeout()
+                time.sleep(LOCK_POLL_INTERVAL)
+
+        wait_time = time.perf_counter() - start_time
+        self.metrics["acquisitions"] += 1
+        self.metrics["total_wait"] += wait_time
+        self.metrics["max_wait"] = max(self.metrics["max_wait"], wait_time)
+        if self.c_logger and wait_time >= LOCK_POLL_INTERVAL:
+            self.c_logger.info(
+                "The '{}' lock has been acquired after {:.3f} seconds.".format(self.path, wait_time)
+            )
+        self._lock_file = lock_file
+        self._depth = 1
+
+    def __raise_timeout(self):
+        """
+        Count and raise the timeout of the acquisition.
+        :return: None
+        """
+
+        self.metrics["timeouts"] += 1
+        raise TimeoutError(
+            "Cannot acquire the '{}' lock in {} seconds.".format(self.path, self.timeout)
+        )
+
+    def release(self):
+        """
+        Release the lock (The lock file is unlocked by the outermost release).
+        :return: None
+        """
+
+        self._depth -= 1
+        if not self._depth and self._lock_file is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def get_lock_path(path):
+    """
+    Provide the path of the lock file of a data file or a data directory.
+    :param path: Path of the data file or directory.
+    :return: Path of the lock file.
+    """
+
+    if os.path.isdir(path):
+        return os.path.join(path, ".lock")
+    return "{}.lock".format(path)
@@ -0,0 +1,474 @@
+"""
+This module contains the Json file storage of the time data.
+The records are kept in an in-memory index (See: record_index module) and they are persisted as:
+    - Snapshot: The Json config file which contains all records.
+    - Journal: Append-only file next to the snapshot. Every change is a Json line in it.
+The journal is replayed at start-up and it is compacted into the snapshot periodically.
+"""
+
+import json
+import os
+import sys
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, ".."))  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, "..", "tools"))  # noqa: E402
+
+from base_storage import BaseStorage
+from change_detector import FileChangeDetector
+from file_lock import FileLock
+from file_lock import get_lock_path
+from helper_functions import write_file_atomically
+import json_codec
+from record_index import BACKENDS
+from time_record import TimeRecord
+
+# The changes are appended to the journal file and they are compacted into the config file
+# when the journal reaches this number of entries.
+JOURNAL_COMPACTION_LIMIT = 100
+# In-memory backend of the records. "python" or "numpy" (It requires the 'numpy' module).
+DEFAULT_BACKEND = "python"
+# The config file is read and parsed in chunks of this size (Characters) at start-up.
+READ_CHUNK_SIZE = 64 * 1024
+# A number (Or a literal) may continue with these characters in the next chunk.
+TOKEN_CHARACTERS = frozenset("0123456789+-.eEtruefalsn")
+
+
+def iter_json_array(opened_file, chunk_size=READ_CHUNK_SIZE):
+    """
+    Parse the items of a Json array file one by one.
+    The file is read in chunks and only the not parsed part of the last chunk is kept so the
+    memory usage doesn't depend on the size of the file.
+    An item is decoded only if it is followed by a character which can't continue it (Or by the
+    end of the file), so a number split by the chunk boundary is not cut.
+    :param opened_file: The opened Json file. Its content has to be a Json array.
+    :param chunk_size: Size of the read chunks.
+    :return: Generator of the parsed items.
+    :raise ValueError: If the content is not a valid Json array (Eg.: Trailing comma or data
+                       after the array).
+    """
+
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    end_of_file = False
+    expect_array_start = True
+    expect_separator = False
+    expect_item = False
+
+    while True:
+        # Skip the white spaces and read the next chunk if the buffer is consumed.
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or end_of_file:
+                break
+            chunk = opened_file.read(chunk_size)
+            end_of_file = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+
+        if position >= len(buffer):
+            raise ValueError("Not complete Json array.")
+
+        character = buffer[position]
+        if expect_array_start:
+            if character != "[":
+                raise ValueError("The content is not a Json array.")
+            position += 1
+            expect_array_start = False
+            continue
+        if character == "]":
+            if expect_item:
+                raise ValueError("Trailing comma in the Json array.")
+            _check_end_of_array(opened_file, buffer[position + 1 :], chunk_size)
+            return
+        if expect_separator:
+            if character != ",":
+                raise ValueError("Missing separator at character: {}".format(character))
+            position += 1
+            expect_separator = False
+            expect_item = True
+            continue
+
+        try:
+            item, item_end = decoder.raw_decode(buffer, position)
+        except ValueError as decode_error:
+            if end_of_file:
+                raise decode_error
+            item_end = None
+        # The item may continue in the next chunk if only its characters follow it in the
+        # buffer (Eg.: "1." of "1.5").
+        if item_end is None or (
+            not end_of_file and TOKEN_CHARACTERS.issuperset(buffer[item_end:])
+        ):
+            chunk = opened_file.read(chunk_size)
+            end_of_file = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        position = item_end
+        expect_separator = True
+        expect_item = False
+        yield item
+
+
+def _check_end_of_array(opened_file, rest_of_buffer, chunk_size):
+    """
+    Check that only white spaces follow the end of the Json array in the file.
+    :param opened_file: The opened Json file.
+    :param rest_of_buffer: The not parsed content after the end of the array.
+    :param chunk_size: Size of the read chunks.
+    :return: None
+    :raise ValueError: If there is data after the array.
+    """
+
+    while True:
+        if rest_of_buffer.strip():
+            raise ValueError("Extra data after the Json array.")
+        rest_of_buffer = opened_file.read(chunk_size)
+        if not rest_of_buffer:
+            return
+
+
+class JsonStorage(BaseStorage):
+    """
+    This class contains the Json file storage related attributes.
+    """
+
+    def __init__(
+        self,
+        path,
+        c_logger=None,
+        journal_compaction_limit=JOURNAL_COMPACTION_LIMIT,
+        backend=DEFAULT_BACKEND,
+    ):
+        """
+        Init method of the 'JsonStorage' class.
+        :param path: Path of the Json config file.
+        :param c_logger: Logger instance (ColoredLogger type is recommended).
+        :param journal_compaction_limit: The journal is compacted into the config file when it
+                                         reaches this number of entries.
+        :param backend: In-memory backend of the records. "python" or "numpy".
+        """
+
+        super(JsonStorage, self).__init__(path, c_logger=c_logger)
+        self.journal = "{}.journal".format(path)
+        self.backup = "{}.bak".format(path)
+        self.journal_compaction_limit = journal_compaction_limit
+        self.backend = backend
+        self._index = None
+        self._journal_entries = 0
+        # The journal is read until this offset (Bytes). The entries after it are new.
+        self._journal_offset = 0
+        self._change_detector = FileChangeDetector()
+
+        self.c_logger.info("Starting to check config file existence.")
+        self._check_config_exist()
+        self.file_lock = FileLock(get_lock_path(self.path), c_logger=self.c_logger)
+        self.c_logger.info("Starting to get date from config file.")
+        with self.file_lock:
+            self._load()
+
+    def _load(self):
+        """
+        Load the config file and replay the journal.
+        The state of the config file is remembered before it is loaded, so a change during the
+        loading is detected by the next 'reload_if_changed' call.
+        :return: None
+        """
+
+        self._change_detector.remember(self.path)
+        self.c_logger.info("Starting to build the date index.")
+        self._index = self._load_date_index()
+        self._journal_entries = 0
+        self._journal_offset = 0
+        self.c_logger.info("Starting to replay the journal.")
+        self._replay_journal()
+
+    def __len__(self):
+        return len(self._index)
+
+    def _check_config_exist(self):
+        self.c_logger.info("Start to check if getting config file exists.")
+        if not os.path.isfile(self.path):
+            warning_msg = "The getting '{}' config file doesn't exist.".format(self.path)
+            self.c_logger.warning(warning_msg)
+            try:
+                open(self.path, "a").close()
+            except Exception as unexpected_error:
+                self.c_logger.error(
+                    "Cannot create empty config file on '{}' path. ERROR: {}".format(
+                        self.path, unexpected_error
+                    )
+                )
+                raise unexpected_error
+        self.c_logger.info("The getting '{}' config exists.".format(self.path))
+
+    def get_data(self):
+        """
+        Parse the Json config file (Or its backup if the config file is damaged).
+        :return: The parsed Json config. Structure: [{"date": "2020.03.30.", "from": "08:00",
+                 "to": "17:25", "break": "00:22"}, ...]
+        """
+
+        self.c_logger.info("Start to get data from config Json file.")
+        json_data = self._parse_config(list)
+        self.c_logger.info(
+            "The config Json file has been successfully parsed. Items: {}".format(len(json_data))
+        )
+        return json_data
+
+    @staticmethod
+    def iter_data(path):
+        """
+        Parse the items of a Json config file one by one (See: iter_json_array).
+        :param path: Path of the Json config file.
+        :return: Generator of the parsed items. Structure: {"date": "2020.03.30.",
+                 "from": "08:00", "to": "17:25", "break": "00:22"}
+        """
+
+        with open(path, "r") as opened_file:
+            for item in iter_json_array(opened_file):
+                yield item
+
+    def _parse_config(self, consumer):
+        """
+        Parse the Json config file (Or its backup if the config file is damaged) and pass the
+        parsed items to the consumer one by one.
+        :param consumer: Callable which gets the generator of the parsed items. Eg.: list
+        :return: Return value of the consumer.
+        """
+
+        if os.stat(self.path).st_size == 0:
+            self.c_logger.warning("The data Json file is empty.")
+            return consumer(iter([{}]))
+        try:
+            return consumer(self.iter_data(self.path))
+        except ValueError as decode_error:
+            self.c_logger.error(
+                "Cannot parse the '{}' config file. ERROR: {}".format(self.path, decode_error)
+            )
+            if not os.path.isfile(self.backup):
+                raise decode_error
+            self.c_logger.warning("Starting to get data from backup: {}".format(self.backup))
+            return consumer(self.iter_data(self.backup))
+
+    def _load_date_index(self):
+        """
+        Build the date index while the Json config file is parsed. The parsed items are not
+        collected into a list.
+        :return: Date index. The type depends on the backend (RecordIndex or ColumnarRecordIndex).
+        """
+
+        return self._parse_config(self._build_date_index)
+
+    def _build_date_index(self, json_data):
+        """
+        Build the date index of the loaded records.
+        The records are converted to the compact TimeRecord format once here.
+        :param json_data: Iterable of the parsed items of the Json config. Structure:
+                          [{"date": "2020.03.30.", "from": "08:00", "to": "17:25",
+                          "break": "00:22"}, ...]
+        :return: Date index. The type depends on the backend (RecordIndex or ColumnarRecordIndex).
+        """
+
+        if self.backend not in BACKENDS:
+            raise Exception("Invalid backend getting : {}".format(self.backend))
+        self.c_logger.info("Used backend: {}".format(self.backend))
+
+        date_index = BACKENDS[self.backend](
+            TimeRecord.from_dict(single_dict) for single_dict in json_data if "date" in single_dict
+        )
+        self.c_logger.info(
+            "The date index has been built. Indexed dates: {}".format(len(date_index))
+        )
+        return date_index
+
+    @classmethod
+    def get_data_files(cls, path):
+        return [path, "{}.journal".format(path)]
+
+    def get(self, ordinal):
+        return self._index.get(ordinal)
+
+    def get_range(self, start_ordinal, end_ordinal):
+        return self._index.get_range(start_ordinal, end_ordinal)
+
+    def ordinals(self):
+        return self._index.ordinals()
+
+    def records(self):
+        return self._index.records()
+
+    def get_columns(self, start_ordinal=None, end_ordinal=None):
+        return self._index.get_columns(start_ordinal, end_ordinal)
+
+    def get_effective_minutes(self, start_ordinal=None, end_ordinal=None):
+        return self._index.get_effective_minutes(start_ordinal, end_ordinal)
+
+    def upsert(self, single_record):
+        """
+        Insert or update a record. The change is appended to the journal.
+        The changes of other processes are loaded first under the lock (Read-modify-write) so
+        they are not overwritten by the compaction.
+        :param single_record: The new record. Type: TimeRecord
+        :return: The previous record of the day or None.
+        """
+
+        with self.file_lock:
+            self.reload_if_changed()
+            previous_record = self._index.upsert(single_record)
+            self._append_to_journal([single_record])
+
+            if self._journal_entries >= self.journal_compaction_limit:
+                self.compact()
+
+            return previous_record
+
+    def upsert_many(self, records):
+        """
+        Insert or update several records.
+        The changes are appended to the journal in one write or the journal is compacted directly
+        if the batch would reach the compaction limit.
+        :param records: Iterable of TimeRecord.
+        :return: The previous records of the days (Or None) in the order of the records.
+        """
+
+        with self.file_lock:
+            self.reload_if_changed()
+            records = list(records)
+            previous_records = [self._index.upsert(single_record) for single_record in records]
+
+            if self._journal_entries + len(records) >= self.journal_compaction_limit:
+                self.compact()
+            elif records:
+                self._append_to_journal(records)
+
+            return previous_records
+
+    def _append_to_journal(self, records):
+        """
+        Append the changed records to the end of the journal file (One Json object per line).
+        The records are written and flushed to the disk at once.
+        :param records: The changed records. Type: list of TimeRecord
+        :return: None
+        """
+
+        self.c_logger.debug("Append records to journal: {}".format(records))
+        journal_size = os.path.getsize(self.journal) if os.path.isfile(self.journal) else 0
+        with open(self.journal, "ab") as opened_file:
+            opened_file.write(
+                "".join(
+                    json_codec.dumps(single_record.to_dict()) + "\n" for single_record in records
+                ).encode("utf-8")
+            )
+            opened_file.flush()
+            os.fsync(opened_file.fileno())
+            # The entries of other processes (Appended since the last read) are not skipped,
+            # they are replayed by the next reload together with these entries.
+            if journal_size == self._journal_offset:
+                self._journal_offset = opened_file.tell()
+        self._journal_entries += len(records)
+
+    def _replay_journal(self):
+        """
+        Apply the records of the journal file to the loaded data.
+        A not complete last line (Eg.: The application was killed during writing) and the not
+        valid lines are skipped.
+        :return: None
+        """
+
+        if not os.path.isfile(self.journal):
+            self.c_logger.info("There is no journal file: {}".format(self.journal))
+            return
+
+        journal_is_damaged = self._read_journal_tail()
+        self.c_logger.info("Replayed journal entries: {}".format(self._journal_entries))
+
+        # The damaged journal is compacted as well, otherwise the next appended record would be
+        # written into the same line as the not complete one.
+        if journal_is_damaged or self._journal_entries >= self.journal_compaction_limit:
+            self.compact()
+
+    def _read_journal_tail(self):
+        """
+        Apply the entries of the journal file after the already read offset.
+        The reading stops at a not complete last line (It may be being written).
+        :return: Bool. True if a not valid or not complete line has been found.
+        """
+
+        journal_is_damaged = False
+        with open(self.journal, "rb") as opened_file:
+            opened_file.seek(self._journal_offset)
+            for line in opened_file:
+                if not line.endswith(b"\n"):
+                    journal_is_damaged = True
+                    break
+                self._journal_offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    single_record = TimeRecord.from_dict(json_codec.loads(line))
+                except (KeyError, TypeError, ValueError) as parse_error:
+                    # Not valid Json or not valid record (Eg.: Missing key or "from": "25:00").
+                    self.c_logger.warning(
+                        "Skip not valid journal line: {} ERROR: {}".format(line, parse_error)
+                    )
+                    journal_is_damaged = True
+                    continue
+                self._index.upsert(single_record)
+                self._journal_entries += 1
+        return journal_is_damaged
+
+    def reload_if_changed(self):
+        """
+        Reload the data if the config file or the journal has been changed by another process
+        (Eg.: A sync job or another instance of the application).
+        Only the new entries are replayed if the journal has been appended.
+        :return: Bool. True if the data has been reloaded.
+        """
+
+        with self.file_lock:
+            if self._change_detector.has_changed(self.path):
+                self.c_logger.info("The config file has been changed. Starting to reload it.")
+                self._load()
+                return True
+
+            journal_size = os.path.getsize(self.journal) if os.path.isfile(self.journal) else 0
+            if journal_size < self._journal_offset:
+                self.c_logger.info("The journal has been truncated. Starting to reload the data.")
+                self._load()
+                return True
+            if journal_size == self._journal_offset:
+                return False
+
+            self.c_logger.info("The journal has been appended. Starting to replay the new entries.")
+            replayed_entries = self._journal_entries
+            journal_is_damaged = self._read_journal_tail()
+            is_changed = self._journal_entries != replayed_entries
+            if journal_is_damaged:
+                # The not valid lines are dropped by the compaction (See: _replay_journal).
+                self.compact()
+            return is_changed
+
+    def compact(self):
+        """
+        Write the complete data to the config file and truncate the journal.
+        The config file is replaced atomically and its previous version is kept as backup.
+        The journal is truncated only after the config file is safely on the disk (Replaying the
+        same journal again is harmless).
+        :return: None
+        """
+
+        with self.file_lock:
+            self.c_logger.info("Starting to compact the journal into the config file.")
+            json_data = [single_record.to_dict() for single_record in self._index.records()]
+            json_string = json_codec.dumps(json_data)
+            write_file_atomically(self.path, json_string, backup_path=self.backup)
+            self._change_detector.remember(self.path, content=json_string)
+            open(self.journal, "w").close()
+            self._journal_entries = 0
+            self._journal_offset = 0
+            self.c_logger.info("The journal has been compacted successfully.")
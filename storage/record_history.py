@@ -0,0 +1,217 @@
+"""
+This module contains the version history of the time records (Point-in-time reads).
+Every change is an entry of an append-only history file (One Json object per line). Eg.:
+    {"version": 12, "time": 1585555200.0, "previous": {"date": "2020.03.30.", ...},
+     "record": {"date": "2020.03.30.", "from": "08:00", "to": "17:25", "break": "00:22"}}
+The "previous" value is the record before the change (null if the day had no record).
+The versions of the changes are indexed per day so the state of a date range at a version is
+calculated from the current records and the changes of the days in the range only:
+the state of a day is the "previous" record of its first change after the requested version.
+"""
+
+import os
+import sys
+import time
+from bisect import bisect_left
+from bisect import bisect_right
+from bisect import insort
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, ".."))  # noqa: E402
+
+from color_logger import ColoredLogger
+from file_lock import FileLock
+from file_lock import get_lock_path
+import json_codec
+from time_record import TimeRecord
+
+# Name of the history file if the storage is a directory (Eg.: Monthly Json shards).
+HISTORY_FILE_NAME = "history.jsonl"
+
+
+def get_history_path(path):
+    """
+    Provide the path of the history file of a data file or a data directory.
+    :param path: Path of the data file or directory.
+    :return: Path of the history file.
+    """
+
+    if os.path.isdir(path):
+        return os.path.join(path, HISTORY_FILE_NAME)
+    return "{}.history".format(path)
+
+
+class RecordHistory(object):
+    """
+    This class contains the version history related attributes.
+    """
+
+    def __init__(self, path, c_logger=None):
+        """
+        Init method of the 'RecordHistory' class.
+        :param path: Path of the history file. It is created by the first change.
+        :param c_logger: Logger instance (ColoredLogger type is recommended).
+        """
+
+        self.path = path
+        self.c_logger = c_logger if c_logger else self.__set_up_default_logger()
+        # The history is appended by other processes as well (See: file_lock module).
+        self.file_lock = FileLock(get_lock_path(self.path), c_logger=self.c_logger)
+        # Creation times of the versions. The time of the version N is in the N-1 position.
+        # The list is kept non-decreasing (The clocks of the processes may differ).
+        self._times = []
+        # Structure: {737485: [3, 12, ...], ...} (Versions of the changes of the day)
+        self._versions_by_ordinal = {}
+        # Structure: {737485: [TimeRecord or None, ...], ...} (Parallel to the versions)
+        self._previous_by_ordinal = {}
+        # Sorted day ordinals which have been changed.
+        self._changed_ordinals = []
+        self._offset = 0
+        with self.file_lock:
+            self.reload_if_changed()
+        self.c_logger.info("Loaded versions of the history: {}".format(self.version))
+
+    @staticmethod
+    def __set_up_default_logger():
+        """
+        Set-up a default logger if it is not provided as parameter.
+        :return: Instance of ColoredLogger
+        """
+
+        # Set-up the main logger instance.
+        path_of_log_file = os.path.join(PATH_OF_FILE_DIR, "..", "logs", "storage.log")
+        return_logger = ColoredLogger(os.path.basename(__file__), log_file_path=path_of_log_file)
+        return_logger.info("Default logger has been set-up in record_history module.")
+
+        return return_logger
+
+    @property
+    def version(self):
+        """
+        The current (Latest) version. 0 if there is no change in the history.
+        """
+
+        return len(self._times)
+
+    def reload_if_changed(self):
+        """
+        Read the entries which have been appended since the last read (Eg.: By another process).
+        The reading stops at a not complete last line (It may be being written).
+        :return: Bool. True if new entries have been read.
+        """
+
+        if not os.path.isfile(self.path) or os.path.getsize(self.path) == self._offset:
+            return False
+
+        read_version = self.version
+        with open(self.path, "rb") as opened_file:
+            opened_file.seek(self._offset)
+            for line in opened_file:
+                if not line.endswith(b"\n"):
+                    break
+                self._offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    entry = json_codec.loads(line)
+                except ValueError as decode_error:
+                    self.c_logger.warning(
+                        "Skip not valid history line: {} ERROR: {}".format(line, decode_error)
+                    )
+                    continue
+                self.__add_entry(entry)
+        return self.version != read_version
+
+    def __add_entry(self, entry):
+        """
+        Add an entry of the history file to the version index.
+        :param entry: Structure: {"version": 12, "time": 1585555200.0, "previous": {...} or None,
+                      "record": {"date": "2020.03.30.", ...}}
+        :return: None
+        """
+
+        single_record = TimeRecord.from_dict(entry["record"])
+        previous_record = TimeRecord.from_dict(entry["previous"]) if entry["previous"] else None
+        self._times.append(max(entry["time"], self._times[-1]) if self._times else entry["time"])
+        if single_record.ordinal not in self._versions_by_ordinal:
+            self._versions_by_ordinal[single_record.ordinal] = []
+            self._previous_by_ordinal[single_record.ordinal] = []
+            insort(self._changed_ordinals, single_record.ordinal)
+        self._versions_by_ordinal[single_record.ordinal].append(self.version)
+        self._previous_by_ordinal[single_record.ordinal].append(previous_record)
+
+    def append(self, changes):
+        """
+        Append changes to the history as new versions (One version per change).
+        The entries are written and flushed to the disk at once.
+        :param changes: Iterable of tuples: (previous TimeRecord or None, new TimeRecord)
+        :return: The latest version after the changes.
+        """
+
+        with self.file_lock:
+            self.reload_if_changed()
+            change_time = time.time()
+            entries = [
+                {
+                    "version": self.version + position,
+                    "time": change_time,
+                    "previous": previous_record.to_dict() if previous_record else None,
+                    "record": single_record.to_dict(),
+                }
+                for position, (previous_record, single_record) in enumerate(changes, 1)
+            ]
+            if not entries:
+                return self.version
+
+            history_content = "".join(json_codec.dumps(entry) + "\n" for entry in entries)
+            with open(self.path, "ab") as opened_file:
+                # A not complete last line (Eg.: The application was killed during writing) is
+                # closed so it doesn't damage the new entries.
+                if opened_file.tell() != self._offset:
+                    history_content = "\n" + history_content
+                opened_file.write(history_content.encode("utf-8"))
+                opened_file.flush()
+                os.fsync(opened_file.fileno())
+            # The new entries are read back with the not yet read entries of other processes.
+            self.reload_if_changed()
+            self.c_logger.debug("New version of the history: {}".format(self.version))
+            return self.version
+
+    def get_version_at(self, timestamp):
+        """
+        Provide the latest version which had been created at the given time.
+        :param timestamp: POSIX timestamp.
+        :return: Version. 0 if there was no change before the time.
+        """
+
+        return bisect_right(self._times, timestamp)
+
+    def get_range_at(self, records, start_ordinal, end_ordinal, version):
+        """
+        Provide the records of a date range at a version.
+        Only the changes of the days in the range are used.
+        :param records: The current records in the range. Iterable of TimeRecord
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :param version: The requested version.
+        :return: Records ordered by date. Type: list of TimeRecord
+        """
+
+        records_by_ordinal = {single_record.ordinal: single_record for single_record in records}
+        first_position = bisect_left(self._changed_ordinals, start_ordinal)
+        last_position = bisect_right(self._changed_ordinals, end_ordinal)
+        for ordinal in self._changed_ordinals[first_position:last_position]:
+            versions = self._versions_by_ordinal[ordinal]
+            position = bisect_right(versions, version)
+            if position == len(versions):
+                # The day has not been changed since the version.
+                continue
+            previous_record = self._previous_by_ordinal[ordinal][position]
+            if previous_record is None:
+                records_by_ordinal.pop(ordinal, None)
+            else:
+                records_by_ordinal[ordinal] = previous_record
+        return [records_by_ordinal[ordinal] for ordinal in sorted(records_by_ordinal)]
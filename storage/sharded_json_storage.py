@@ -0,0 +1,304 @@
+"""
+This module contains the month-sharded Json storage of the time data.
+The records are stored in one Json file per month in a directory. Eg.:
+    conf/data/2020-03.json
+    conf/data/2020-04.json
+Only the shards which overlap a requested range are loaded (And cached) and a change rewrites
+only the shard of its month.
+A one-shot migration from the Json config file is available:
+    python3 storage/sharded_json_storage.py --json conf/time_data.json --dir conf/data
+"""
+
+import os
+import sys
+from datetime import date as datetime_date
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, ".."))  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, "..", "tools"))  # noqa: E402
+
+from base_storage import BaseStorage
+from change_detector import FileChangeDetector
+from file_lock import FileLock
+from file_lock import get_lock_path
+from helper_functions import write_file_atomically
+import json_codec
+from json_storage import JsonStorage
+from time_record import TimeRecord
+
+SHARD_FILE_NAME_FORMAT = "{:04d}-{:02d}.json"
+
+
+def ordinal_to_month(ordinal):
+    """
+    Provide the month (Shard key) of a day ordinal.
+    :param ordinal: Day ordinal of the date.
+    :return: Tuple: (year, month)
+    """
+
+    day = datetime_date.fromordinal(ordinal)
+    return day.year, day.month
+
+
+class ShardedJsonStorage(BaseStorage):
+    """
+    This class contains the month-sharded Json storage related attributes.
+    """
+
+    def __init__(self, path, c_logger=None):
+        """
+        Init method of the 'ShardedJsonStorage' class.
+        The shards are not parsed here, only the names of the shard files are collected.
+        :param path: Path of the directory of the shards. It is created if it doesn't exist.
+        :param c_logger: Logger instance (ColoredLogger type is recommended).
+        """
+
+        super(ShardedJsonStorage, self).__init__(path, c_logger=c_logger)
+        if not os.path.isdir(self.path):
+            self.c_logger.warning("The '{}' shard directory doesn't exist.".format(self.path))
+            os.makedirs(self.path, exist_ok=True)
+
+        # The months which have shard file. Structure: {(2020, 3), (2020, 4), ...}
+        self._available_months = self._scan_months()
+        self.c_logger.info("Number of available shards: {}".format(len(self._available_months)))
+
+        # The loaded shards. Structure: {(2020, 3): {737485: TimeRecord, ...}, ...}
+        self._loaded_shards = {}
+        self._change_detector = FileChangeDetector()
+        self.file_lock = FileLock(get_lock_path(self.path), c_logger=self.c_logger)
+
+    def _scan_months(self):
+        """
+        Collect the months which have shard file.
+        :return: Set of months. Structure: {(2020, 3), (2020, 4), ...}
+        """
+
+        available_months = set()
+        for file_name in os.listdir(self.path):
+            month = self.__file_name_to_month(file_name)
+            if month:
+                available_months.add(month)
+        return available_months
+
+    @staticmethod
+    def __file_name_to_month(file_name):
+        """
+        Provide the month of a shard file name.
+        :param file_name: Name of the file. Eg.: 2020-03.json
+        :return: Tuple: (year, month) or None if it is not a shard file.
+        """
+
+        name, extension = os.path.splitext(file_name)
+        year, _, month = name.partition("-")
+        if extension != ".json" or not year.isdigit() or not month.isdigit():
+            return None
+        return int(year), int(month)
+
+    @classmethod
+    def get_data_files(cls, path):
+        return sorted(
+            os.path.join(path, file_name)
+            for file_name in os.listdir(path)
+            if cls.__file_name_to_month(file_name)
+        )
+
+    def _shard_path(self, month):
+        """
+        Provide the path of the shard file of a month.
+        :param month: Tuple: (year, month)
+        :return: Path of the shard file.
+        """
+
+        return os.path.join(self.path, SHARD_FILE_NAME_FORMAT.format(*month))
+
+    def _get_shard(self, month):
+        """
+        Provide the records of a month. The shard file is loaded at the first access.
+        :param month: Tuple: (year, month)
+        :return: Structure: {737485: TimeRecord, ...}
+        """
+
+        if month in self._loaded_shards:
+            return self._loaded_shards[month]
+
+        shard = {}
+        if month in self._available_months:
+            shard_path = self._shard_path(month)
+            self.c_logger.info("Starting to load shard: {}".format(shard_path))
+            self._change_detector.remember(shard_path)
+            with open(shard_path, "r") as opened_file:
+                for single_dict in json_codec.loads(opened_file.read()):
+                    single_record = TimeRecord.from_dict(single_dict)
+                    shard[single_record.ordinal] = single_record
+        self._loaded_shards[month] = shard
+        return shard
+
+    def _write_shard(self, month):
+        """
+        Write the records of a month into its shard file (Atomically).
+        :param month: Tuple: (year, month)
+        :return: None
+        """
+
+        shard = self._loaded_shards[month]
+        json_data = [shard[ordinal].to_dict() for ordinal in sorted(shard)]
+        shard_path = self._shard_path(month)
+        self.c_logger.info("Starting to write shard: {}".format(shard_path))
+        json_string = json_codec.dumps(json_data)
+        write_file_atomically(shard_path, json_string)
+        self._change_detector.remember(shard_path, content=json_string)
+        self._available_months.add(month)
+
+    def _months_in_range(self, start_ordinal, end_ordinal):
+        """
+        Provide the available months (Shard keys) which overlap the range.
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :return: Sorted list of months.
+        """
+
+        first_month = ordinal_to_month(start_ordinal)
+        last_month = ordinal_to_month(end_ordinal)
+        return sorted(
+            month for month in self._available_months if first_month <= month <= last_month
+        )
+
+    def __len__(self):
+        return sum(len(self._get_shard(month)) for month in self._available_months)
+
+    def get(self, ordinal):
+        month = ordinal_to_month(ordinal)
+        if month not in self._available_months:
+            return None
+        return self._get_shard(month).get(ordinal)
+
+    def get_range(self, start_ordinal, end_ordinal):
+        return_list = []
+        for month in self._months_in_range(start_ordinal, end_ordinal):
+            shard = self._get_shard(month)
+            return_list.extend(
+                shard[ordinal]
+                for ordinal in sorted(shard)
+                if start_ordinal <= ordinal <= end_ordinal
+            )
+        return return_list
+
+    def ordinals(self):
+        return [single_record.ordinal for single_record in self.records()]
+
+    def records(self):
+        for month in sorted(self._available_months):
+            shard = self._get_shard(month)
+            for ordinal in sorted(shard):
+                yield shard[ordinal]
+
+    def upsert(self, single_record):
+        """
+        Insert or update a record. Only the shard of the record is rewritten.
+        The changed shards are loaded again first under the lock (Read-modify-write) so the
+        records of other processes are kept.
+        :param single_record: The new record. Type: TimeRecord
+        :return: The previous record of the day or None.
+        """
+
+        with self.file_lock:
+            self.reload_if_changed()
+            month = ordinal_to_month(single_record.ordinal)
+            shard = self._get_shard(month)
+            previous_record = shard.get(single_record.ordinal)
+            shard[single_record.ordinal] = single_record
+            self._write_shard(month)
+            return previous_record
+
+    def upsert_many(self, records):
+        """
+        Insert or update several records. Every touched shard is rewritten once.
+        :param records: Iterable of TimeRecord.
+        :return: The previous records of the days (Or None) in the order of the records.
+        """
+
+        with self.file_lock:
+            self.reload_if_changed()
+            previous_records = []
+            changed_months = set()
+            for single_record in records:
+                month = ordinal_to_month(single_record.ordinal)
+                shard = self._get_shard(month)
+                previous_records.append(shard.get(single_record.ordinal))
+                shard[single_record.ordinal] = single_record
+                changed_months.add(month)
+            for month in sorted(changed_months):
+                self._write_shard(month)
+            return previous_records
+
+    def reload_if_changed(self):
+        """
+        Drop the changed (Or removed) shards from the cache. They are loaded again when they are
+        accessed. The new shard files are detected as well.
+        :return: Bool. True if a shard has been changed.
+        """
+
+        available_months = self._scan_months()
+        changed_months = [
+            month
+            for month in self._loaded_shards
+            if month not in available_months
+            or self._change_detector.has_changed(self._shard_path(month))
+        ]
+        for month in changed_months:
+            self.c_logger.info("The shard has been changed: {}".format(self._shard_path(month)))
+            del self._loaded_shards[month]
+            self._change_detector.forget(self._shard_path(month))
+
+        is_changed = bool(changed_months) or available_months != self._available_months
+        self._available_months = available_months
+        return is_changed
+
+    def migrate_from_json(self, json_path):
+        """
+        Copy the records of a Json config file (Snapshot and journal) into the shards.
+        The existing records of the same dates are overwritten. Every shard is written once.
+        :param json_path: Path of the Json config file.
+        :return: Number of migrated records.
+        """
+
+        with self.file_lock:
+            self.reload_if_changed()
+            self.c_logger.info("Starting to migrate the '{}' Json config file.".format(json_path))
+            json_storage = JsonStorage(json_path, c_logger=self.c_logger)
+            changed_months = set()
+            for single_record in json_storage.records():
+                month = ordinal_to_month(single_record.ordinal)
+                self._get_shard(month)[single_record.ordinal] = single_record
+                changed_months.add(month)
+            for month in changed_months:
+                self._write_shard(month)
+            self.c_logger.info("Migrated records: {}".format(len(json_storage)))
+            return len(json_storage)
+
+
+####
+# ENTRY POINT
+####
+
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrate a Json config file into shards.")
+
+    parser.add_argument(
+        "--json", dest="json_path", required=True, help="Path of the Json config file."
+    )
+    parser.add_argument(
+        "--dir", dest="shard_dir", required=True, help="Path of the directory of the shards."
+    )
+
+    args = parser.parse_args()
+
+    sharded_storage = ShardedJsonStorage(args.shard_dir)
+    print("Migrated records: {}".format(sharded_storage.migrate_from_json(args.json_path)))
@@ -0,0 +1,208 @@
+"""
+This module contains the SQLite storage of the time data.
+The records are stored in a table which is indexed by the day ordinal (Primary key) so the
+start-up doesn't load anything and the lookups/range queries are answered by SQL.
+A one-shot migration from the Json config file is available:
+    python3 storage/sqlite_storage.py --json conf/time_data.json --db conf/time_data.db
+"""
+
+import os
+import sqlite3
+import sys
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, ".."))  # noqa: E402
+
+from base_storage import BaseStorage
+from file_lock import LOCK_TIMEOUT
+from json_storage import JsonStorage
+from time_record import TimeRecord
+
+CREATE_TABLE_QUERY = (
+    "CREATE TABLE IF NOT EXISTS time_records ("
+    "ordinal INTEGER PRIMARY KEY, "
+    "arriving INTEGER NOT NULL, "
+    "leaving INTEGER NOT NULL, "
+    "break_time INTEGER NOT NULL)"
+)
+# The table has only the primary key and the values so "INSERT OR REPLACE" is an upsert.
+UPSERT_QUERY = (
+    "INSERT OR REPLACE INTO time_records (ordinal, arriving, leaving, break_time) "
+    "VALUES (?, ?, ?, ?)"
+)
+SELECT_COLUMNS = "SELECT ordinal, arriving, leaving, break_time FROM time_records"
+
+
+class SqliteStorage(BaseStorage):
+    """
+    This class contains the SQLite storage related attributes.
+    """
+
+    def __init__(self, path, c_logger=None):
+        """
+        Init method of the 'SqliteStorage' class.
+        :param path: Path of the SQLite database file. It is created if it doesn't exist.
+        :param c_logger: Logger instance (ColoredLogger type is recommended).
+        """
+
+        super(SqliteStorage, self).__init__(path, c_logger=c_logger)
+        self.c_logger.info("Starting to open the SQLite database: {}".format(self.path))
+        # SQLite locks the database itself, the writers wait for each other until the timeout.
+        # The connection can be used from another thread (Eg.: Write-behind flushing) but the
+        # accesses have to be serialized by the caller.
+        self.connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(CREATE_TABLE_QUERY)
+        self._data_version = self.__get_data_version()
+        self.c_logger.info("The SQLite database has been opened successfully.")
+
+    def __get_data_version(self):
+        """
+        Provide the data version of the database. It is changed when another connection commits.
+        :return: INT
+        """
+
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM time_records").fetchone()[0]
+
+    def get(self, ordinal):
+        row = self.connection.execute(
+            "{} WHERE ordinal = ?".format(SELECT_COLUMNS), (ordinal,)
+        ).fetchone()
+        return TimeRecord(*row) if row else None
+
+    def get_range(self, start_ordinal, end_ordinal):
+        return [
+            TimeRecord(*row)
+            for row in self.connection.execute(
+                "{} WHERE ordinal BETWEEN ? AND ? ORDER BY ordinal".format(SELECT_COLUMNS),
+                (start_ordinal, end_ordinal),
+            )
+        ]
+
+    def ordinals(self):
+        return [
+            row[0]
+            for row in self.connection.execute("SELECT ordinal FROM time_records ORDER BY ordinal")
+        ]
+
+    def records(self):
+        return (
+            TimeRecord(*row)
+            for row in self.connection.execute("{} ORDER BY ordinal".format(SELECT_COLUMNS))
+        )
+
+    def get_columns(self, start_ordinal=None, end_ordinal=None):
+        if start_ordinal is None or end_ordinal is None:
+            rows = self.connection.execute("{} ORDER BY ordinal".format(SELECT_COLUMNS)).fetchall()
+        else:
+            rows = self.connection.execute(
+                "{} WHERE ordinal BETWEEN ? AND ? ORDER BY ordinal".format(SELECT_COLUMNS),
+                (start_ordinal, end_ordinal),
+            ).fetchall()
+        if not rows:
+            return [], [], [], []
+        return tuple(list(column) for column in zip(*rows))
+
+    def get_effective_minutes(self, start_ordinal=None, end_ordinal=None):
+        if start_ordinal is None or end_ordinal is None:
+            cursor = self.connection.execute(
+                "SELECT leaving - arriving FROM time_records ORDER BY ordinal"
+            )
+        else:
+            cursor = self.connection.execute(
+                "SELECT leaving - arriving FROM time_records "
+                "WHERE ordinal BETWEEN ? AND ? ORDER BY ordinal",
+                (start_ordinal, end_ordinal),
+            )
+        return [row[0] for row in cursor]
+
+    def upsert(self, single_record):
+        """
+        Insert or update a record in one transaction.
+        :param single_record: The new record. Type: TimeRecord
+        :return: The previous record of the day or None.
+        """
+
+        with self.connection:
+            previous_record = self.get(single_record.ordinal)
+            self.connection.execute(UPSERT_QUERY, single_record.as_tuple())
+        return previous_record
+
+    def upsert_many(self, records):
+        """
+        Insert or update several records in one transaction.
+        :param records: Iterable of TimeRecord.
+        :return: The previous records of the days (Or None) in the order of the records.
+        """
+
+        records = list(records)
+        with self.connection:
+            previous_records = [self.get(single_record.ordinal) for single_record in records]
+            self.connection.executemany(
+                UPSERT_QUERY, (single_record.as_tuple() for single_record in records)
+            )
+        return previous_records
+
+    def reload_if_changed(self):
+        """
+        Check if another connection has changed the database. The queries always read the
+        database so nothing has to be reloaded.
+        :return: Bool. True if the database has been changed.
+        """
+
+        data_version = self.__get_data_version()
+        is_changed = data_version != self._data_version
+        self._data_version = data_version
+        return is_changed
+
+    def migrate_from_json(self, json_path):
+        """
+        Copy the records of a Json config file (Snapshot and journal) into the database.
+        The existing records of the same dates are overwritten.
+        :param json_path: Path of the Json config file.
+        :return: Number of migrated records.
+        """
+
+        self.c_logger.info("Starting to migrate the '{}' Json config file.".format(json_path))
+        json_storage = JsonStorage(json_path, c_logger=self.c_logger)
+        with self.connection:
+            self.connection.executemany(
+                UPSERT_QUERY, (single_record.as_tuple() for single_record in json_storage.records())
+            )
+        self.c_logger.info("Migrated records: {}".format(len(json_storage)))
+        return len(json_storage)
+
+    def close(self):
+        self.c_logger.info("Closing the SQLite database: {}".format(self.path))
+        self.connection.close()
+
+
+####
+# ENTRY POINT
+####
+
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrate a Json config file into SQLite.")
+
+    parser.add_argument(
+        "--json", dest="json_path", required=True, help="Path of the Json config file."
+    )
+    parser.add_argument(
+        "--db", dest="db_path", required=True, help="Path of the SQLite database file."
+    )
+
+    args = parser.parse_args()
+
+    sqlite_storage = SqliteStorage(args.db_path)
+    print("Migrated records: {}".format(sqlite_storage.migrate_from_json(args.json_path)))
+    sqlite_storage.close()
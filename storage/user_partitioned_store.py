@@ -0,0 +1,430 @@
+"""
+This module contains the user-partitioned store of the time data (Whole department).
+Every user has an own partition in a directory and the records of all users are mirrored into
+a shared SQLite index. Eg.:
+    conf/users/42.json
+    conf/users/43.json
+    conf/users/index.sqlite
+The per-user operations use the partition of the user (The same storages as in the single-user
+case, the writes update the index rows of the changed days as well) and the team-wide queries are
+answered by the shared index without opening the partitions.
+The index is derived data. The version of the partition (Signature of its files, see:
+BaseStorage.get_version) is stored with the index rows in the same transaction, so a partition
+which has been changed without the index (Eg.: Crash between the two writes or a write of a
+single-user DataProcessor) is rebuilt when the index is opened or refreshed.
+A one-shot migration of a single-user Json config file into a partition is available:
+    python3 storage/user_partitioned_store.py --json conf/time_data.json --dir conf/users --user 42
+"""
+
+import os
+import re
+import sqlite3
+import sys
+from contextlib import nullcontext
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, ".."))  # noqa: E402
+
+from base_storage import BaseStorage
+from binary_storage import BinaryStorage
+from change_detector import get_files_signature
+from color_logger import ColoredLogger
+from file_lock import LOCK_TIMEOUT
+from json_storage import JsonStorage
+from sqlite_storage import SqliteStorage
+from time_record import TimeRecord
+
+INDEX_FILE_NAME = "index.sqlite"
+# The storage of the partitions is selected based on this extension.
+PARTITION_STORAGES = {".json": JsonStorage, ".db": SqliteStorage, ".bin": BinaryStorage}
+# The user IDs are used as file names.
+USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+CREATE_TABLES_QUERIES = (
+    "CREATE TABLE IF NOT EXISTS time_records ("
+    "user_id TEXT NOT NULL, "
+    "ordinal INTEGER NOT NULL, "
+    "arriving INTEGER NOT NULL, "
+    "leaving INTEGER NOT NULL, "
+    "break_time INTEGER NOT NULL, "
+    "PRIMARY KEY (user_id, ordinal))",
+    # The team-wide queries select date ranges of all users.
+    "CREATE INDEX IF NOT EXISTS time_records_ordinal ON time_records (ordinal)",
+    # The version is the version of the partition which the index rows belong to.
+    "CREATE TABLE IF NOT EXISTS partitions (user_id TEXT PRIMARY KEY, version TEXT)",
+)
+UPSERT_QUERY = (
+    "INSERT OR REPLACE INTO time_records (user_id, ordinal, arriving, leaving, break_time) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+SET_VERSION_QUERY = "INSERT OR REPLACE INTO partitions (user_id, version) VALUES (?, ?)"
+
+
+class UserPartition(BaseStorage):
+    """
+    This class contains the partition of a user. It wraps the storage of the partition and
+    mirrors the writes into the shared index.
+    """
+
+    def __init__(self, store, user_id, storage):
+        """
+        Init method of the 'UserPartition' class.
+        :param store: The store of the partition (Instance of UserPartitionedStore).
+        :param user_id: ID of the user.
+        :param storage: Storage of the partition (Instance of BaseStorage).
+        """
+
+        super(UserPartition, self).__init__(storage.path, c_logger=store.c_logger)
+        self.store = store
+        self.user_id = user_id
+        self.storage = storage
+        self.file_lock = storage.file_lock
+
+    def __len__(self):
+        return len(self.storage)
+
+    def get(self, ordinal):
+        return self.storage.get(ordinal)
+
+    def get_range(self, start_ordinal, end_ordinal):
+        return self.storage.get_range(start_ordinal, end_ordinal)
+
+    def ordinals(self):
+        return self.storage.ordinals()
+
+    def records(self):
+        return self.storage.records()
+
+    def get_columns(self, start_ordinal=None, end_ordinal=None):
+        return self.storage.get_columns(start_ordinal, end_ordinal)
+
+    def get_effective_minutes(self, start_ordinal=None, end_ordinal=None):
+        return self.storage.get_effective_minutes(start_ordinal, end_ordinal)
+
+    def upsert(self, single_record):
+        """
+        Insert or update a record in the partition and in the shared index.
+        :param single_record: The new record. Type: TimeRecord
+        :return: The previous record of the day or None.
+        """
+
+        return self.upsert_many([single_record])[0]
+
+    def upsert_many(self, records):
+        """
+        Insert or update several records in the partition and in the shared index.
+        The lock of the partition is held so the version of the index belongs to the written
+        partition. If the partition has been changed without the index before the writing, the
+        index of the user is rebuilt instead of updating the changed days.
+        :param records: Iterable of TimeRecord.
+        :return: The previous records of the days (Or None) in the order of the records.
+        """
+
+        records = list(records)
+        with self.file_lock if self.file_lock is not None else nullcontext():
+            is_indexed = self.store.is_indexed(self.user_id)
+            previous_records = self.storage.upsert_many(records)
+            if is_indexed:
+                self.store.index_records(self.user_id, records, self.storage.get_version())
+            else:
+                self.store.rebuild_index(self.user_id)
+        return previous_records
+
+    @property
+    def lock_metrics(self):
+        return self.storage.lock_metrics
+
+    def get_version(self):
+        return self.storage.get_version()
+
+    def reload_if_changed(self):
+        return self.storage.reload_if_changed()
+
+    def flush(self):
+        self.storage.flush()
+
+    def close(self):
+        self.storage.close()
+
+
+class UserPartitionedStore(object):
+    """
+    This class contains the user-partitioned store related attributes.
+    """
+
+    def __init__(self, path, c_logger=None, partition_extension=".json"):
+        """
+        Init method of the 'UserPartitionedStore' class.
+        The partitions are opened when they are used first.
+        :param path: Path of the directory of the partitions. It is created if it doesn't exist.
+        :param c_logger: Logger instance (ColoredLogger type is recommended).
+        :param partition_extension: Extension of the partition files (See: PARTITION_STORAGES).
+        """
+
+        self.path = path
+        self.c_logger = c_logger if c_logger else self.__set_up_default_logger()
+        if partition_extension not in PARTITION_STORAGES:
+            raise Exception("Not supported partition type: {}".format(partition_extension))
+        self.partition_extension = partition_extension
+        os.makedirs(self.path, exist_ok=True)
+        # Structure: {"42": UserPartition, ...}
+        self._partitions = {}
+
+        self.c_logger.info("Starting to open the shared index of the store: {}".format(self.path))
+        # The connection can be used from another thread (Eg.: Write-behind flushing).
+        self.connection = sqlite3.connect(
+            os.path.join(self.path, INDEX_FILE_NAME),
+            timeout=LOCK_TIMEOUT,
+            check_same_thread=False,
+        )
+        # The index is not synced to the disk by every commit (The per-user writes stay fast).
+        # In WAL mode a crash can lose only the last commits and not the consistency of the
+        # index, the partitions of the lost commits have old version so they are rebuilt.
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        with self.connection:
+            for query in CREATE_TABLES_QUERIES:
+                self.connection.execute(query)
+            partition_columns = [
+                row[1] for row in self.connection.execute("PRAGMA table_info(partitions)")
+            ]
+            if "version" not in partition_columns:
+                # The index of the first version didn't store the version of the partitions.
+                self.connection.execute("ALTER TABLE partitions ADD COLUMN version TEXT")
+
+        self.refresh_index()
+        self.c_logger.info("The store has been opened successfully.")
+
+    @staticmethod
+    def __set_up_default_logger():
+        """
+        Set-up a default logger if it is not provided as parameter.
+        :return: Instance of ColoredLogger
+        """
+
+        # Set-up the main logger instance.
+        path_of_log_file = os.path.join(PATH_OF_FILE_DIR, "..", "logs", "storage.log")
+        return_logger = ColoredLogger(os.path.basename(__file__), log_file_path=path_of_log_file)
+        return_logger.info("Default logger has been set-up in user_partitioned_store module.")
+
+        return return_logger
+
+    def user_ids(self):
+        """
+        Provide the IDs of the users who have partition.
+        :return: Sorted list of user IDs.
+        """
+
+        return sorted(
+            file_name[: -len(self.partition_extension)]
+            for file_name in os.listdir(self.path)
+            if file_name.endswith(self.partition_extension) and file_name != INDEX_FILE_NAME
+        )
+
+    def get_partition(self, user_id):
+        """
+        Provide the partition of a user. It is created if it doesn't exist.
+        Usage:
+            DataProcessor(storage=store.get_partition("42"))
+        :param user_id: ID of the user.
+        :return: Instance of UserPartition.
+        """
+
+        user_id = str(user_id)
+        if user_id not in self._partitions:
+            if not USER_ID_PATTERN.match(user_id):
+                raise Exception("Not valid user ID: {}".format(user_id))
+            self.c_logger.info("Starting to open the partition of the user: {}".format(user_id))
+            partition_path = os.path.join(self.path, user_id + self.partition_extension)
+            if self.partition_extension == ".json" and not os.path.isfile(partition_path):
+                with open(partition_path, "w") as opened_file:
+                    opened_file.write("[]")
+            storage = PARTITION_STORAGES[self.partition_extension](
+                partition_path, c_logger=self.c_logger
+            )
+            self._partitions[user_id] = UserPartition(self, user_id, storage)
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO partitions (user_id) VALUES (?)", (user_id,)
+                )
+        return self._partitions[user_id]
+
+    def get_partition_version(self, user_id):
+        """
+        Provide the version of the partition of a user from its files (It is not opened).
+        :param user_id: ID of the user.
+        :return: Version as a string (See: BaseStorage.get_version).
+        """
+
+        partition_path = os.path.join(self.path, str(user_id) + self.partition_extension)
+        return get_files_signature(
+            PARTITION_STORAGES[self.partition_extension].get_data_files(partition_path)
+        )
+
+    def is_indexed(self, user_id):
+        """
+        Check if the index rows of a user belong to the current version of the partition.
+        :param user_id: ID of the user.
+        :return: Bool. True if the index of the user is up to date.
+        """
+
+        row = self.connection.execute(
+            "SELECT version FROM partitions WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        return row is not None and row[0] == self.get_partition_version(user_id)
+
+    def refresh_index(self, user_ids=None):
+        """
+        Rebuild the index of the users whose partition has been changed without the index
+        (Eg.: Crash between the writes or a write of a single-user DataProcessor). Only the
+        files of the partitions are checked (stat calls), they are opened only for rebuilding.
+        :param user_ids: IDs of the checked users. All users are checked if it is None.
+        :return: List of the IDs of the rebuilt users.
+        """
+
+        checked_user_ids = self.user_ids()
+        if user_ids is not None:
+            requested_user_ids = {str(user_id) for user_id in user_ids}
+            checked_user_ids = [
+                user_id for user_id in checked_user_ids if user_id in requested_user_ids
+            ]
+        rebuilt_user_ids = [
+            user_id for user_id in checked_user_ids if not self.is_indexed(user_id)
+        ]
+        for user_id in rebuilt_user_ids:
+            self.rebuild_index(user_id)
+        return rebuilt_user_ids
+
+    def index_records(self, user_id, records, version):
+        """
+        Write records of a user into the shared index.
+        :param user_id: ID of the user.
+        :param records: Iterable of TimeRecord.
+        :param version: Version of the partition after the records have been written.
+        :return: None
+        """
+
+        with self.connection:
+            self.connection.executemany(
+                UPSERT_QUERY,
+                ((user_id,) + single_record.as_tuple() for single_record in records),
+            )
+            self.connection.execute(SET_VERSION_QUERY, (user_id, version))
+
+    def rebuild_index(self, user_id):
+        """
+        Rebuild the index rows of a user from the partition (Eg.: The partition has been copied
+        into the directory or it has been changed by a single-user DataProcessor).
+        :param user_id: ID of the user.
+        :return: Number of the indexed records.
+        """
+
+        self.c_logger.info("Starting to rebuild the index of the user: {}".format(user_id))
+        partition = self.get_partition(user_id)
+        with partition.file_lock if partition.file_lock is not None else nullcontext():
+            partition.reload_if_changed()
+            with self.connection:
+                self.connection.execute("DELETE FROM time_records WHERE user_id = ?", (user_id,))
+                self.connection.executemany(
+                    UPSERT_QUERY,
+                    (
+                        (user_id,) + single_record.as_tuple()
+                        for single_record in partition.records()
+                    ),
+                )
+                self.connection.execute(SET_VERSION_QUERY, (user_id, partition.get_version()))
+        number_of_records = self.connection.execute(
+            "SELECT COUNT(*) FROM time_records WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+        self.c_logger.info("Indexed records: {}".format(number_of_records))
+        return number_of_records
+
+    def get_team_range(self, start_ordinal, end_ordinal, user_ids=None):
+        """
+        Provide the records of the users between the start and end ordinals (Both are included).
+        The records are read from the shared index with one query.
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :param user_ids: IDs of the requested users. All users are provided if it is None.
+        :return: Structure: {"42": [TimeRecord, ...], ...} (The records are ordered by date)
+        """
+
+        cursor = self.connection.execute(
+            "SELECT user_id, ordinal, arriving, leaving, break_time FROM time_records "
+            "WHERE ordinal BETWEEN ? AND ? ORDER BY user_id, ordinal",
+            (start_ordinal, end_ordinal),
+        )
+        requested_user_ids = None if user_ids is None else {str(user_id) for user_id in user_ids}
+        team_records = {}
+        for row in cursor:
+            if requested_user_ids is not None and row[0] not in requested_user_ids:
+                continue
+            team_records.setdefault(row[0], []).append(TimeRecord(*row[1:]))
+        return team_records
+
+    def iter_team_times(self, start_ordinal, end_ordinal, user_ids=None):
+        """
+        Iterate over the arriving and leaving times of the worked days of the users between the
+        start and end ordinals (Both are included). The rows are streamed from the shared index
+        so the records are not collected in memory (Eg.: Team-wide multi-year statistics).
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :param user_ids: IDs of the requested users. All users are provided if it is None.
+        :return: Generator of tuples: (arriving, leaving)
+        """
+
+        cursor = self.connection.execute(
+            "SELECT user_id, arriving, leaving FROM time_records "
+            "WHERE ordinal BETWEEN ? AND ? AND arriving != 0 AND leaving != 0",
+            (start_ordinal, end_ordinal),
+        )
+        requested_user_ids = None if user_ids is None else {str(user_id) for user_id in user_ids}
+        for row in cursor:
+            if requested_user_ids is not None and row[0] not in requested_user_ids:
+                continue
+            yield row[1], row[2]
+
+    def close(self):
+        """
+        Close the opened partitions and the shared index.
+        :return: None
+        """
+
+        for partition in self._partitions.values():
+            partition.close()
+        self._partitions = {}
+        self.c_logger.info("Closing the shared index of the store: {}".format(self.path))
+        self.connection.close()
+
+
+####
+# ENTRY POINT
+####
+
+
+if __name__ == "__main__":
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Migrate a single-user Json config file into a user partition."
+    )
+
+    parser.add_argument(
+        "--json", dest="json_path", required=True, help="Path of the Json config file."
+    )
+    parser.add_argument(
+        "--dir", dest="dir_path", required=True, help="Path of the directory of the partitions."
+    )
+    parser.add_argument("--user", dest="user_id", required=True, help="ID of the user.")
+
+    args = parser.parse_args()
+
+    user_partitioned_store = UserPartitionedStore(args.dir_path)
+    json_storage = JsonStorage(args.json_path, c_logger=user_partitioned_store.c_logger)
+    user_partitioned_store.get_partition(args.user_id).upsert_many(json_storage.records())
+    print("Migrated records: {}".format(len(json_storage)))
+    user_partitioned_store.close()
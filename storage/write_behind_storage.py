@@ -0,0 +1,212 @@
+"""
+This module contains the write-behind wrapper of the storages.
+The changes are collected in the memory and they are written into the wrapped storage in one
+batch (upsert_many) in a background thread after a debounce delay (Every new change restarts the
+delay), or when 'flush' is called. The reads see the not yet written changes as well.
+"""
+
+import os
+import sys
+import threading
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, ".."))  # noqa: E402
+
+from base_storage import BaseStorage
+
+# The changes are written after this delay (Seconds) since the last change.
+WRITE_BEHIND_DELAY = 2.0
+
+
+class WriteBehindStorage(BaseStorage):
+    """
+    This class contains the write-behind wrapper related attributes.
+    """
+
+    def __init__(self, storage, c_logger=None, delay=WRITE_BEHIND_DELAY, writer=None):
+        """
+        Init method of the 'WriteBehindStorage' class.
+        :param storage: The wrapped storage (Instance of BaseStorage).
+        :param c_logger: Logger instance (ColoredLogger type is recommended).
+        :param delay: The changes are written after this delay (Seconds) since the last change.
+        :param writer: Function which writes the collected records into the wrapped storage
+                       (Eg.: It records the version history in the same step). Parameters:
+                       (list of TimeRecord). The 'upsert_many' of the wrapped storage is used if
+                       it is not set.
+        """
+
+        super(WriteBehindStorage, self).__init__(storage.path, c_logger=c_logger)
+        self.storage = storage
+        # The lock of the wrapped storage is used by the callers which update derived data
+        # (Eg.: DataProcessor) together with the changes. A storage without file lock is
+        # guarded by a thread lock (The flushing thread writes it as well).
+        self.file_lock = storage.file_lock if storage.file_lock is not None else threading.RLock()
+        self.delay = delay
+        self.writer = writer if writer is not None else storage.upsert_many
+        # The not yet written records. Structure: {737485: TimeRecord, ...}
+        self._pending_records = {}
+        self._timer = None
+        # The wrapped storage is used by the flushing thread as well. The lock of the wrapped
+        # storage is always acquired before this lock (Eg.: The writer and the callers acquire
+        # it as well).
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self.storage) + sum(
+                1 for ordinal in self._pending_records if self.storage.get(ordinal) is None
+            )
+
+    def get(self, ordinal):
+        with self._lock:
+            if ordinal in self._pending_records:
+                return self._pending_records[ordinal]
+            return self.storage.get(ordinal)
+
+    def get_range(self, start_ordinal, end_ordinal):
+        with self._lock:
+            records = self.storage.get_range(start_ordinal, end_ordinal)
+            if not self._pending_records:
+                return records
+            return self.__merge_pending(
+                records,
+                (
+                    single_record
+                    for ordinal, single_record in self._pending_records.items()
+                    if start_ordinal <= ordinal <= end_ordinal
+                ),
+            )
+
+    def ordinals(self):
+        with self._lock:
+            if not self._pending_records:
+                return self.storage.ordinals()
+            return [single_record.ordinal for single_record in self.records()]
+
+    def records(self):
+        with self._lock:
+            if not self._pending_records:
+                return iter(list(self.storage.records()))
+            return iter(
+                self.__merge_pending(self.storage.records(), self._pending_records.values())
+            )
+
+    def get_columns(self, start_ordinal=None, end_ordinal=None):
+        with self._lock:
+            if not self._pending_records:
+                return self.storage.get_columns(start_ordinal, end_ordinal)
+            return super(WriteBehindStorage, self).get_columns(start_ordinal, end_ordinal)
+
+    def get_effective_minutes(self, start_ordinal=None, end_ordinal=None):
+        with self._lock:
+            if not self._pending_records:
+                return self.storage.get_effective_minutes(start_ordinal, end_ordinal)
+            return super(WriteBehindStorage, self).get_effective_minutes(start_ordinal, end_ordinal)
+
+    @staticmethod
+    def __merge_pending(records, pending_records):
+        """
+        Merge the not yet written records into the records of the wrapped storage.
+        :param records: Records of the wrapped storage. Iterable of TimeRecord
+        :param pending_records: The not yet written records. Iterable of TimeRecord
+        :return: Records ordered by date. Type: list of TimeRecord
+        """
+
+        merged_records = {single_record.ordinal: single_record for single_record in records}
+        merged_records.update(
+            (single_record.ordinal, single_record) for single_record in pending_records
+        )
+        return [merged_records[ordinal] for ordinal in sorted(merged_records)]
+
+    def upsert(self, single_record):
+        """
+        Collect a changed record. It is written after the debounce delay.
+        :param single_record: The new record. Type: TimeRecord
+        :return: The previous record of the day or None.
+        """
+
+        return self.upsert_many([single_record])[0]
+
+    def upsert_many(self, records):
+        """
+        Collect several changed records. They are written after the debounce delay.
+        :param records: Iterable of TimeRecord.
+        :return: The previous records of the days (Or None) in the order of the records.
+        """
+
+        with self._lock:
+            previous_records = []
+            for single_record in records:
+                previous_records.append(self.get(single_record.ordinal))
+                self._pending_records[single_record.ordinal] = single_record
+            self.__schedule_flush()
+        return previous_records
+
+    def __schedule_flush(self):
+        """
+        (Re)start the debounce timer of the flushing.
+        :return: None
+        """
+
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.delay, self.flush)
+        # The application can exit while the timer is waiting (The exit flushes anyway).
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """
+        Write the collected records into the wrapped storage in one batch.
+        The records are kept (And written by the next flush) if the writing fails.
+        :return: None
+        """
+
+        with self.file_lock, self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending_records:
+                return
+            self.c_logger.info("Starting to flush records: {}".format(len(self._pending_records)))
+            try:
+                self.writer(
+                    [self._pending_records[ordinal] for ordinal in sorted(self._pending_records)]
+                )
+            except Exception as flush_error:
+                self.c_logger.error("Cannot flush the records. ERROR: {}".format(flush_error))
+                raise flush_error
+            self._pending_records = {}
+            self.c_logger.info("The records have been flushed successfully.")
+
+    @property
+    def is_dirty(self):
+        """
+        True if there are not yet written records.
+        """
+
+        return bool(self._pending_records)
+
+    @property
+    def lock_metrics(self):
+        return self.storage.lock_metrics
+
+    def get_version(self):
+        """
+        Provide the version of the wrapped storage (The not yet written records are not part of
+        it, see: is_dirty).
+        :return: Version as a string.
+        """
+
+        return self.storage.get_version()
+
+    def reload_if_changed(self):
+        with self.file_lock, self._lock:
+            return self.storage.reload_if_changed()
+
+    def close(self):
+        self.flush()
+        self.storage.close()
@@ -0,0 +1,213 @@
+"""
+This module contains the team-wide aggregation of the metrics (Eg.: Department monthly close).
+The users are split into chunks and the chunks are aggregated in a process pool. Every worker
+reads the records of its users from the shared index of the user-partitioned store
+(See: storage/user_partitioned_store module) and returns the partial aggregates of the users.
+The partial aggregates are merged into the team metrics.
+The metrics are defined in the metrics module (The same definitions as in the Metrics tab).
+Usage:
+    python3 team_metrics.py --dir conf/users --from 2020.03.01. --to 2020.03.31.
+"""
+
+import os
+import pathlib
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(PATH_OF_FILE_DIR)  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, "storage"))  # noqa: E402
+
+from color_logger import ColoredLogger
+from metrics import MetricsAggregate
+from time_record import TimeRecord
+from user_partitioned_store import INDEX_FILE_NAME
+
+# Number of users aggregated by a task of the process pool.
+USERS_PER_TASK = 50
+
+
+def aggregate_users(index_path, user_ids, start_ordinal, end_ordinal):
+    """
+    Aggregate the records of users in a date range (Task of the process pool).
+    The shared index is opened read-only with an own connection.
+    :param index_path: Path of the shared index of the user-partitioned store.
+    :param user_ids: IDs of the aggregated users.
+    :param start_ordinal: Day ordinal of the start date.
+    :param end_ordinal: Day ordinal of the end date.
+    :return: Partial aggregates. Structure: {"42": MetricsAggregate, ...}
+    """
+
+    aggregates = {user_id: MetricsAggregate() for user_id in user_ids}
+    connection = sqlite3.connect(
+        "{}?mode=ro".format(pathlib.Path(index_path).resolve().as_uri()), uri=True
+    )
+    try:
+        # The (user_id, ordinal) primary key is used so only the requested rows are read.
+        cursor = connection.execute(
+            "SELECT user_id, ordinal, arriving, leaving, break_time FROM time_records "
+            "WHERE user_id IN ({}) AND ordinal BETWEEN ? AND ?".format(
+                ", ".join("?" * len(user_ids))
+            ),
+            tuple(user_ids) + (start_ordinal, end_ordinal),
+        )
+        for row in cursor:
+            aggregates[row[0]].add(TimeRecord(*row[1:]))
+    finally:
+        connection.close()
+    return aggregates
+
+
+class TeamAggregator(object):
+    """
+    This class contains the team-wide aggregation related attributes.
+    """
+
+    def __init__(self, user_store, c_logger=None, max_workers=None):
+        """
+        Init method of the 'TeamAggregator' class.
+        :param user_store: Instance of UserPartitionedStore.
+        :param c_logger: Logger instance (ColoredLogger type is recommended).
+        :param max_workers: Number of the worker processes. Default is the number of the CPUs.
+        """
+
+        self.user_store = user_store
+        self.c_logger = c_logger if c_logger else self.__set_up_default_logger()
+        self.max_workers = max_workers
+
+    @staticmethod
+    def __set_up_default_logger():
+        """
+        Set-up a default logger if it is not provided as parameter.
+        :return: Instance of ColoredLogger
+        """
+
+        # Set-up the main logger instance.
+        path_of_log_file = os.path.join(PATH_OF_FILE_DIR, "logs", "team_metrics.log")
+        return_logger = ColoredLogger(os.path.basename(__file__), log_file_path=path_of_log_file)
+        return_logger.info("Default logger has been set-up in team_metrics module.")
+
+        return return_logger
+
+    def get_aggregates(self, start_ordinal, end_ordinal, user_ids=None):
+        """
+        Aggregate the records of the users in a date range.
+        A single chunk of users is aggregated in this process (The process pool would be slower).
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :param user_ids: IDs of the aggregated users. All users are aggregated if it is None.
+        :return: Structure: {"42": MetricsAggregate, ...}
+        """
+
+        user_ids = self.user_store.user_ids() if user_ids is None else sorted(map(str, user_ids))
+        index_path = os.path.join(self.user_store.path, INDEX_FILE_NAME)
+        user_chunks = [
+            user_ids[position : position + USERS_PER_TASK]
+            for position in range(0, len(user_ids), USERS_PER_TASK)
+        ]
+        self.c_logger.info(
+            "Starting to aggregate users: {} (Chunks: {})".format(len(user_ids), len(user_chunks))
+        )
+
+        aggregates = {}
+        if len(user_chunks) <= 1 or self.max_workers == 1:
+            for user_chunk in user_chunks:
+                aggregates.update(
+                    aggregate_users(index_path, user_chunk, start_ordinal, end_ordinal)
+                )
+            return aggregates
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            for partial_aggregates in executor.map(
+                aggregate_users,
+                [index_path] * len(user_chunks),
+                user_chunks,
+                [start_ordinal] * len(user_chunks),
+                [end_ordinal] * len(user_chunks),
+            ):
+                aggregates.update(partial_aggregates)
+        return aggregates
+
+    def aggregate(self, start_ordinal, end_ordinal, user_ids=None):
+        """
+        Calculate the metrics of the users and of the whole team in a date range.
+        :param start_ordinal: Day ordinal of the start date.
+        :param end_ordinal: Day ordinal of the end date.
+        :param user_ids: IDs of the aggregated users. All users are aggregated if it is None.
+        :return: Structure: {"users": {"42": {"worked_minutes": 10000, ...}, ...},
+                 "team": {"worked_minutes": 500000, ...}, "seconds": 1.2}
+                 (See: MetricsAggregate.to_dict)
+        """
+
+        start_time = time.perf_counter()
+        aggregates = self.get_aggregates(start_ordinal, end_ordinal, user_ids=user_ids)
+        team_aggregate = MetricsAggregate()
+        for aggregate in aggregates.values():
+            team_aggregate.merge(aggregate)
+        seconds = time.perf_counter() - start_time
+        self.c_logger.info("The users have been aggregated in {:.3f} seconds.".format(seconds))
+
+        return {
+            "users": {
+                user_id: aggregate.to_dict(start_ordinal, end_ordinal)
+                for user_id, aggregate in aggregates.items()
+            },
+            "team": team_aggregate.to_dict(
+                start_ordinal, end_ordinal, number_of_users=len(aggregates)
+            ),
+            "seconds": seconds,
+        }
+
+
+####
+# ENTRY POINT
+####
+
+
+if __name__ == "__main__":
+
+    import argparse
+
+    from metrics import format_minutes
+    from time_record import date_to_ordinal
+    from user_partitioned_store import UserPartitionedStore
+
+    parser = argparse.ArgumentParser(description="Aggregate the metrics of the team.")
+
+    parser.add_argument(
+        "--dir", dest="dir_path", required=True, help="Path of the directory of the partitions."
+    )
+    parser.add_argument(
+        "--from", dest="start_date", required=True, help="Start date. Eg.: 2020.03.01."
+    )
+    parser.add_argument("--to", dest="end_date", required=True, help="End date. Eg.: 2020.03.31.")
+    parser.add_argument(
+        "--workers", dest="max_workers", type=int, default=None, help="Number of processes."
+    )
+
+    args = parser.parse_args()
+
+    user_partitioned_store = UserPartitionedStore(args.dir_path)
+    team_metrics = TeamAggregator(
+        user_partitioned_store,
+        c_logger=user_partitioned_store.c_logger,
+        max_workers=args.max_workers,
+    ).aggregate(date_to_ordinal(args.start_date), date_to_ordinal(args.end_date))
+    user_partitioned_store.close()
+
+    for user_id, user_metrics in sorted(team_metrics["users"].items()) + [
+        ("TEAM", team_metrics["team"])
+    ]:
+        print(
+            "{:<12} worked: {:>9} overtime: {:>9} missing days: {}".format(
+                user_id,
+                format_minutes(user_metrics["worked_minutes"]),
+                format_minutes(user_metrics["overtime_overall_minutes"]),
+                user_metrics["missing_days"],
+            )
+        )
+    print("Seconds: {:.3f}".format(team_metrics["seconds"]))
@@ -0,0 +1,48 @@
+import logging
+import os
+import sys
+from datetime import timedelta
+
+import pytest
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, ".."))  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, "..", "storage"))  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, "..", "importers"))  # noqa: E402
+
+from color_logger import ColoredLogger
+
+
+@pytest.fixture
+def c_logger(tmp_path):
+    """
+    Provide a logger which writes only the warnings to the console.
+    :param tmp_path: Temporary directory of the test (Pytest fixture).
+    :return: Instance of ColoredLogger.
+    """
+
+    return ColoredLogger(
+        "test", log_file_path=str(tmp_path / "test.log"), console_level=logging.WARNING
+    )
+
+
+def make_records(start_date, days, leaving="17:00"):
+    """
+    Provide records of continuous days for set_times.
+    :param start_date: The first day. Instance of datetime.date.
+    :param days: Number of days.
+    :param leaving: Leaving time of every day.
+    :return: List of record dicts.
+    """
+
+    return [
+        {
+            "date": (start_date + timedelta(days=index)).strftime("%Y.%m.%d."),
+            "from": "08:00",
+            "to": leaving,
+            "break": "00:30",
+        }
+        for index in range(days)
+    ]
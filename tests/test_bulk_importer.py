@@ -0,0 +1,103 @@
+import pytest
+
+from bulk_importer import BulkImporter
+from bulk_importer import REJECTED_SAMPLE_SIZE
+from bulk_importer import normalize_break
+from data_processor import DataProcessor
+
+
+@pytest.fixture
+def data_processor(tmp_path, c_logger):
+    config_path = tmp_path / "data.json"
+    config_path.write_text("[]")
+    data_processor = DataProcessor(config=str(config_path), c_logger=c_logger)
+    yield data_processor
+    data_processor.close()
+
+
+def import_rows(tmp_path, c_logger, data_processor, lines, **kwargs):
+    import_path = tmp_path / "export.csv"
+    import_path.write_text("\n".join(lines) + "\n")
+    return BulkImporter(
+        str(import_path), c_logger=c_logger, data_processor=data_processor, **kwargs
+    ).import_file()
+
+
+@pytest.mark.parametrize(
+    "break_string, minutes", [("0", 0), ("30", 30), (" 45 ", 45), ("00:30", 30), ("1:05", 65)]
+)
+def test_break_time_formats(break_string, minutes):
+    assert normalize_break(break_string) == minutes
+
+
+@pytest.mark.parametrize("break_string", ["1440", "-5", "0:75", "half"])
+def test_not_valid_break_times(break_string):
+    with pytest.raises(ValueError):
+        normalize_break(break_string)
+
+
+def test_split_shift_break_is_the_sum_of_the_breaks_and_the_gaps(
+    tmp_path, c_logger, data_processor
+):
+    report = import_rows(
+        tmp_path,
+        c_logger,
+        data_processor,
+        [
+            "date,from,to,break",
+            "2020-03-02,08:00,12:00,0",
+            "2020-03-02,13:00,17:00,15",
+            # The duplicated row is counted once.
+            "2020-03-02,13:00,17:00,15",
+        ],
+    )
+
+    assert report["records"] == 1
+    assert data_processor.data == [
+        {"date": "2020.03.02.", "from": "08:00", "to": "17:00", "break": "01:15"}
+    ]
+
+
+def test_rejected_lines_are_counted_with_limited_sample(tmp_path, c_logger, data_processor):
+    report = import_rows(
+        tmp_path,
+        c_logger,
+        data_processor,
+        ["date,from,to,break", "2020-03-02,08:00,16:00,30"]
+        + ["2020-03-03,25:00,16:00,30"] * (REJECTED_SAMPLE_SIZE + 10),
+    )
+
+    assert report["records"] == 1
+    assert report["rejected"] == REJECTED_SAMPLE_SIZE + 10
+    assert len(report["rejected_sample"]) == REJECTED_SAMPLE_SIZE
+
+
+def test_rows_of_users_require_a_user(tmp_path, c_logger, data_processor):
+    with pytest.raises(Exception, match="rows of users"):
+        import_rows(
+            tmp_path, c_logger, data_processor, ["user,date,from,to", "1,2020-03-02,08:00,16:00"]
+        )
+
+
+def test_all_users_are_imported_in_one_pass(tmp_path, c_logger, data_processor):
+    users_dir = str(tmp_path / "users")
+    report = import_rows(
+        tmp_path,
+        c_logger,
+        data_processor,
+        [
+            "user,date,from,to",
+            "1,2020-03-02,08:00,16:00",
+            "2,2020-03-02,09:00,17:00",
+            "1,2020-03-03,08:00,16:00",
+        ],
+        all_users=True,
+        users_dir=users_dir,
+    )
+
+    assert (report["rows"], report["records"], report["users"]) == (3, 3, 2)
+    assert data_processor.data == []
+    for user_id, number_of_records in (("1", 2), ("2", 1)):
+        user_data_processor = DataProcessor(user_id=user_id, users_dir=users_dir, c_logger=c_logger)
+        assert len(user_data_processor.data) == number_of_records
+        user_data_processor.close()
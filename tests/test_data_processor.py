@@ -0,0 +1,177 @@
+import json
+import os
+import threading
+from datetime import date
+
+import pytest
+
+from aggregate_cache import get_cache_path
+from conftest import make_records
+from data_processor import DataProcessor
+
+
+@pytest.fixture
+def open_data_processor(tmp_path, c_logger):
+    opened_data_processors = []
+
+    def open_data_processor(config="data.json", **kwargs):
+        config_path = tmp_path / config
+        if config_path.suffix == ".json" and not config_path.exists():
+            config_path.write_text("[]")
+        data_processor = DataProcessor(config=str(config_path), c_logger=c_logger, **kwargs)
+        opened_data_processors.append(data_processor)
+        return data_processor
+
+    yield open_data_processor
+    for data_processor in opened_data_processors:
+        data_processor.close()
+
+
+@pytest.fixture
+def ten_years_of_shards(open_data_processor):
+    data_processor = open_data_processor("data", keep_history=False, aggregate_cache=False)
+    data_processor.set_times(make_records(date(2010, 1, 1), 3652))
+    data_processor.close()
+    return "data"
+
+
+@pytest.mark.parametrize("aggregate_cache", [False, True])
+def test_30_day_metrics_load_only_the_shard_of_the_range(
+    open_data_processor, ten_years_of_shards, aggregate_cache
+):
+    data_processor = open_data_processor(
+        ten_years_of_shards, keep_history=False, aggregate_cache=aggregate_cache
+    )
+    assert len(data_processor.storage._loaded_shards) == 0
+
+    aggregate = data_processor.get_metrics_in_range("2019.12.01.", "2019.12.30.")
+
+    assert aggregate.worked_days == 30
+    assert len(data_processor.storage._loaded_shards) == 1
+
+
+def test_warm_aggregate_cache_loads_no_shard(open_data_processor, ten_years_of_shards):
+    data_processor = open_data_processor(ten_years_of_shards, keep_history=False)
+    aggregate = data_processor.get_metrics_in_range("2015.01.01.", "2019.12.31.")
+    data_processor.close()
+
+    data_processor = open_data_processor(ten_years_of_shards, keep_history=False)
+    assert data_processor.get_metrics_in_range("2015.01.01.", "2019.12.31.") == aggregate
+    assert len(data_processor.storage._loaded_shards) == 0
+
+
+def test_metrics_with_and_without_aggregate_cache_are_equal(open_data_processor):
+    data_processor = open_data_processor()
+    data_processor.set_times(make_records(date(2020, 1, 1), 100))
+    data_processor.set_time("2020.02.12.", "07:00", "19:00", "01:00")
+    cached_aggregate = data_processor.get_metrics_in_range("2020.01.03.", "2020.04.02.")
+    data_processor.set_time("2020.03.10.", "09:00", "12:00", "00:00")
+
+    assert data_processor.get_metrics_in_range("2020.01.03.", "2020.04.02.") == (
+        open_data_processor(aggregate_cache=False).get_metrics_in_range(
+            "2020.01.03.", "2020.04.02."
+        )
+    )
+    assert cached_aggregate != data_processor.get_metrics_in_range("2020.01.03.", "2020.04.02.")
+
+
+def test_aggregate_cache_of_another_data_version_is_dropped(open_data_processor, tmp_path):
+    data_processor = open_data_processor()
+    data_processor.set_times(make_records(date(2020, 3, 1), 31))
+    stale_aggregate = data_processor.get_metrics_in_range("2020.03.01.", "2020.03.31.")
+    data_processor.close()
+
+    # The data is edited while the application is not running.
+    data_path = tmp_path / "data.json"
+    with open(str(data_path) + ".journal") as opened_file:
+        records = [json.loads(line) for line in opened_file]
+    for single_record in records:
+        single_record["to"] = "23:00"
+    data_path.write_text(json.dumps(records))
+    open(str(data_path) + ".journal", "w").close()
+
+    aggregate = open_data_processor().get_metrics_in_range("2020.03.01.", "2020.03.31.")
+    assert aggregate != stale_aggregate
+    assert aggregate == open_data_processor(aggregate_cache=False).get_metrics_in_range(
+        "2020.03.01.", "2020.03.31."
+    )
+
+
+def test_changes_of_another_instance_are_applied_to_the_metrics(open_data_processor):
+    data_processor = open_data_processor()
+    data_processor.set_times(make_records(date(2020, 3, 1), 31))
+    data_processor.get_metrics_in_range("2020.03.01.", "2020.03.31.")
+    data_processor.get_rolling_series("2020.03.01.", "2020.03.31.")
+
+    open_data_processor().set_time("2020.03.10.", "08:00", "20:00", "00:30")
+    assert data_processor.reload_if_changed()
+
+    reference = open_data_processor(aggregate_cache=False)
+    assert data_processor.get_metrics_in_range("2020.03.01.", "2020.03.31.") == (
+        reference.get_metrics_in_range("2020.03.01.", "2020.03.31.")
+    )
+    assert data_processor.get_rolling_series("2020.03.01.", "2020.03.31.") == (
+        reference.get_rolling_series("2020.03.01.", "2020.03.31.")
+    )
+
+
+def test_set_time_does_not_write_the_aggregate_cache(open_data_processor, tmp_path):
+    data_processor = open_data_processor()
+    data_processor.set_times(make_records(date(2020, 1, 1), 90))
+    data_processor.get_metrics_in_range("2020.01.01.", "2020.03.31.")
+    data_processor.flush()
+    cache_path = get_cache_path(str(tmp_path / "data.json"))
+    cache_stat = os.stat(cache_path)
+
+    data_processor.set_time("2020.02.12.", "07:00", "19:00", "01:00")
+    data_processor.get_metrics_in_range("2020.01.01.", "2020.03.31.")
+
+    assert os.stat(cache_path).st_mtime_ns == cache_stat.st_mtime_ns
+
+
+def test_write_behind_flush_writes_the_records_and_the_history(open_data_processor):
+    data_processor = open_data_processor(write_behind=True)
+    data_processor.set_times(make_records(date(2020, 3, 2), 5))
+    assert open_data_processor().data == []
+
+    data_processor.flush()
+
+    assert open_data_processor().data == make_records(date(2020, 3, 2), 5)
+    assert data_processor.get_records_in_range(
+        "2020.03.02.", "2020.03.02.", as_of="2020.03.01."
+    ) == []
+
+
+@pytest.mark.parametrize("config", ["data.json", "data.db"])
+def test_write_behind_flush_thread_and_foreground_writes(open_data_processor, config):
+    data_processor = open_data_processor(config, write_behind=True)
+    # The flushing thread runs between the foreground writes.
+    data_processor.storage.delay = 0.001
+    errors = []
+
+    def read_metrics():
+        for _ in range(200):
+            try:
+                data_processor.get_metrics_in_range("2020.01.01.", "2020.12.31.")
+                data_processor.get_rolling_series("2020.03.01.", "2020.03.31.")
+            except Exception as read_error:
+                errors.append(read_error)
+
+    reader_thread = threading.Thread(target=read_metrics)
+    reader_thread.start()
+    for index in range(200):
+        data_processor.set_time(
+            "2020.{:02d}.{:02d}.".format(1 + index // 28 % 12, 1 + index % 28),
+            "08:00",
+            "{:02d}:00".format(12 + index % 8),
+            "00:30",
+        )
+    reader_thread.join()
+    data_processor.flush()
+
+    assert errors == []
+    assert data_processor.get_metrics_in_range("2020.01.01.", "2020.12.31.") == (
+        open_data_processor(config, aggregate_cache=False).get_metrics_in_range(
+            "2020.01.01.", "2020.12.31."
+        )
+    )
@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+from file_lock import FileLock
+
+
+def test_lock_is_reentrant_in_the_owner_thread(tmp_path):
+    file_lock = FileLock(str(tmp_path / "data.lock"))
+
+    with file_lock:
+        with file_lock:
+            assert file_lock._depth == 2
+    assert file_lock._depth == 0
+    assert file_lock.metrics["acquisitions"] == 1
+
+
+def test_lock_excludes_the_threads_of_the_process(tmp_path):
+    file_lock = FileLock(str(tmp_path / "data.lock"))
+    holders = []
+    overlaps = []
+
+    def hold_lock():
+        for _ in range(100):
+            with file_lock:
+                with file_lock:
+                    holders.append(threading.get_ident())
+                    if len(holders) > 1:
+                        overlaps.append(list(holders))
+                    time.sleep(0.0001)
+                    holders.pop()
+
+    threads = [threading.Thread(target=hold_lock) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert overlaps == []
+
+
+def test_lock_of_another_thread_times_out(tmp_path):
+    file_lock = FileLock(str(tmp_path / "data.lock"), timeout=0.05)
+    is_locked = threading.Event()
+    is_done = threading.Event()
+
+    def hold_lock():
+        with file_lock:
+            is_locked.set()
+            is_done.wait()
+
+    thread = threading.Thread(target=hold_lock)
+    thread.start()
+    is_locked.wait()
+    with pytest.raises(TimeoutError):
+        file_lock.acquire()
+    is_done.set()
+    thread.join()
+
+    assert file_lock.metrics["timeouts"] == 1
+    with file_lock:
+        assert file_lock._depth == 1
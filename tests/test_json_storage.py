@@ -0,0 +1,93 @@
+import io
+import json
+import os
+from datetime import date
+
+import pytest
+
+from conftest import make_records
+from json_storage import JsonStorage
+from json_storage import iter_json_array
+from time_record import TimeRecord
+
+
+def write_data(path, records, journal_lines=()):
+    with open(path, "w") as opened_file:
+        json.dump(records, opened_file)
+    with open("{}.journal".format(path), "w") as opened_file:
+        opened_file.writelines(line + "\n" for line in journal_lines)
+
+
+def get_dicts(storage):
+    return [single_record.to_dict() for single_record in storage.records()]
+
+
+def test_journal_replay_applies_the_entries(tmp_path, c_logger):
+    path = str(tmp_path / "data.json")
+    first_day, second_day = make_records(date(2020, 3, 2), 2)
+    write_data(path, [first_day], [json.dumps(second_day)])
+
+    storage = JsonStorage(path, c_logger=c_logger)
+
+    assert get_dicts(storage) == [first_day, second_day]
+
+
+@pytest.mark.parametrize(
+    "bad_line",
+    [
+        '{"date": "2020.03.03.", "from": "25:00", "to": "16:00", "break": "00:30"}',
+        '{"date": "2020.03.03."}',
+        "[1]",
+        "not json",
+    ],
+)
+def test_journal_replay_skips_bad_record_and_compacts(tmp_path, c_logger, bad_line):
+    path = str(tmp_path / "data.json")
+    first_day, _, third_day = make_records(date(2020, 3, 2), 3)
+    write_data(path, [first_day], [bad_line, json.dumps(third_day)])
+
+    storage = JsonStorage(path, c_logger=c_logger)
+
+    assert get_dicts(storage) == [first_day, third_day]
+    # The damaged journal is compacted into the config file.
+    assert os.path.getsize("{}.journal".format(path)) == 0
+    with open(path) as opened_file:
+        assert json.load(opened_file) == [first_day, third_day]
+
+
+def test_reload_skips_bad_record_appended_by_another_process(tmp_path, c_logger):
+    path = str(tmp_path / "data.json")
+    first_day, second_day = make_records(date(2020, 3, 2), 2)
+    write_data(path, [first_day])
+    storage = JsonStorage(path, c_logger=c_logger)
+
+    with open("{}.journal".format(path), "a") as opened_file:
+        opened_file.write('{"date": "2020.03.03.", "from": "08:00", "to": "99:00"}\n')
+        opened_file.write(json.dumps(second_day) + "\n")
+
+    assert storage.reload_if_changed()
+    assert get_dicts(storage) == [first_day, second_day]
+    assert os.path.getsize("{}.journal".format(path)) == 0
+
+
+def test_upsert_many_is_loaded_after_restart(tmp_path, c_logger):
+    path = str(tmp_path / "data.json")
+    write_data(path, [])
+    records = make_records(date(2020, 3, 2), 5)
+    storage = JsonStorage(path, c_logger=c_logger)
+
+    storage.upsert_many(TimeRecord.from_dict(single_dict) for single_dict in records)
+
+    assert get_dicts(JsonStorage(path, c_logger=c_logger)) == records
+
+
+@pytest.mark.parametrize("content", ["[1, 2,]", "[1, 2] 3", "[1, 2"])
+def test_iter_json_array_rejects_not_valid_array(content):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(content), chunk_size=2))
+
+
+def test_iter_json_array_reads_items_across_chunks():
+    content = json.dumps([{"date": "2020.03.02."}, 12345, True, "text"])
+
+    assert list(iter_json_array(io.StringIO(content), chunk_size=3)) == json.loads(content)
@@ -0,0 +1,76 @@
+import random
+from datetime import date
+
+from conftest import make_records
+from metrics import MetricsAggregate
+from metrics_index import MetricsPrefixIndex
+from time_record import TimeRecord
+
+
+def get_records(start_date, days):
+    records = [TimeRecord.from_dict(single_dict) for single_dict in make_records(start_date, days)]
+    # Leave gaps (Days without record) in the history.
+    return [single_record for single_record in records if single_record.ordinal % 5]
+
+
+def sum_records(records, start_ordinal, end_ordinal):
+    return MetricsAggregate.from_records(
+        single_record
+        for single_record in records
+        if start_ordinal <= single_record.ordinal <= end_ordinal
+    )
+
+
+def test_range_aggregates_match_the_records():
+    records = get_records(date(2020, 1, 1), 120)
+    metrics_index = MetricsPrefixIndex(records)
+    first_ordinal = records[0].ordinal
+
+    for start_offset, end_offset in [(-10, 200), (0, 0), (3, 40), (50, 49), (100, 130)]:
+        start_ordinal, end_ordinal = first_ordinal + start_offset, first_ordinal + end_offset
+        assert metrics_index.get_aggregate(start_ordinal, end_ordinal) == sum_records(
+            records, start_ordinal, end_ordinal
+        )
+
+
+def test_incremental_updates_match_a_rebuilt_index():
+    records = {
+        single_record.ordinal: single_record for single_record in get_records(date(2020, 1, 1), 60)
+    }
+    metrics_index = MetricsPrefixIndex(records[ordinal] for ordinal in sorted(records))
+    first_ordinal = min(records)
+    randomizer = random.Random(42)
+
+    # Changes inside, before and after the covered days.
+    for ordinal in [first_ordinal + 10, first_ordinal - 7, first_ordinal + 90, first_ordinal + 4]:
+        new_record = TimeRecord(ordinal, 8 * 60, randomizer.randint(12, 20) * 60, 30)
+        metrics_index.update(records.get(ordinal), new_record)
+        records[ordinal] = new_record
+
+    rebuilt_index = MetricsPrefixIndex(records[ordinal] for ordinal in sorted(records))
+    assert metrics_index.get_aggregate(first_ordinal - 10, first_ordinal + 100) == (
+        rebuilt_index.get_aggregate(first_ordinal - 10, first_ordinal + 100)
+    )
+    assert metrics_index.get_rolling_series(first_ordinal, first_ordinal + 95) == (
+        rebuilt_index.get_rolling_series(first_ordinal, first_ordinal + 95)
+    )
+
+
+def test_rolling_series_windows():
+    records = get_records(date(2020, 1, 1), 40)
+    metrics_index = MetricsPrefixIndex(records)
+    start_ordinal = records[0].ordinal + 20
+
+    rolling_series = metrics_index.get_rolling_series(
+        start_ordinal, start_ordinal + 9, windows=(7,)
+    )
+
+    assert rolling_series["ordinals"] == list(range(start_ordinal, start_ordinal + 10))
+    for index, ordinal in enumerate(rolling_series["ordinals"]):
+        assert rolling_series["worked_minutes"][7][index] == (
+            sum_records(records, ordinal - 6, ordinal).worked_minutes
+        )
+        overtime = sum_records(records, start_ordinal, ordinal)
+        assert rolling_series["overtime_balance_minutes"][index] == (
+            overtime.overtime_plus_minutes + overtime.overtime_minus_minutes
+        )
@@ -0,0 +1,103 @@
+from datetime import date
+
+import pytest
+
+from binary_storage import BinaryStorage
+from conftest import make_records
+from json_storage import JsonStorage
+from sharded_json_storage import ShardedJsonStorage
+from sqlite_storage import SqliteStorage
+from time_record import TimeRecord
+from time_record import date_to_ordinal
+
+STORAGES = {
+    "json": (JsonStorage, "data.json"),
+    "sharded": (ShardedJsonStorage, "data"),
+    "sqlite": (SqliteStorage, "data.db"),
+    "binary": (BinaryStorage, "data.bin"),
+}
+
+
+@pytest.fixture(params=sorted(STORAGES))
+def open_storage(request, tmp_path, c_logger):
+    storage_class, file_name = STORAGES[request.param]
+    opened_storages = []
+
+    def open_storage():
+        storage = storage_class(str(tmp_path / file_name), c_logger=c_logger)
+        opened_storages.append(storage)
+        return storage
+
+    if storage_class is JsonStorage:
+        (tmp_path / file_name).write_text("[]")
+    yield open_storage
+    for storage in opened_storages:
+        storage.close()
+
+
+def get_records(start_date, days):
+    return [TimeRecord.from_dict(single_dict) for single_dict in make_records(start_date, days)]
+
+
+def test_upsert_many_and_reopen(open_storage):
+    records = get_records(date(2020, 2, 20), 20)
+    storage = open_storage()
+
+    assert storage.upsert_many(records) == [None] * len(records)
+
+    reopened_storage = open_storage()
+    assert len(reopened_storage) == len(records)
+    assert list(reopened_storage.records()) == records
+    start_ordinal = date_to_ordinal("2020.03.01.")
+    end_ordinal = date_to_ordinal("2020.03.03.")
+    assert reopened_storage.get_range(start_ordinal, end_ordinal) == [
+        single_record
+        for single_record in records
+        if start_ordinal <= single_record.ordinal <= end_ordinal
+    ]
+
+
+def test_upsert_returns_previous_record(open_storage):
+    first_record = get_records(date(2020, 3, 2), 1)[0]
+    changed_record = TimeRecord(first_record.ordinal, 9 * 60, 18 * 60, 15)
+    storage = open_storage()
+
+    assert storage.upsert(first_record) is None
+    assert storage.upsert(changed_record) == first_record
+    assert len(storage) == 1
+    assert storage.get(first_record.ordinal) == changed_record
+
+
+def test_changes_of_another_instance_are_reloaded(open_storage):
+    first_record, second_record = get_records(date(2020, 3, 2), 2)
+    storage = open_storage()
+    storage.upsert(first_record)
+    other_storage = open_storage()
+
+    other_storage.upsert(second_record)
+
+    # The binary storage sees the in-place changes via the map (Nothing is reloaded).
+    storage.reload_if_changed()
+    assert list(storage.records()) == [first_record, second_record]
+    assert not storage.reload_if_changed()
+
+
+def test_version_is_changed_by_writes(open_storage):
+    storage = open_storage()
+    version = storage.get_version()
+
+    storage.upsert_many(get_records(date(2020, 3, 2), 1))
+
+    assert storage.get_version() != version
+
+
+def test_binary_storage_keeps_the_record_count_when_extended(tmp_path, c_logger):
+    path = str(tmp_path / "data.bin")
+    storage = BinaryStorage(path, c_logger=c_logger)
+    storage.upsert_many(get_records(date(2020, 1, 1), 3))
+    storage.upsert_many(get_records(date(2022, 1, 1), 3))
+    storage.close()
+
+    reopened_storage = BinaryStorage(path, c_logger=c_logger)
+    assert len(reopened_storage) == 6
+    reopened_storage.close()
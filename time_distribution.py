@@ -0,0 +1,161 @@
+"""
+This module contains the distribution statistics of the arriving and leaving times
+(Eg.: "When do people usually arrive?").
+The times are minute-of-day integers (See: time_record module) so a day has 1440 possible values.
+The exact percentiles are calculated from the sorted minutes (Single user, a date range).
+The approximate percentiles of big data sets (Eg.: Team-wide multi-year data) are calculated
+from a fixed 1440-bucket counting histogram which is filled in a single pass and it doesn't
+store the minutes. The mean and the standard deviation are exact in both cases.
+Only the worked days (They have arriving and leaving times) are used.
+"""
+
+import math
+
+MINUTES_PER_DAY = 24 * 60
+# Default percentiles of the statistics.
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def get_exact_percentile(sorted_minutes, percentile):
+    """
+    Calculate a percentile of sorted minutes with linear interpolation between the closest ranks.
+    :param sorted_minutes: Sorted sequence of minutes. It can't be empty.
+    :param percentile: The percentile (0 - 100).
+    :return: The percentile in minutes. FLOAT
+    """
+
+    position = (len(sorted_minutes) - 1) * percentile / 100.0
+    lower_index = int(math.floor(position))
+    upper_index = min(lower_index + 1, len(sorted_minutes) - 1)
+    fraction = position - lower_index
+    return (
+        sorted_minutes[lower_index]
+        + (sorted_minutes[upper_index] - sorted_minutes[lower_index]) * fraction
+    )
+
+
+def get_exact_statistics(minutes, percentiles=PERCENTILES):
+    """
+    Calculate the statistics of minutes with exact percentiles (The minutes are sorted).
+    :param minutes: Iterable of minute-of-day values.
+    :param percentiles: The calculated percentiles (0 - 100).
+    :return: Structure: {"count": 20, "mean": 482.5, "stddev": 12.3,
+             "percentiles": {10: 465.0, ..., 90: 500.0}, "histogram": [0, 0, ..., 3, ...]}
+             The histogram contains the number of the days per minute-of-day (1440 buckets).
+    """
+
+    sorted_minutes = sorted(int(single_minute) for single_minute in minutes)
+    histogram = MinuteHistogram(sorted_minutes)
+    statistics = histogram.get_statistics(percentiles=())
+    statistics["percentiles"] = {
+        percentile: (get_exact_percentile(sorted_minutes, percentile) if sorted_minutes else None)
+        for percentile in percentiles
+    }
+    return statistics
+
+
+class MinuteHistogram(object):
+    """
+    This class contains the counting histogram of minute-of-day values (1440 buckets).
+    The histograms of disjoint data (Eg.: Users) can be merged.
+    """
+
+    def __init__(self, minutes=()):
+        """
+        Init method of the 'MinuteHistogram' class.
+        :param minutes: Iterable of minute-of-day values.
+        """
+
+        self.counts = [0] * MINUTES_PER_DAY
+        self.count = 0
+        # The sums are used for the mean and the standard deviation.
+        self.sum = 0
+        self.sum_of_squares = 0
+        for single_minute in minutes:
+            self.add(single_minute)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, single_minute):
+        """
+        Add a minute-of-day value to the histogram.
+        :param single_minute: Minute-of-day value (0 - 1439).
+        :return: None
+        """
+
+        if not 0 <= single_minute < MINUTES_PER_DAY:
+            raise Exception("Not valid minute-of-day: {}".format(single_minute))
+        self.counts[single_minute] += 1
+        self.count += 1
+        self.sum += single_minute
+        self.sum_of_squares += single_minute * single_minute
+
+    def merge(self, other):
+        """
+        Merge another histogram into this one.
+        :param other: Instance of MinuteHistogram.
+        :return: This instance.
+        """
+
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.sum_of_squares += other.sum_of_squares
+        return self
+
+    @property
+    def mean(self):
+        """
+        The mean of the minutes or None if the histogram is empty.
+        """
+
+        if not self.count:
+            return None
+        return self.sum / float(self.count)
+
+    @property
+    def stddev(self):
+        """
+        The (Population) standard deviation of the minutes or None if the histogram is empty.
+        """
+
+        if not self.count:
+            return None
+        variance = self.sum_of_squares / float(self.count) - self.mean**2
+        return math.sqrt(max(variance, 0.0))
+
+    def get_percentile(self, percentile):
+        """
+        Calculate an approximate percentile (Nearest rank, the minute of the bucket).
+        :param percentile: The percentile (0 - 100).
+        :return: The percentile in minutes or None if the histogram is empty.
+        """
+
+        if not self.count:
+            return None
+        rank = max(int(math.ceil(self.count * percentile / 100.0)), 1)
+        cumulative_count = 0
+        for single_minute, count in enumerate(self.counts):
+            cumulative_count += count
+            if cumulative_count >= rank:
+                return single_minute
+        return MINUTES_PER_DAY - 1
+
+    def get_statistics(self, percentiles=PERCENTILES):
+        """
+        Provide the statistics of the histogram with approximate percentiles.
+        :param percentiles: The calculated percentiles (0 - 100).
+        :return: Structure: {"count": 20, "mean": 482.5, "stddev": 12.3,
+                 "percentiles": {10: 465, ..., 90: 500}, "histogram": [0, 0, ..., 3, ...]}
+        """
+
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "stddev": self.stddev,
+            "percentiles": {
+                percentile: self.get_percentile(percentile) for percentile in percentiles
+            },
+            "histogram": list(self.counts),
+        }
@@ -0,0 +1,194 @@
+"""
+This module contains the compact representation of a time record.
+The date is stored as a day ordinal and the times are stored as minute-of-day integers so the
+records are parsed once (When they are loaded) and the calculations don't need string parsing.
+The strings ("2020.03.30." and "HH:MM") are created only for the GUI, the reports and the
+Json config file.
+"""
+
+import re
+from datetime import date as datetime_date
+from datetime import datetime
+
+DATE_FORMAT = "%Y.%m.%d."
+# Time of day in HH:MM format (The hours and the minutes may be a single digit, as in strptime).
+TIME_PATTERN = re.compile(r"([0-9]{1,2}):([0-9]{1,2})")
+
+
+def date_to_ordinal(date_string):
+    """
+    Convert a date string to a day ordinal.
+    :param date_string: Date as a string in DATE_FORMAT format. Eg.: 2020.03.30.
+    :return: Proleptic Gregorian ordinal of the date. INT
+    """
+
+    return datetime.strptime(date_string, DATE_FORMAT).toordinal()
+
+
+def ordinal_to_date(ordinal):
+    """
+    Convert a day ordinal to a date string.
+    :param ordinal: Proleptic Gregorian ordinal of the date.
+    :return: Date as a string in DATE_FORMAT format. Eg.: 2020.03.30.
+    """
+
+    return datetime_date.fromordinal(ordinal).strftime(DATE_FORMAT)
+
+
+def time_to_minutes(time_string):
+    """
+    Convert a time string to minutes.
+    :param time_string: Time as a string in HH:MM format. Eg.: 08:30
+    :return: Number of minutes. Eg.: 510
+    :raise ValueError: If the time is malformed or it is not a valid time of day (Eg.: 25:99).
+    """
+
+    time_match = TIME_PATTERN.fullmatch(time_string)
+    if not time_match:
+        raise ValueError("Not valid time: {}".format(time_string))
+    hours, minutes = int(time_match.group(1)), int(time_match.group(2))
+    if hours > 23 or minutes > 59:
+        raise ValueError("Not valid time of day: {}".format(time_string))
+    return hours * 60 + minutes
+
+
+def minutes_to_time(minutes):
+    """
+    Convert minutes to a time string.
+    :param minutes: Number of minutes. Eg.: 510
+    :return: Time as a string in HH:MM format. Eg.: 08:30
+    """
+
+    return "{:02d}:{:02d}".format(*divmod(int(minutes), 60))
+
+
+def is_valid_time_range(arriving, leaving):
+    """
+    Check the time range of a day. The leaving time can't be earlier than the arriving time.
+    :param arriving: Arriving time in minutes.
+    :param leaving: Leaving time in minutes.
+    :return: Bool. True if the time range is valid.
+    """
+
+    return leaving >= arriving
+
+
+def is_weekend_ordinal(ordinal):
+    """
+    Check if the day of the ordinal is a weekend day.
+    The 1st ordinal (0001.01.01.) is a Monday.
+    :param ordinal: Proleptic Gregorian ordinal of the date.
+    :return: Bool. True if the day is weekend day.
+    """
+
+    return (ordinal - 1) % 7 >= 5
+
+
+class TimeRecord(object):
+    """
+    This class contains a single time record (One day).
+    """
+
+    __slots__ = ("ordinal", "arriving", "leaving", "break_time")
+
+    def __init__(self, ordinal, arriving, leaving, break_time):
+        """
+        Init method of the 'TimeRecord' class.
+        :param ordinal: Proleptic Gregorian ordinal of the date.
+        :param arriving: Arriving time in minutes.
+        :param leaving: Leaving time in minutes.
+        :param break_time: Break time in minutes.
+        """
+
+        self.ordinal = ordinal
+        self.arriving = arriving
+        self.leaving = leaving
+        self.break_time = break_time
+
+    def __eq__(self, other):
+        if not isinstance(other, TimeRecord):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    def __repr__(self):
+        return "TimeRecord({})".format(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, record_dict):
+        """
+        Create a record from the dict format of the Json config file.
+        :param record_dict: Structure: {"date": "2020.03.30.", "from": "08:00", "to": "17:25",
+                            "break": "00:22"}
+        :return: Instance of TimeRecord.
+        """
+
+        return cls(
+            date_to_ordinal(record_dict["date"]),
+            time_to_minutes(record_dict["from"]),
+            time_to_minutes(record_dict["to"]),
+            time_to_minutes(record_dict["break"]),
+        )
+
+    @classmethod
+    def from_strings(cls, date, arriving, leaving, break_time):
+        """
+        Create a record from the string values.
+        :param date: Date as a string in DATE_FORMAT format.
+        :param arriving: Arriving time as a string in HH:MM format.
+        :param leaving: Leaving time as a string in HH:MM format.
+        :param break_time: Break time as a string in HH:MM format.
+        :return: Instance of TimeRecord.
+        """
+
+        return cls(
+            date_to_ordinal(date),
+            time_to_minutes(arriving),
+            time_to_minutes(leaving),
+            time_to_minutes(break_time),
+        )
+
+    @property
+    def date(self):
+        """
+        Date of the record as a string in DATE_FORMAT format.
+        """
+
+        return ordinal_to_date(self.ordinal)
+
+    @property
+    def is_empty(self):
+        """
+        True if the record doesn't contain arriving and leaving times (Both are 00:00).
+        """
+
+        return self.arriving == 0 and self.leaving == 0
+
+    @property
+    def effective_minutes(self):
+        """
+        The time between the arriving and leaving in minutes.
+        """
+
+        return self.leaving - self.arriving
+
+    def as_tuple(self):
+        """
+        Provide the record as a tuple.
+        :return: (ordinal, arriving, leaving, break_time)
+        """
+
+        return self.ordinal, self.arriving, self.leaving, self.break_time
+
+    def to_dict(self):
+        """
+        Provide the record in the dict format of the Json config file.
+        :return: Structure: {"date": "2020.03.30.", "from": "08:00", "to": "17:25",
+                 "break": "00:22"}
+        """
+
+        return {
+            "date": self.date,
+            "from": minutes_to_time(self.arriving),
+            "to": minutes_to_time(self.leaving),
+            "break": minutes_to_time(self.break_time),
+        }
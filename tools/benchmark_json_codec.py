@@ -0,0 +1,161 @@
+"""
+This script benchmarks the available Json codecs (See: json_codec module) on a synthetic 10-year
+dataset (A record for every working day).
+Measured operations:
+    - encode/decode: Serialization of the complete dataset in the memory.
+    - load: Start-up of the Json storage (Config file and journal).
+    - save: Compaction of the Json storage (Atomic write of the config file).
+    - report: Json report of the complete dataset.
+Usage:
+    python3 tools/benchmark_json_codec.py [--years 10] [--repeat 5]
+"""
+
+import argparse
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date as datetime_date
+from datetime import timedelta
+
+# Get the path of the directory of the current file.
+PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
+# Append the required directories to PATH
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, ".."))  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, "..", "generators"))  # noqa: E402
+sys.path.append(os.path.join(PATH_OF_FILE_DIR, "..", "storage"))  # noqa: E402
+
+import json_codec
+from data_processor import DataProcessor
+from json_generator import JsonReportGenerator
+from json_storage import JsonStorage
+from time_record import TimeRecord
+
+
+def generate_dataset(years):
+    """
+    Generate a synthetic dataset. Every working day has a record.
+    :param years: Number of years.
+    :return: List of TimeRecord.
+    """
+
+    random.seed(0)
+    first_day = datetime_date(2020 - years, 1, 1)
+    records = []
+    for day_offset in range(years * 365):
+        day = first_day + timedelta(days=day_offset)
+        if day.weekday() >= 5:
+            continue
+        arriving = random.randint(6 * 60, 10 * 60)
+        records.append(
+            TimeRecord(
+                day.toordinal(),
+                arriving,
+                arriving + random.randint(6 * 60, 10 * 60),
+                random.randint(20, 60),
+            )
+        )
+    return records
+
+
+def measure(function, repeat):
+    """
+    Measure the best run time of a function.
+    :param function: The measured function (Without parameters).
+    :param repeat: Number of the runs.
+    :return: The best run time in seconds.
+    """
+
+    best_time = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        run_time = time.perf_counter() - start_time
+        best_time = run_time if best_time is None else min(best_time, run_time)
+    return best_time
+
+
+def benchmark_codec(records, work_dir, repeat, c_logger):
+    """
+    Benchmark the active codec.
+    :param records: The dataset. Type: list of TimeRecord
+    :param work_dir: Directory of the temporary files.
+    :param repeat: Number of the runs of the operations.
+    :param c_logger: Logger instance.
+    :return: Run times of the operations. Structure: {"encode": 0.01, ...}
+    """
+
+    json_data = [single_record.to_dict() for single_record in records]
+    json_string = json_codec.dumps(json_data)
+    config_path = os.path.join(work_dir, "time_data_{}.json".format(json_codec.get_codec()))
+    with open(config_path, "w") as opened_file:
+        opened_file.write(json_string)
+    # Half of the dataset is in the journal (Eg.: The records of the last period).
+    with open("{}.journal".format(config_path), "w") as opened_file:
+        for single_dict in json_data[len(json_data) // 2 :]:
+            opened_file.write(json_codec.dumps(single_dict) + "\n")
+
+    json_storage = JsonStorage(config_path, c_logger=c_logger, journal_compaction_limit=10**9)
+    data_processor = DataProcessor(c_logger=c_logger, storage=json_storage)
+    report_generator = JsonReportGenerator(
+        records[0].date,
+        records[-1].date,
+        os.path.join(work_dir, "report.json"),
+        c_logger=c_logger,
+        data_processor=data_processor,
+    )
+
+    return {
+        "encode": measure(lambda: json_codec.dumps(json_data), repeat),
+        "decode": measure(lambda: json_codec.loads(json_string), repeat),
+        "load": measure(
+            lambda: JsonStorage(config_path, c_logger=c_logger, journal_compaction_limit=10**9),
+            repeat,
+        ),
+        "save": measure(json_storage.compact, repeat),
+        "report": measure(report_generator.write_data, repeat),
+    }
+
+
+####
+# ENTRY POINT
+####
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the available Json codecs.")
+
+    parser.add_argument("--years", dest="years", type=int, default=10, help="Years of data.")
+    parser.add_argument("--repeat", dest="repeat", type=int, default=5, help="Number of runs.")
+
+    args = parser.parse_args()
+
+    benchmark_logger = logging.getLogger("benchmark_json_codec")
+    benchmark_logger.setLevel(logging.WARNING)
+
+    dataset = generate_dataset(args.years)
+    print("Records: {} ; Codecs: {}".format(len(dataset), ", ".join(json_codec.CODECS)))
+    print(
+        "{:<8}{:>12}{:>12}{:>12}{:>12}{:>12}  (Records/sec)".format(
+            "codec", "encode", "decode", "load", "save", "report"
+        )
+    )
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for codec_name in json_codec.CODECS:
+            json_codec.set_codec(codec_name)
+            run_times = benchmark_codec(dataset, temp_dir, args.repeat, benchmark_logger)
+            print(
+                "{:<8}".format(codec_name)
+                + "".join(
+                    "{:>12.0f}".format(len(dataset) / run_times[operation])
+                    for operation in ("encode", "decode", "load", "save", "report")
+                )
+            )
+    finally:
+        shutil.rmtree(temp_dir)
@@ -4,6 +4,8 @@ This module contains all helper attributes.
 
 import json
 import os
+import shutil
+import threading
 
 PATH_OF_FILE_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)))  # noqa: E402
 X_AXIS_CONFIG_FILE_PATH = os.path.join(PATH_OF_FILE_DIR, "..", "conf", "x_axis_config.json")
@@ -25,3 +27,53 @@ def x_axis_data_generator(x_axis_start, x_axis_stop):
             counter += 1
     with open(X_AXIS_CONFIG_FILE_PATH, "w") as opened_json:
         json.dump(json_data, opened_json)
+
+
+def write_file_atomically(file_path, content, backup_path=None):
+    """
+    This function writes the content to a file in crash-safe way.
+    The content is written to a temporary file next to the target file, it is flushed to the
+    disk and the temporary file replaces the target file. A reader sees the old or the new
+    content, never a truncated one. The name of the temporary file is unique per process and
+    thread so parallel writers don't replace each other's temporary file.
+    :param file_path: Path of the target file.
+    :param content: Content of the file as a string (Or bytes for binary files).
+    :param backup_path: If it is set, the previous version of the target file is kept on this
+                        path (It is overwritten on every write).
+    :return: None
+    """
+
+    temp_file_path = "{}.{}-{}.tmp".format(file_path, os.getpid(), threading.get_ident())
+    with open(temp_file_path, "wb" if isinstance(content, bytes) else "w") as opened_file:
+        opened_file.write(content)
+        opened_file.flush()
+        os.fsync(opened_file.fileno())
+
+    if backup_path and os.path.isfile(file_path) and os.stat(file_path).st_size:
+        if os.path.isfile(backup_path):
+            os.remove(backup_path)
+        try:
+            # The hard link is cheap and the target file is never missing.
+            os.link(file_path, backup_path)
+        except OSError:
+            shutil.copy2(file_path, backup_path)
+
+    os.replace(temp_file_path, file_path)
+    _fsync_directory(os.path.dirname(os.path.abspath(file_path)))
+
+
+def _fsync_directory(directory_path):
+    """
+    This function flushes the directory entries to the disk (The renaming is durable after it).
+    It is not supported on Windows so it is skipped there.
+    :param directory_path: Path of the directory.
+    :return: None
+    """
+
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    directory_fd = os.open(directory_path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)